@@ -0,0 +1,414 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Headless benchmarks for qtap, runs with the offscreen Qt platform.
+
+Measures:
+    * ``Function``/``Functions`` construction time, peak Python memory and RSS growth for N functions x M args
+    * ``sig_changed`` emission throughput while dragging a slider, for each ``emit_mode``
+    * ``get_data()`` / ``set_data()`` / ``snapshot()`` latency
+    * import time of the package, signature and model modules in fresh interpreters
+
+Results are written as JSON. Pass ``--compare`` with a previous results file
+to exit with a non-zero status if anything got slower than ``--tolerance``.
+The run also fails if the signature or model modules take longer than ``--import-budget``
+milliseconds to import, or if importing them loads Qt or NumPy.
+
+Usage::
+
+    python benchmarks/bench_qtap.py --output bench.json
+    python benchmarks/bench_qtap.py --compare bench.json
+    python benchmarks/bench_qtap.py --import-only
+
+GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007
+"""
+
+import os
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import sys
+import gc
+import json
+import time
+import argparse
+import platform
+import subprocess
+import itertools
+import statistics
+import tracemalloc
+from typing import Dict, List, Optional
+
+from PyQt5 import QtCore, QtWidgets
+
+_root = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+sys.path.insert(0, _root)
+
+import qtap
+from qtap import Function, Functions
+from qtap.signature import clear_cache
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+def make_functions(n_functions: int, n_args: int) -> List[callable]:
+    """Create ``n_functions`` functions, each with ``n_args`` annotated arguments of mixed types"""
+    types = [('int', '1'), ('float', '0.5'), ('str', "'a'"), ('bool', 'True')]
+
+    functions = list()
+    for i in range(n_functions):
+        args = ', '.join(
+            f'a{j}: {types[j % len(types)][0]} = {types[j % len(types)][1]}' for j in range(n_args)
+        )
+        ns = dict()
+        exec(f'def func_{i}({args}):\n    pass', ns)
+        functions.append(ns[f'func_{i}'])
+
+    return functions
+
+
+def _process_events():
+    QtWidgets.QApplication.processEvents()
+
+
+def _timings(samples: List[float]) -> Dict[str, float]:
+    samples = sorted(samples)
+    return {
+        'mean': statistics.mean(samples),
+        'median': statistics.median(samples),
+        'p95': samples[min(len(samples) - 1, int(0.95 * len(samples)))],
+        'min': samples[0],
+    }
+
+
+def _rss_bytes() -> Optional[int]:
+    # resident set size of this process, None if it cannot be read
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+
+    # current RSS on Linux, not ru_maxrss which is the peak and does not grow for memory freed by an earlier run
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def bench_construction(n_functions: int, n_args: int, repeat: int, lazy: bool) -> dict:
+    functions = make_functions(n_functions, n_args)
+
+    times = list()
+    peaks = list()
+    for i in range(repeat):
+        # measure introspection too, except for the cached runs
+        if i == 0:
+            clear_cache()
+
+        gc.collect()
+        tracemalloc.start()
+        t0 = time.perf_counter()
+
+        w = Functions(functions, scroll=True, lazy=lazy)
+
+        times.append(time.perf_counter() - t0)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+        w.deleteLater()
+        _process_events()
+
+    # measured without tracemalloc, which allocates for every traced block,
+    # includes the Qt widgets & other C++ allocations that tracemalloc does not see
+    gc.collect()
+    rss = _rss_bytes()
+
+    w = Functions(functions, scroll=True, lazy=lazy)
+
+    if rss is not None:
+        rss = _rss_bytes() - rss
+
+    w.deleteLater()
+    _process_events()
+
+    return {
+        'n_functions': n_functions,
+        'n_args': n_args,
+        'lazy': lazy,
+        'first_s': times[0],
+        'cached_s': _timings(times[1:]) if len(times) > 1 else None,
+        # Python allocations only, from tracemalloc
+        'peak_python_memory_bytes': max(peaks),
+        'rss_delta_bytes': rss,
+    }
+
+
+def bench_single_function(n_args: int, repeat: int) -> dict:
+    func = make_functions(1, n_args)[0]
+
+    times = list()
+    for i in range(repeat):
+        t0 = time.perf_counter()
+        f = Function(func)
+        times.append(time.perf_counter() - t0)
+        f.widget.deleteLater()
+        f.deleteLater()
+
+    _process_events()
+
+    return {'n_args': n_args, 'construction_s': _timings(times)}
+
+
+def bench_emission(n_ticks: int, emit_mode: Optional[str], n_args: int) -> dict:
+    func = make_functions(1, n_args)[0]
+
+    w = Functions([func], arg_opts=[{'a0': {'use_slider': True, 'minmax': (0, n_ticks)}}], emit_mode=emit_mode)
+    f = w.functions[0]
+
+    received = list()
+    w.sig_changed.connect(received.append)
+
+    slider = f.arguments.a0.slider
+
+    t0 = time.perf_counter()
+
+    slider.sliderPressed.emit()
+    for i in range(n_ticks):
+        slider.setValue(i)
+        if i % 16 == 0:
+            # timers only fire while the event loop runs, as they would during a real drag
+            _process_events()
+    slider.sliderReleased.emit()
+
+    drag_s = time.perf_counter() - t0
+
+    # wait for the trailing emission
+    deadline = time.perf_counter() + 1
+    while f.get_data()['a0'] != n_ticks - 1 or (received and received[-1][func]['a0'] != n_ticks - 1):
+        _process_events()
+        if time.perf_counter() > deadline:
+            break
+    w.flush()
+
+    total_s = time.perf_counter() - t0
+
+    result = {
+        'emit_mode': emit_mode,
+        'n_ticks': n_ticks,
+        'drag_s': drag_s,
+        'ticks_per_s': n_ticks / drag_s,
+        'emissions': len(received),
+        'suppressed': w.get_suppressed_counts()['sig_changed'],
+        'final_value_delivered': bool(received) and received[-1][func]['a0'] == n_ticks - 1,
+        'total_s': total_s,
+    }
+
+    w.deleteLater()
+    _process_events()
+
+    return result
+
+
+def bench_data(n_functions: int, n_args: int, repeat: int) -> dict:
+    functions = make_functions(n_functions, n_args)
+    w = Functions(functions)
+    f = w.functions[0]
+
+    def timeit(fn: callable) -> Dict[str, float]:
+        samples = list()
+        for i in range(repeat):
+            t0 = time.perf_counter()
+            fn()
+            samples.append(time.perf_counter() - t0)
+        return _timings(samples)
+
+    data = f.get_data()
+
+    # two distinct sets of values, alternated so that every set_data() applies a change to every argument
+    def changed(v):
+        if isinstance(v, bool):
+            return not v
+        elif isinstance(v, (int, float)):
+            return v + 1
+        return v + 'b'
+
+    value_sets = [{k: changed(v) for k, v in data.items()}, dict(data)]
+    counter = itertools.count()
+
+    result = {
+        'n_functions': n_functions,
+        'n_args': n_args,
+        'function_get_data_s': timeit(f.get_data),
+        'function_snapshot_s': timeit(f.snapshot),
+        'function_set_data_s': timeit(lambda: f.set_data(value_sets[next(counter) % 2])),
+        'functions_get_data_s': timeit(w.get_data),
+        'functions_snapshot_s': timeit(w.snapshot),
+    }
+
+    w.deleteLater()
+    _process_events()
+
+    return result
+
+
+# modules that must import without Qt, within the import budget
+_headless_modules = ['qtap', 'qtap.signature', 'qtap.model']
+
+# runs in a fresh interpreter
+_import_script = """
+import sys, time, json
+t0 = time.perf_counter()
+import {module}
+t = time.perf_counter() - t0
+print(json.dumps({{'import_s': t, 'loaded': [m for m in ('PyQt5', 'numpy', 'multiprocessing') if m in sys.modules]}}))
+"""
+
+
+def bench_import(module: str, repeat: int) -> dict:
+    times = list()
+    for i in range(repeat):
+        out = subprocess.run(
+            [sys.executable, '-c', _import_script.format(module=module)],
+            cwd=_root, stdout=subprocess.PIPE, check=True, universal_newlines=True
+        ).stdout
+        result = json.loads(out)
+        times.append(result['import_s'])
+
+    return {
+        'module': module,
+        # the min is the least affected by other processes
+        'import_s': min(times),
+        'loaded': result['loaded'],
+    }
+
+
+def check_import_budget(results: List[dict], budget_ms: float) -> List[str]:
+    """Headless modules that are slower than the budget or that load heavy dependencies"""
+    failures = list()
+    for r in results:
+        if r['module'] not in _headless_modules:
+            continue
+
+        if r['import_s'] * 1000 > budget_ms:
+            failures.append(f"import {r['module']}: {r['import_s'] * 1000:.1f}ms > {budget_ms}ms")
+
+        if r['loaded']:
+            failures.append(f"import {r['module']} loads {', '.join(r['loaded'])}")
+
+    return failures
+
+
+def run_imports(args) -> List[dict]:
+    return [bench_import(module, args.import_repeat) for module in _headless_modules + ['qtap.function']]
+
+
+def run(args) -> dict:
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+    results = {
+        'meta': {
+            'qtap_file': qtap.__file__,
+            'python': platform.python_version(),
+            'qt': QtCore.QT_VERSION_STR,
+            'platform': platform.platform(),
+            'qpa': os.environ.get('QT_QPA_PLATFORM'),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'construction': [],
+        'function_construction': [],
+        'emission': [],
+        'data': [],
+        'import': run_imports(args),
+    }
+
+    for n_functions in args.functions:
+        for n_args in args.args:
+            for lazy in (False, True):
+                results['construction'].append(bench_construction(n_functions, n_args, args.repeat, lazy))
+
+    for n_args in args.args:
+        results['function_construction'].append(bench_single_function(n_args, args.repeat * 5))
+
+    for emit_mode in (None, 'debounce', 'throttle', 'release'):
+        results['emission'].append(bench_emission(args.ticks, emit_mode, max(args.args)))
+
+    results['data'].append(bench_data(max(args.functions), max(args.args), args.repeat * 100))
+
+    return results
+
+
+def _flatten(d, prefix: str = '') -> Dict[str, float]:
+    # timing values keyed by their path, used to compare two result files
+    flat = dict()
+    if isinstance(d, dict):
+        for k, v in d.items():
+            flat.update(_flatten(v, f'{prefix}/{k}'))
+    elif isinstance(d, list):
+        for item in d:
+            # use the parameters of each benchmark as its key
+            key = ','.join(
+                f'{k}={v}' for k, v in item.items() if k in ('n_functions', 'n_args', 'lazy', 'emit_mode', 'module')
+            )
+            flat.update(_flatten(item, f'{prefix}[{key}]'))
+    elif isinstance(d, float) and (prefix.endswith('_s') or '_s/' in prefix) and not prefix.endswith('per_s'):
+        flat[prefix] = d
+    return flat
+
+
+def compare(baseline: dict, current: dict, tolerance: float) -> List[str]:
+    """Timings that are more than ``tolerance`` slower than the baseline"""
+    base = _flatten({k: v for k, v in baseline.items() if k != 'meta'})
+    cur = _flatten({k: v for k, v in current.items() if k != 'meta'})
+
+    regressions = list()
+    for key, t in cur.items():
+        if key in base and base[key] > 0 and t > base[key] * (1 + tolerance):
+            regressions.append(f'{key}: {base[key]:.6g}s -> {t:.6g}s ({t / base[key]:.2f}x)')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--functions', type=int, nargs='+', default=[10, 100], help='numbers of functions')
+    parser.add_argument('--args', type=int, nargs='+', default=[4, 20], help='numbers of args per function')
+    parser.add_argument('--repeat', type=int, default=3, help='repeats for construction benchmarks')
+    parser.add_argument('--ticks', type=int, default=1000, help='slider ticks for the emission benchmarks')
+    parser.add_argument('--output', type=str, default=None, help='JSON output file, default is stdout')
+    parser.add_argument('--compare', type=str, default=None, help='baseline JSON file to compare with')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed slowdown relative to the baseline')
+    parser.add_argument('--import-budget', type=float, default=50, help='import time budget in ms for headless modules')
+    parser.add_argument('--import-repeat', type=int, default=5, help='fresh interpreters per import benchmark')
+    parser.add_argument('--import-only', action='store_true', help='only run the import benchmarks')
+    args = parser.parse_args()
+
+    if args.import_only:
+        results = {'import': run_imports(args)}
+    else:
+        results = run(args)
+
+    out = json.dumps(results, indent=2)
+    if args.output is None:
+        print(out)
+    else:
+        with open(args.output, 'w') as f:
+            f.write(out)
+
+    if args.compare is not None:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+
+        regressions = compare(baseline, results, args.tolerance)
+        if regressions:
+            print('Regressions:\n' + '\n'.join(regressions), file=sys.stderr)
+            sys.exit(1)
+
+    failures = check_import_budget(results['import'], args.import_budget)
+    if failures:
+        print('Import budget exceeded:\n' + '\n'.join(failures), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1 +1,29 @@
-from .function import Function, Functions
+import importlib
+
+# attributes are imported on first access so that ``import qtap`` does not load Qt,
+# the model and signature modules can be used without PyQt5
+_lazy_attributes = {
+    'Function': 'function',
+    'Functions': 'function',
+    'ParameterSet': 'model',
+    'ArgSpec': 'model',
+}
+
+__all__ = list(_lazy_attributes.keys())
+
+
+def __getattr__(name: str):
+    try:
+        module = _lazy_attributes[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+
+    value = getattr(importlib.import_module(f'.{module}', __name__), name)
+
+    # cache so that __getattr__ is not called again
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals().keys()) + __all__)
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@author: kushal
+
+GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007
+"""
+
+from PyQt5 import QtCore
+from typing import Dict, Hashable, Optional, Tuple
+import asyncio
+import threading
+from functools import partial
+from time import perf_counter
+from concurrent.futures import Future
+from .executor import BaseExecutor, _RunnableSignals
+
+
+_shared_loop: Optional[asyncio.AbstractEventLoop] = None
+_shared_loop_lock = threading.Lock()
+
+
+def _run_loop(loop: asyncio.AbstractEventLoop):
+    asyncio.set_event_loop(loop)
+    loop.run_forever()
+
+
+def get_shared_loop() -> asyncio.AbstractEventLoop:
+    """
+    Event loop running in a background thread, shared by all ``AsyncExecutor`` instances
+    that are not given a loop. Started on first use.
+
+    Returns
+    -------
+    asyncio.AbstractEventLoop
+        running event loop
+    """
+    global _shared_loop
+
+    with _shared_loop_lock:
+        if _shared_loop is None or _shared_loop.is_closed():
+            _shared_loop = asyncio.new_event_loop()
+            threading.Thread(target=_run_loop, args=(_shared_loop,), name='qtap-asyncio', daemon=True).start()
+
+    return _shared_loop
+
+
+def is_coroutine_function(func: callable) -> bool:
+    """``True`` if calling ``func`` returns a coroutine, also for partials of coroutine functions"""
+    while isinstance(func, partial):
+        func = func.func
+    return asyncio.iscoroutinefunction(func)
+
+
+async def _timed_await(func: callable, kwargs: dict) -> Tuple[bool, object, float]:
+    # returns success, result or exception, runtime
+    t0 = perf_counter()
+    try:
+        if is_coroutine_function(func):
+            result = await func(**kwargs)
+        else:
+            # synchronous callables run in the default executor of the loop
+            result = await asyncio.get_event_loop().run_in_executor(None, partial(func, **kwargs))
+        ok = True
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        result = e
+        ok = False
+
+    return ok, result, perf_counter() - t0
+
+
+class AsyncExecutor(BaseExecutor):
+    cancels_running = True
+
+    def __init__(
+            self,
+            loop: Optional[asyncio.AbstractEventLoop] = None,
+            parent: Optional[QtCore.QObject] = None
+    ):
+        """
+        Runs coroutine functions on an asyncio event loop, ``await func(**kwargs)``.
+        Used by default by ``Function.run()`` for ``async def`` functions.
+
+        Unlike the other executors, a new request for a key cancels the task that is running for that key
+        instead of waiting for it to finish, and ``cancel()`` cancels the task.
+        Results are delivered to the GUI thread through ``sig_result`` & ``sig_error``, the GUI is never blocked.
+
+        Synchronous callables are run in the default executor of the loop.
+
+        Parameters
+        ----------
+        loop : Optional[asyncio.AbstractEventLoop]
+            Running event loop to schedule the tasks on, such as a loop that is integrated with the
+            Qt event loop or a loop that talks to local services. It can run in any thread.
+            By default a loop running in a background thread is shared by all instances, see ``get_shared_loop()``.
+
+        parent : Optional[QtCore.QObject]
+            parent QObject
+        """
+        super(AsyncExecutor, self).__init__(parent)
+
+        if loop is None:
+            loop = get_shared_loop()
+
+        self.loop = loop
+
+        # request id and future of the task for each key
+        self._tasks: Dict[Hashable, Tuple[int, Future]] = dict()
+
+        # futures finish in the loop thread, deliver to the GUI thread with a queued connection
+        self._signals = _RunnableSignals(self)
+        self._signals.sig_finished.connect(self._on_task_finished)
+        self._signals.sig_runtime.connect(self.sig_runtime)
+
+    def _submit(self, func: callable, kwargs: dict, key: Hashable, request_id: int):
+        # cancel the running task instead of waiting for it
+        if key in self._tasks:
+            self._tasks[key][1].cancel()
+
+        self._running.add(key)
+        self._start(func, kwargs, key, request_id)
+
+    def _start(self, func: callable, kwargs: dict, key: Hashable, request_id: int):
+        future = asyncio.run_coroutine_threadsafe(_timed_await(func, kwargs), self.loop)
+        self._tasks[key] = (request_id, future)
+
+        future.add_done_callback(
+            lambda fut: self._task_done(fut, key, request_id)
+        )
+
+    def _task_done(self, future: Future, key: Hashable, request_id: int):
+        # called from the loop thread
+        if future.cancelled():
+            self._signals.sig_finished.emit(key, request_id, False, asyncio.CancelledError())
+            return
+
+        try:
+            ok, result, runtime = future.result()
+        except Exception as e:
+            ok, result = False, e
+        else:
+            self._signals.sig_runtime.emit(key, runtime)
+
+        self._signals.sig_finished.emit(key, request_id, ok, result)
+
+    def _on_task_finished(self, key: Hashable, request_id: int, ok: bool, result: object):
+        task = self._tasks.get(key)
+
+        if task is None or task[0] != request_id:
+            # cancelled task that was replaced by a newer one, which is still running
+            self.n_superseded += 1
+            return
+
+        del self._tasks[key]
+        self._on_finished(key, request_id, ok, result)
+
+    def cancel(self, key: Hashable = None):
+        """
+        Cancel the running task for ``key``, its result is dropped.
+
+        Parameters
+        ----------
+        key : Hashable
+            request key
+        """
+        super(AsyncExecutor, self).cancel(key)
+
+        if key in self._tasks:
+            self._tasks[key][1].cancel()
+
+    def shutdown(self):
+        """Cancel all the running tasks"""
+        for key in list(self._tasks.keys()):
+            self.cancel(key)
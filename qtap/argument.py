@@ -6,10 +6,10 @@
 GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007
 """
 
-from PyQt5 import QtCore, QtGui, QtWidgets
-import inspect
+from PyQt5 import QtCore, QtWidgets
 from builtins import int, float, str, bool
-from typing import *
+from typing import Dict, List, Optional, Union
+from .model import ArgSpec, default_minmax, default_step
 
 
 widget_mapping = {
@@ -31,6 +31,12 @@ class Arg(QtCore.QObject):
     acceptable_types = (int, float, str, bool)
     sig_changed = QtCore.pyqtSignal(object)
 
+    # kind of the ArgSpec created when no spec is given
+    kind = 'generic'
+
+    # widgets that stretch to fill the row, no spacer is added after them
+    stretch = False
+
     def __init__(
             self,
             name: str,
@@ -39,10 +45,12 @@ class Arg(QtCore.QObject):
             parent: QtWidgets.QWidget,
             vlayout: QtWidgets.QVBoxLayout,
             tooltip: Optional[str] = None,
+            spec: Optional[ArgSpec] = None,
             **kwargs
     ):
         """
         Creates the appropriate QWidget interface.
+        The widget is a view of an ``ArgSpec``, which holds the value and options.
 
         Parameters
         ----------
@@ -65,13 +73,24 @@ class Arg(QtCore.QObject):
         tooltip : str
             toolTip
 
+        spec : Optional[ArgSpec]
+            spec that holds the state of this argument, usually from a ``ParameterSet``.
+            A new spec is created if not given.
+
         Attributes
         ----------
         sig_changed : object
             emits ``self.val`` when GUI value is changed.
+
+        spec : ArgSpec
+            state of this argument
         """
         super(Arg, self).__init__(parent)
 
+        if spec is None:
+            spec = ArgSpec(name, typ, val, kind=self.kind, tooltip=tooltip)
+        self.spec = spec
+
         self.parent = parent
         self.vlayout = vlayout
 
@@ -84,10 +103,10 @@ class Arg(QtCore.QObject):
         self.typ = typ
 
         self.widget: QtWidgets.QWidget  #: QWidget for the argument
-        self.widget = widget_mapping[self.typ](self.parent)
+        self.widget = self.get_widget_type(self.typ)(self.parent)
         self.hlayout.addWidget(self.widget)
 
-        if typ is not str:
+        if typ is not str and not self.stretch:
             self.hlayout.addSpacerItem(
                 QtWidgets.QSpacerItem(
                     40, 20, QtWidgets.QSizePolicy.Expanding,
@@ -100,40 +119,175 @@ class Arg(QtCore.QObject):
         self.vlayout.addLayout(self.hlayout)
 
         if self.typ is str:
-            self.widget.textEdited.connect(lambda v: setattr(self, '_val', v))
+            self.widget.textEdited.connect(lambda v: setattr(self.spec, 'val', v))
             self.widget.textEdited.connect(lambda: self.sig_changed.emit(self.val))
         elif self.typ is bool:
-            self.widget.toggled.connect(lambda v: setattr(self, '_val', v))
+            self.widget.toggled.connect(lambda v: setattr(self.spec, 'val', v))
             self.widget.toggled.connect(lambda: self.sig_changed.emit(self.val))
 
-        if tooltip is not None:
-            self._qlabel.setToolTip(tooltip)
-            self.widget.setToolTip(tooltip)
+        self.tooltip = tooltip
+
+    @classmethod
+    def get_widget_type(cls, typ: type) -> type:
+        """QWidget type used for an argument type"""
+        return widget_mapping[typ]
+
+    @property
+    def typ(self) -> type:
+        """argument type"""
+        return self.spec.typ
+
+    @typ.setter
+    def typ(self, typ: type):
+        self.spec.typ = typ
+
+    @property
+    def tooltip(self) -> Optional[str]:
+        """toolTip for the label and widget"""
+        return self.spec.tooltip
+
+    @tooltip.setter
+    def tooltip(self, tooltip: Optional[str]):
+        self.spec.tooltip = tooltip
+
+        if tooltip is None:
+            tooltip = ''
+
+        self._qlabel.setToolTip(tooltip)
+        self.widget.setToolTip(tooltip)
+
+    def configure(
+            self,
+            name: str,
+            val: Union[int, float, str, bool],
+            tooltip: Optional[str] = None,
+            spec: Optional[ArgSpec] = None,
+            **kwargs
+    ):
+        """
+        Reuse this instance for a different argument with the same widget type.
+        Takes the same arguments as ``__init__()`` except ``typ``, ``parent`` and ``vlayout``,
+        the type is taken from ``spec`` if given.
+        """
+        if spec is not None:
+            self.spec = spec
+
+        self.name = name
+        self.tooltip = tooltip
+        self.val = val
+
+        self.set_invalid(None)
+
+    def set_invalid(self, messages: Optional[List[str]]):
+        """
+        Highlight the argument when it is part of a violated constraint, the messages are shown in the toolTip
+
+        Parameters
+        ----------
+        messages : Optional[List[str]]
+            messages of the violated constraints, ``None`` or empty clears the highlight
+        """
+        tooltip = self.spec.tooltip or ''
+
+        if messages:
+            self._qlabel.setStyleSheet('color: red')
+            tooltip = '\n'.join([tooltip] + [f'violates: {m}' for m in messages]).strip()
+        else:
+            self._qlabel.setStyleSheet('')
+
+        self._qlabel.setToolTip(tooltip)
+        self.widget.setToolTip(tooltip)
+
+    def _layout_items(self) -> list:
+        # items that this argument adds to the parent vlayout, in order
+        return [self.hlayout]
+
+    def detach(self):
+        """Remove from the parent vlayout and hide the widgets"""
+        if self.vlayout is None:
+            return
+
+        for item in self._layout_items():
+            if isinstance(item, QtWidgets.QLayout):
+                self.vlayout.removeItem(item)
+                item.setParent(None)
+            else:
+                self.vlayout.removeWidget(item)
+
+        for w in self._widgets():
+            w.hide()
+
+        self.vlayout = None
+
+    def attach(self, parent: QtWidgets.QWidget, vlayout: QtWidgets.QVBoxLayout, index: int) -> int:
+        """
+        Insert into a vlayout, reparents the widgets if necessary
+
+        Parameters
+        ----------
+        parent : QtWidgets.QWidget
+            parent widget
+
+        vlayout : QtWidgets.QVBoxLayout
+            parent VBoxLayout
+
+        index : int
+            position in the vlayout
+
+        Returns
+        -------
+        int
+            position after the items that were inserted
+        """
+        self.detach()
+
+        if parent is not self.parent:
+            self.parent = parent
+            self.setParent(parent)
+            for w in self._widgets():
+                w.setParent(parent)
+
+        self.vlayout = vlayout
+
+        for item in self._layout_items():
+            if isinstance(item, QtWidgets.QLayout):
+                self.vlayout.insertLayout(index, item)
+            else:
+                self.vlayout.insertWidget(index, item)
+            index += 1
+
+        for w in self._widgets():
+            w.show()
+
+        return index
+
+    def _widgets(self) -> list:
+        return [self._qlabel, self.widget]
 
     @property
     def name(self) -> str:
         """argument name"""
-        return self._name
+        return self.spec.name
 
     @name.setter
     def name(self, n):
-        self._name = n
-        self._qlabel.setText(f'{self._name}: ')
+        self.spec.name = n
+        self._qlabel.setText(f'{n}: ')
 
     @property
     def val(self) -> Union[int, float, str, bool]:
         """current argument value"""
-        return self._val
+        return self.spec.val
 
     @val.setter
     def val(self, v: Union[int, float, str, bool]):
         if v is None:
-            self._val = v
+            self.spec.val = v
             return
 
         assert isinstance(v, self.acceptable_types)
 
-        self._val = v
+        self.spec.val = v
 
         # use the correct func to set the value based on type
         getattr(self.widget, val_setters[type(self.widget)])(self.val)
@@ -144,6 +298,7 @@ class Arg(QtCore.QObject):
 
 class ArgNumeric(Arg):
     acceptable_types = (int, float)
+    kind = 'numeric'
 
     def __init__(
             self,
@@ -152,8 +307,8 @@ class ArgNumeric(Arg):
             val: Union[int, float],
             parent: QtWidgets.QWidget,
             vlayout: QtWidgets.QVBoxLayout,
-            minmax: tuple = (-1, 999),
-            step: Union[int, float] = 1,
+            minmax: tuple = default_minmax,
+            step: Union[int, float] = default_step,
             use_slider: bool = False,
             suffix: str = None,
             **kwargs
@@ -181,27 +336,96 @@ class ArgNumeric(Arg):
         super().__init__(name, typ, val, parent, vlayout, **kwargs)
 
         self.slider = None
+        self._use_slider = False
 
         self.minmax = minmax
 
         self.step = step
 
-        if use_slider:
+        self.use_slider = use_slider
+
+        self.suffix = suffix
+
+        self.widget.valueChanged.connect(lambda v: setattr(self.spec, 'val', v))
+        self.widget.valueChanged.connect(lambda: self.sig_changed.emit(self.val))
+        self.val = val
+
+    def configure(
+            self,
+            name: str,
+            val: Union[int, float],
+            minmax: tuple = default_minmax,
+            step: Union[int, float] = default_step,
+            use_slider: bool = False,
+            suffix: str = None,
+            tooltip: Optional[str] = None,
+            spec: Optional[ArgSpec] = None,
+            **kwargs
+    ):
+        if spec is not None:
+            self.spec = spec
+
+        self.minmax = minmax
+        self.step = step
+        self.use_slider = use_slider
+        self.suffix = suffix
+
+        super(ArgNumeric, self).configure(name, val, tooltip)
+
+    def _layout_items(self) -> list:
+        if self._use_slider:
+            return [self.hlayout, self.slider]
+        return [self.hlayout]
+
+    def _widgets(self) -> list:
+        if self._use_slider:
+            return [self._qlabel, self.widget, self.slider]
+        return [self._qlabel, self.widget]
+
+    @property
+    def use_slider(self) -> bool:
+        """show a slider below the spin box"""
+        return self._use_slider
+
+    @use_slider.setter
+    def use_slider(self, use: bool):
+        if use == self._use_slider:
+            return
+
+        if use and self.slider is None:
             self.slider = QtWidgets.QSlider(self.parent)
             self.slider.setOrientation(QtCore.Qt.Horizontal)
             self.slider.setMaximum(self.max)
             self.slider.setMinimum(self.min)
+            self.slider.setValue(int(self.widget.value()))
             self.widget.valueChanged.connect(self.slider.setValue)
             self.slider.valueChanged.connect(self.widget.setValue)
-            self.vlayout.addWidget(self.slider)
 
-        self.suffix = suffix
-        if self.suffix is not None:
-            self.widget.setSuffix(self.suffix)
+        self._use_slider = use
+        self.spec.use_slider = use
 
-        self.widget.valueChanged.connect(lambda v: setattr(self, '_val', v))
-        self.widget.valueChanged.connect(lambda: self.sig_changed.emit(self.val))
-        self.val = val
+        if self.vlayout is None:
+            # not attached to a layout
+            self.slider.setVisible(use)
+            return
+
+        if use:
+            self.slider.setValue(int(self.widget.value()))
+            self.vlayout.insertWidget(self.vlayout.indexOf(self.hlayout) + 1, self.slider)
+            self.slider.show()
+        else:
+            self.vlayout.removeWidget(self.slider)
+            self.slider.hide()
+
+    @property
+    def suffix(self) -> Optional[str]:
+        """text suffix for the spin box"""
+        return self.spec.suffix
+
+    @suffix.setter
+    def suffix(self, suffix: Optional[str]):
+        self.spec.suffix = suffix
+        self.widget.setSuffix('' if suffix is None else suffix)
 
     def set_slider(self):
         if self.slider is not None:
@@ -211,24 +435,23 @@ class ArgNumeric(Arg):
     @property
     def minmax(self) -> tuple:
         """minmax limits for the widget"""
-        return tuple(self._minmax)
+        return self.spec.minmax
 
     @minmax.setter
     def minmax(self, minmax: tuple):
-        self._minmax = list(minmax)
+        self.spec.minmax = tuple(minmax)
         self.min = self.minmax[0]
         self.max = self.minmax[1]
 
     @property
     def min(self) -> Union[int, float]:
         """min value limit for the widget"""
-        return self._min
+        return self.spec.minmax[0]
 
     @min.setter
     def min(self, v: Union[int, float]):
         assert isinstance(v, (int, float))
-        self._min = v
-        self._minmax[0] = v
+        self.spec.minmax = (v, self.spec.minmax[1])
 
         self.widget.setMinimum(v)
         self.set_slider()
@@ -236,13 +459,12 @@ class ArgNumeric(Arg):
     @property
     def max(self) -> Union[int, float]:
         """max value limit for the widget"""
-        return self._max
+        return self.spec.minmax[1]
 
     @max.setter
     def max(self, v: Union[int, float]):
         assert isinstance(v, (int, float))
-        self._max = v
-        self._minmax[1] = v
+        self.spec.minmax = (self.spec.minmax[0], v)
 
         self.widget.setMaximum(v)
         self.set_slider()
@@ -250,12 +472,12 @@ class ArgNumeric(Arg):
     @property
     def step(self) -> Union[int, float]:
         """step size for the widget"""
-        return self._step
+        return self.spec.step
 
     @step.setter
     def step(self, v: Union[int, float]):
         assert isinstance(v, (int, float))
-        self._step = v
+        self.spec.step = v
         self.widget.setSingleStep(v)
 
     def __repr__(self):
@@ -265,3 +487,72 @@ class ArgNumeric(Arg):
             f"step:\t{self.step}\n"
             f"suffix:\t{self.suffix}"
         )
+
+
+class ArgPool:
+    def __init__(self, maxsize: int = 64):
+        """
+        Keeps released ``Arg`` instances so that their widgets can be reused,
+        keyed by the widget type from ``widget_mapping``.
+        Can be shared between ``Function`` instances.
+
+        Parameters
+        ----------
+        maxsize : int
+            maximum number of instances kept for each widget type,
+            instances released beyond this are deleted
+        """
+        self.maxsize = maxsize
+        self._pool: Dict[type, List[Arg]] = dict()
+
+    def acquire(self, widget_type: type) -> Optional[Arg]:
+        """
+        Get a released instance
+
+        Parameters
+        ----------
+        widget_type : type
+            QWidget type, one of the values in ``widget_mapping``
+
+        Returns
+        -------
+        Optional[Arg]
+            ``None`` if there are no released instances with this widget type
+        """
+        args = self._pool.get(widget_type)
+        if not args:
+            return None
+        return args.pop()
+
+    def release(self, arg: Arg):
+        """
+        Detach an instance from its layout and keep it for reuse
+
+        Parameters
+        ----------
+        arg : Arg
+            instance that is no longer used
+        """
+        arg.detach()
+
+        args = self._pool.setdefault(type(arg.widget), list())
+
+        if len(args) >= self.maxsize:
+            arg.deleteLater()
+            for w in arg._widgets():
+                w.deleteLater()
+            return
+
+        args.append(arg)
+
+    def clear(self):
+        """Delete all released instances"""
+        for args in self._pool.values():
+            for arg in args:
+                arg.deleteLater()
+                for w in arg._widgets():
+                    w.deleteLater()
+        self._pool.clear()
+
+    def __len__(self):
+        return sum(len(args) for args in self._pool.values())
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@author: kushal
+
+GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007
+"""
+
+from PyQt5 import QtCore, QtWidgets
+from typing import Optional
+from .argument import Arg
+from .model import ArgSpec, _open_memmap
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# QAbstractItemModel uses int for rows and columns
+_max_rows = 2 ** 31 - 1
+
+
+class ArrayTableModel(QtCore.QAbstractTableModel):
+    # emitted when a cell has been written into the array in place
+    sig_edited = QtCore.pyqtSignal()
+
+    def __init__(self, array=None, parent: Optional[QtCore.QObject] = None):
+        """
+        Table model that views an array without copying it, edits are written into the array in place.
+        Only the cells that are visible in the view are read.
+
+        1D arrays are shown as a single column, arrays with more than 2 dimensions
+        are shown with the first dimension as rows and the remaining dimensions flattened into columns.
+
+        Parameters
+        ----------
+        array : np.ndarray
+            array to view, can be a ``np.memmap``
+
+        parent : Optional[QtCore.QObject]
+            parent QObject
+        """
+        super(ArrayTableModel, self).__init__(parent)
+
+        self._array = None
+        self._n_rows = 0
+        self._n_cols = 0
+
+        self.set_array(array)
+
+    @property
+    def array(self):
+        """the array being viewed"""
+        return self._array
+
+    def set_array(self, array):
+        """
+        View a different array
+
+        Parameters
+        ----------
+        array : np.ndarray
+            array to view, not copied
+        """
+        self.beginResetModel()
+
+        self._array = array
+
+        if array is None:
+            self._n_rows, self._n_cols = 0, 0
+        elif array.ndim == 0:
+            self._n_rows, self._n_cols = 1, 1
+        elif array.ndim == 1:
+            self._n_rows, self._n_cols = array.shape[0], 1
+        else:
+            self._n_rows = array.shape[0]
+            self._n_cols = int(np.prod(array.shape[1:]))
+
+        self.endResetModel()
+
+    def _index(self, row: int, col: int) -> tuple:
+        # index into the original array, works for any number of dimensions without reshaping
+        if self._array.ndim == 0:
+            return ()
+        elif self._array.ndim == 1:
+            return (row,)
+        elif self._array.ndim == 2:
+            return row, col
+
+        return (row,) + np.unravel_index(col, self._array.shape[1:])
+
+    def rowCount(self, parent=QtCore.QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return min(self._n_rows, _max_rows)
+
+    def columnCount(self, parent=QtCore.QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return min(self._n_cols, _max_rows)
+
+    def data(self, index: QtCore.QModelIndex, role: int = QtCore.Qt.DisplayRole):
+        if not index.isValid() or self._array is None:
+            return None
+
+        if role in (QtCore.Qt.DisplayRole, QtCore.Qt.EditRole):
+            return self._array[self._index(index.row(), index.column())].item()
+
+        return None
+
+    def setData(self, index: QtCore.QModelIndex, value, role: int = QtCore.Qt.EditRole) -> bool:
+        if not index.isValid() or role != QtCore.Qt.EditRole:
+            return False
+
+        try:
+            self._array[self._index(index.row(), index.column())] = value
+        except (ValueError, TypeError):
+            return False
+
+        self.dataChanged.emit(index, index, [role])
+        self.sig_edited.emit()
+        return True
+
+    def flags(self, index: QtCore.QModelIndex) -> QtCore.Qt.ItemFlags:
+        flags = QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable
+
+        if self._array is not None and self._array.flags.writeable:
+            flags |= QtCore.Qt.ItemIsEditable
+
+        return flags
+
+    def headerData(self, section: int, orientation: QtCore.Qt.Orientation, role: int = QtCore.Qt.DisplayRole):
+        if role != QtCore.Qt.DisplayRole:
+            return None
+
+        if orientation == QtCore.Qt.Vertical or self._array is None or self._array.ndim <= 2:
+            return str(section)
+
+        # flattened trailing dimensions
+        return str(tuple(int(i) for i in np.unravel_index(section, self._array.shape[1:])))
+
+
+class ArgArray(Arg):
+    # emitted when the array has been edited in place, before sig_changed
+    sig_modified = QtCore.pyqtSignal()
+
+    acceptable_types = () if np is None else (np.ndarray,)
+    kind = 'array'
+    stretch = True
+
+    def __init__(
+            self,
+            name: str,
+            typ: type,
+            val,
+            parent: QtWidgets.QWidget,
+            vlayout: QtWidgets.QVBoxLayout,
+            memmap: Optional[str] = None,
+            dtype=None,
+            shape: Optional[tuple] = None,
+            mode: str = 'r+',
+            **kwargs
+    ):
+        """
+        Creates a table for viewing and editing a NumPy array argument.
+        The array is never copied, ``val`` and ``get_data()`` return the same array object,
+        and edits are written into the array in place. Use ``memmap`` for arrays that do not fit in memory.
+
+        Since the array is the same object after an edit, ``sig_modified`` is emitted before ``sig_changed``
+        so that a ``Function`` can tell its ``ParameterSet`` that the value was modified in place.
+
+        Parameters
+        ----------
+        val : np.ndarray
+            array, held by reference
+
+        memmap : Optional[str]
+            path to a file to memory map with ``np.memmap``, used instead of ``val``.
+            Opened by the ``ArgSpec`` when a ``spec`` is given, such as from a ``Function``.
+
+        dtype
+            dtype of the memory mapped file, default is ``float64``
+
+        shape : Optional[tuple]
+            shape of the memory mapped file
+
+        mode : str
+            mode for ``np.memmap``, use ``"r"`` for a read-only table
+
+        **kwargs
+            passed to Arg
+        """
+        if np is None:
+            raise ImportError("NumPy is required for array arguments")
+
+        self.model = ArrayTableModel()
+
+        if memmap is not None and kwargs.get('spec') is None:
+            val = _open_memmap(memmap, dtype, shape, mode)
+
+        super(ArgArray, self).__init__(name, typ, val, parent, vlayout, **kwargs)
+
+        self.model.setParent(self)
+
+        # only the visible rows are ever read, fixed row heights avoid measuring each row
+        self.widget.verticalHeader().setSectionResizeMode(QtWidgets.QHeaderView.Fixed)
+        self.widget.horizontalHeader().setSectionResizeMode(QtWidgets.QHeaderView.Interactive)
+        self.widget.setModel(self.model)
+
+        self.model.sig_edited.connect(self._edited)
+
+    def _edited(self):
+        self.sig_modified.emit()
+        self.sig_changed.emit(self.val)
+
+    @classmethod
+    def get_widget_type(cls, typ: type) -> type:
+        return QtWidgets.QTableView
+
+    def configure(
+            self,
+            name: str,
+            val,
+            memmap: Optional[str] = None,
+            dtype=None,
+            shape: Optional[tuple] = None,
+            mode: str = 'r+',
+            tooltip: Optional[str] = None,
+            spec: Optional[ArgSpec] = None,
+            **kwargs
+    ):
+        if memmap is not None and spec is None:
+            val = _open_memmap(memmap, dtype, shape, mode)
+
+        super(ArgArray, self).configure(name, val, tooltip, spec)
+
+    @property
+    def val(self):
+        """current array, the same object that was set"""
+        return self.spec.val
+
+    @val.setter
+    def val(self, v):
+        if v is not None:
+            assert isinstance(v, self.acceptable_types)
+
+        self.spec.val = v
+        self.model.set_array(v)
+
+    def __repr__(self):
+        if self.val is None:
+            return super(ArgArray, self).__repr__()
+
+        return f"name:\t{self.name}\n" \
+               f"val:\t{type(self.val).__name__} {self.val.shape} {self.val.dtype}\n" \
+               f"typ:\t{self.typ}"
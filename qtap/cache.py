@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@author: kushal
+
+GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007
+"""
+
+import os
+import shutil
+import inspect
+import pickle
+import hashlib
+from typing import Dict, Optional, Tuple
+from functools import partial
+from collections import OrderedDict
+
+
+def _callable_name(func: callable) -> str:
+    module = getattr(func, '__module__', None)
+    qualname = getattr(func, '__qualname__', None)
+
+    if qualname is None:
+        # partials and other callable objects
+        qualname = type(func).__qualname__
+
+    return f'{module}.{qualname}'
+
+
+def source_hash(func: callable) -> str:
+    """
+    Hash of the source code of a callable, falls back to the bytecode if the source is not available.
+
+    Parameters
+    ----------
+    func : callable
+        callable to hash
+
+    Returns
+    -------
+    str
+        hex digest
+    """
+    try:
+        src = inspect.getsource(func).encode()
+    except (OSError, TypeError):
+        code = getattr(func, '__code__', None)
+        if code is None:
+            src = _callable_name(func).encode()
+        else:
+            src = code.co_code + repr(code.co_consts).encode()
+
+    return hashlib.sha1(src).hexdigest()
+
+
+def _unwrap(func: callable) -> Tuple[callable, list]:
+    # underlying function and the state bound to it by partials, methods and closures
+    bound = list()
+
+    while isinstance(func, partial):
+        bound.append((func.args, sorted(func.keywords.items(), key=lambda kv: kv[0])))
+        func = func.func
+
+    if inspect.ismethod(func):
+        bound.append(func.__self__)
+        func = func.__func__
+
+    closure = getattr(func, '__closure__', None)
+    if closure:
+        try:
+            bound.append([cell.cell_contents for cell in closure])
+        except ValueError:
+            # a cell that is not assigned yet
+            raise TypeError(f'`{_callable_name(func)}` has an empty closure cell')
+
+    return func, bound
+
+
+def _identity(func: callable) -> tuple:
+    # objects that identify a callable in memory, a new bound method object is created on each attribute access
+    if inspect.ismethod(func):
+        return func.__self__, func.__func__
+    return func,
+
+
+def data_hash(kwargs: dict) -> str:
+    """
+    Stable hash of a kwargs dict, such as from ``Function.get_data()``
+
+    Parameters
+    ----------
+    kwargs : dict
+        argument names and values, values must be picklable
+
+    Returns
+    -------
+    str
+        hex digest
+    """
+    items = tuple(sorted(kwargs.items(), key=lambda kv: kv[0]))
+    return hashlib.sha1(pickle.dumps(items, protocol=4)).hexdigest()
+
+
+class ResultCache:
+    def __init__(self, maxsize: int = 128, directory: Optional[str] = None):
+        """
+        Cache for function results, keyed by the callable and a hash of its kwargs.
+
+        Results are kept in memory in a least recently used cache, keyed by the callable object itself,
+        and optionally pickled to files in ``directory``. Results on disk are keyed by the name and source
+        code of the underlying function, and the state bound to it by ``functools.partial``, closures and
+        bound methods, so such callables are only stored on disk if that state can be pickled.
+        Results on disk are invalidated when the source code of the function changes.
+        Can be shared between functions.
+
+        Parameters
+        ----------
+        maxsize : int
+            maximum number of results kept in memory
+
+        directory : Optional[str]
+            directory for the on-disk cache, not used if ``None``
+
+        Attributes
+        ----------
+        hits : int
+            number of results returned from memory
+
+        disk_hits : int
+            number of results returned from disk
+
+        misses : int
+            number of lookups where no result was found
+        """
+        self.maxsize = maxsize
+        self.directory = directory
+
+        # (identity, result) keyed by the ids of the identity objects and the data hash,
+        # holding the identity keeps the ids from being reused while the entry exists
+        self._memory = OrderedDict()
+
+        # source hash for each callable, computed once
+        self._source_hashes: Dict[callable, str] = dict()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if self.directory is not None:
+            os.makedirs(self.directory, exist_ok=True)
+
+    def _source_hash(self, func: callable) -> str:
+        try:
+            return self._source_hashes[func]
+        except KeyError:
+            h = source_hash(func)
+        except TypeError:
+            # unhashable callable
+            return source_hash(func)
+
+        self._source_hashes[func] = h
+
+        if self.directory is not None:
+            self._invalidate_disk(func, h)
+
+        return h
+
+    def _func_dir(self, func: callable) -> str:
+        return os.path.join(self.directory, _callable_name(func))
+
+    def _invalidate_disk(self, func: callable, current_hash: str):
+        # remove results from previous versions of the source code
+        func_dir = self._func_dir(func)
+        if not os.path.isdir(func_dir):
+            return
+
+        for h in os.listdir(func_dir):
+            if h != current_hash:
+                shutil.rmtree(os.path.join(func_dir, h), ignore_errors=True)
+
+    def _key(self, func: callable, kwargs: dict) -> Optional[Tuple[tuple, Optional[Tuple[str, str, str, str]]]]:
+        # memory key, disk key
+        try:
+            h = data_hash(kwargs)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            # kwargs cannot be hashed, cannot be cached
+            return None
+
+        memory_key = tuple(map(id, _identity(func))) + (h,)
+
+        if self.directory is None:
+            return memory_key, None
+
+        try:
+            base, bound = _unwrap(func)
+            bound_hash = hashlib.sha1(pickle.dumps(bound, protocol=4)).hexdigest() if bound else '_'
+            disk_key = _callable_name(base), self._source_hash(base), bound_hash, h
+        except (pickle.PicklingError, TypeError, AttributeError):
+            # the bound state cannot be pickled, only kept in memory
+            disk_key = None
+
+        return memory_key, disk_key
+
+    def _path(self, key: Tuple[str, str, str, str]) -> str:
+        return os.path.join(self.directory, *key) + '.pickle'
+
+    def get(self, func: callable, kwargs: dict) -> Tuple[bool, object]:
+        """
+        Lookup the result for a callable and its kwargs
+
+        Parameters
+        ----------
+        func : callable
+            function
+
+        kwargs : dict
+            kwargs for the function
+
+        Returns
+        -------
+        Tuple[bool, object]
+            (``True``, result) if found, else (``False``, ``None``)
+        """
+        key = self._key(func, kwargs)
+
+        if key is None:
+            self.misses += 1
+            return False, None
+
+        memory_key, disk_key = key
+        identity = _identity(func)
+
+        entry = self._memory.get(memory_key)
+        if entry is not None and all(a is b for a, b in zip(entry[0], identity)):
+            self.hits += 1
+            self._memory.move_to_end(memory_key)
+            return True, entry[1]
+
+        if disk_key is not None:
+            path = self._path(disk_key)
+            if os.path.isfile(path):
+                try:
+                    with open(path, 'rb') as f:
+                        result = pickle.load(f)
+                except Exception:
+                    # corrupt or incompatible file, treat as a miss
+                    os.remove(path)
+                else:
+                    self.disk_hits += 1
+                    self._put_memory(memory_key, identity, result)
+                    return True, result
+
+        self.misses += 1
+        return False, None
+
+    def put(self, func: callable, kwargs: dict, result: object):
+        """
+        Store the result for a callable and its kwargs
+
+        Parameters
+        ----------
+        func : callable
+            function
+
+        kwargs : dict
+            kwargs that were used for the function
+
+        result : object
+            result of the function
+        """
+        key = self._key(func, kwargs)
+
+        if key is None:
+            return
+
+        memory_key, disk_key = key
+
+        self._put_memory(memory_key, _identity(func), result)
+
+        if disk_key is not None:
+            path = self._path(disk_key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+            try:
+                data = pickle.dumps(result, protocol=4)
+            except Exception:
+                # result cannot be pickled, only kept in memory
+                return
+
+            # write to a temporary file first so readers never see a partial file
+            tmp = f'{path}.{os.getpid()}.tmp'
+            with open(tmp, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, path)
+
+    def _put_memory(self, key: tuple, identity: tuple, result: object):
+        self._memory[key] = (identity, result)
+        self._memory.move_to_end(key)
+
+        while len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+
+    def clear(self, disk: bool = False):
+        """
+        Remove all results from memory and reset the statistics
+
+        Parameters
+        ----------
+        disk : bool
+            also remove all results from disk
+        """
+        self._memory.clear()
+        self._source_hashes.clear()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if disk and self.directory is not None:
+            shutil.rmtree(self.directory, ignore_errors=True)
+            os.makedirs(self.directory, exist_ok=True)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Cache statistics
+
+        Returns
+        -------
+        dict
+            {'hits': int, 'disk_hits': int, 'misses': int, 'size': int, 'maxsize': int}
+        """
+        return {
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'size': len(self._memory),
+            'maxsize': self.maxsize,
+        }
+
+    def __len__(self):
+        return len(self._memory)
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@author: kushal
+
+GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007
+"""
+
+from PyQt5 import QtCore, QtWidgets
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Union
+import enum
+from .argument import Arg
+from .model import ArgSpec
+from .signature import literal_values, is_enum
+
+
+def choice_text(value: object) -> str:
+    """Text shown for a choice, the name of ``Enum`` members and ``str()`` of other values"""
+    if isinstance(value, enum.Enum):
+        return value.name
+    return str(value)
+
+
+class Choices(QtCore.QObject):
+    # emitted when the choices have been loaded
+    sig_loaded = QtCore.pyqtSignal()
+
+    def __init__(
+            self,
+            source: Union[Iterable, Callable[[], Iterable], type],
+            parent: Optional[QtCore.QObject] = None
+    ):
+        """
+        Choices of an argument held in a ``QStringListModel``, usually shared by every ``ArgChoice``
+        with the same source through ``get_choices()``. The choices are only loaded by ``load()``.
+
+        Parameters
+        ----------
+        source : Union[Iterable, Callable[[], Iterable], type]
+            values, an ``Enum`` class, or a callable that returns the values
+
+        parent : Optional[QtCore.QObject]
+            parent QObject
+
+        Attributes
+        ----------
+        model : QtCore.QStringListModel
+            text of each choice, empty until loaded
+        """
+        super(Choices, self).__init__(parent)
+
+        self.source = source
+        self.model = QtCore.QStringListModel(self)
+
+        self._values: Dict[str, object] = dict()
+        self._loaded = False
+
+    @property
+    def loaded(self) -> bool:
+        """``True`` once the choices have been loaded"""
+        return self._loaded
+
+    def load(self):
+        """Load the choices if they have not been loaded yet, a callable source is only called once"""
+        if self._loaded:
+            return
+
+        if is_enum(self.source):
+            values = list(self.source)
+        elif callable(self.source):
+            values = self.source()
+        else:
+            values = self.source
+
+        self._values = {choice_text(v): v for v in values}
+
+        # one call, the model is not reset for each row
+        self.model.setStringList(list(self._values.keys()))
+        self._loaded = True
+
+        self.sig_loaded.emit()
+
+    def reload(self):
+        """Load the choices again, such as when the callable would now return different values"""
+        self._loaded = False
+        self.load()
+
+    def value(self, text: str) -> object:
+        """
+        Value of a choice, the choices are loaded if necessary
+
+        Parameters
+        ----------
+        text : str
+            text of the choice
+
+        Returns
+        -------
+        object
+            value of the choice
+
+        Raises
+        ------
+        KeyError
+            if it is not one of the choices
+        """
+        self.load()
+        return self._values[text]
+
+    @property
+    def values(self) -> List[object]:
+        """values of the choices, loaded if necessary"""
+        self.load()
+        return list(self._values.values())
+
+
+# shared by every argument with the same source
+_registry: Dict[Hashable, Choices] = dict()
+
+
+def get_choices(source: Union[Iterable, Callable[[], Iterable], type]) -> Choices:
+    """
+    Get the shared ``Choices`` of a source, created when first requested without loading it
+
+    Parameters
+    ----------
+    source : Union[Iterable, Callable[[], Iterable], type]
+        values, an ``Enum`` class, or a callable that returns the values.
+        Callables and ``Enum`` classes are keyed by identity, other sources by their values.
+
+    Returns
+    -------
+    Choices
+    """
+    if not (is_enum(source) or callable(source)):
+        source = tuple(source)
+
+    choices = _registry.get(source)
+
+    if choices is None:
+        choices = Choices(source)
+        _registry[source] = choices
+
+    return choices
+
+
+def clear_choices():
+    """Drop the shared choices, arguments that are using them keep their instances"""
+    _registry.clear()
+
+
+def _get_source(typ: type, choices) -> Union[Iterable, Callable[[], Iterable], type]:
+    if choices is not None:
+        return choices
+
+    values = literal_values(typ)
+    if values is not None:
+        return values
+
+    if is_enum(typ):
+        return typ
+
+    raise TypeError(f"Choice arguments must be annotated as a Literal or an Enum, or have `choices`, not {typ}")
+
+
+class ArgChoice(Arg):
+    acceptable_types = (object,)
+    kind = 'choice'
+    stretch = True
+
+    def __init__(
+            self,
+            name: str,
+            typ: type,
+            val,
+            parent: QtWidgets.QWidget,
+            vlayout: QtWidgets.QVBoxLayout,
+            choices: Union[Iterable, Callable[[], Iterable], None] = None,
+            **kwargs
+    ):
+        """
+        Creates a line edit with a completer for an argument annotated as a ``Literal[...]`` or an ``Enum``,
+        or with the ``"choices"`` arg opt:
+
+        .. code-block:: python
+
+            def f(mode: Literal['nearest', 'linear', 'cubic'] = 'linear', channel: str = 'ch0'):
+                ...
+
+            Function(f, arg_opts={'channel': {'choices': list_channels}})
+
+        Typing filters the choices, matching anywhere in the text and ignoring case, "▾" shows all of them.
+        The value changes when a choice is picked or the text of a choice is entered, other text is reverted.
+        ``Enum`` arguments are shown by member name and their value is the member.
+
+        Every argument with the same choices shares one ``QStringListModel`` through ``get_choices()``,
+        and a panel does not read the choices while it is constructed. They are loaded when the argument
+        is first focused or opened, and a ``choices`` callable is only called once.
+
+        Parameters
+        ----------
+        choices : Union[Iterable, Callable[[], Iterable], None]
+            values, or a callable that returns the values, overrides the choices of the annotation
+
+        **kwargs
+            passed to Arg
+        """
+        self.choices = get_choices(_get_source(typ, choices))
+
+        super(ArgChoice, self).__init__(name, typ, val, parent, vlayout, **kwargs)
+
+        if self.typ is str:
+            # connected by Arg for str arguments, the value only changes when a choice is committed
+            self.widget.textEdited.disconnect()
+
+        self.completer = QtWidgets.QCompleter(self.widget)
+        self.completer.setFilterMode(QtCore.Qt.MatchContains)
+        self.completer.setCaseSensitivity(QtCore.Qt.CaseInsensitive)
+        self.completer.setCompletionMode(QtWidgets.QCompleter.PopupCompletion)
+        self.completer.setModel(self.choices.model)
+        self.widget.setCompleter(self.completer)
+
+        self.button_open = QtWidgets.QToolButton(self.parent)
+        self.button_open.setText('▾')
+        self.hlayout.addWidget(self.button_open)
+
+        self.widget.installEventFilter(self)
+        self.widget.editingFinished.connect(self._editing_finished)
+        self.completer.activated[str].connect(self.commit)
+        self.button_open.clicked.connect(self.open)
+
+    @classmethod
+    def get_widget_type(cls, typ: type) -> type:
+        return QtWidgets.QLineEdit
+
+    def _widgets(self) -> list:
+        return [self._qlabel, self.widget, self.button_open]
+
+    def configure(
+            self,
+            name: str,
+            val,
+            tooltip: Optional[str] = None,
+            spec: Optional[ArgSpec] = None,
+            choices: Union[Iterable, Callable[[], Iterable], None] = None,
+            **kwargs
+    ):
+        typ = self.typ if spec is None else spec.typ
+        self.choices = get_choices(_get_source(typ, choices))
+        self.completer.setModel(self.choices.model)
+
+        super(ArgChoice, self).configure(name, val, tooltip, spec)
+
+    @property
+    def val(self):
+        """current value, one of the choices"""
+        return self.spec.val
+
+    @val.setter
+    def val(self, v):
+        self.spec.val = v
+        self.widget.setText('' if v is None else choice_text(v))
+
+    def open(self):
+        """Load the choices if necessary and show all of them"""
+        self.choices.load()
+        self.widget.setFocus()
+        self.completer.setCompletionPrefix('')
+        self.completer.complete()
+
+    def commit(self, text: str) -> bool:
+        """
+        Set the value to a choice
+
+        Parameters
+        ----------
+        text : str
+            text of the choice
+
+        Returns
+        -------
+        bool
+            ``False`` if it is not one of the choices, the text is reverted
+        """
+        try:
+            value = self.choices.value(text)
+        except KeyError:
+            self.widget.setText('' if self.val is None else choice_text(self.val))
+            return False
+
+        # the text also matches after a choice was picked from the popup
+        if value == self.val and type(value) is type(self.val):
+            self.widget.setText(text)
+            return True
+
+        self.val = value
+        self.sig_changed.emit(self.val)
+        return True
+
+    def _editing_finished(self):
+        if self.completer.popup().isVisible():
+            # a choice is being picked, committed through the completer
+            return
+        self.commit(self.widget.text())
+
+    def eventFilter(self, obj: QtCore.QObject, event: QtCore.QEvent) -> bool:
+        if obj is self.widget and event.type() == QtCore.QEvent.FocusIn:
+            self.choices.load()
+
+        return False
+
+    def __repr__(self):
+        return f"{super(ArgChoice, self).__repr__()}\n" \
+               f"choices:\t{len(self.choices.values) if self.choices.loaded else 'not loaded'}"
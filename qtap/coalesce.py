@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@author: kushal
+
+GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007
+"""
+
+from PyQt5 import QtCore
+from typing import Hashable, Optional
+from collections import OrderedDict
+
+
+emit_modes = (None, 'debounce', 'throttle', 'release')
+
+
+class Coalescer(QtCore.QObject):
+    def __init__(
+            self,
+            emit: callable,
+            mode: Optional[str] = None,
+            interval: int = 50,
+            parent: Optional[QtCore.QObject] = None
+    ):
+        """
+        Coalesces rapid emission requests so that ``emit`` is called less often.
+        The latest request for each key is always delivered eventually.
+
+        Parameters
+        ----------
+        emit : callable
+            called with the args of the most recent request for a key
+
+        mode : Optional[str]
+            One of ``None``, ``"debounce"``, ``"throttle"`` or ``"release"``.
+
+            ``None``: every request is emitted immediately.
+
+            ``"debounce"``: emit once no new request has arrived for ``interval`` ms.
+
+            ``"throttle"``: emit at most once every ``interval`` ms,
+            the last request is emitted at the end of the interval.
+
+            ``"release"``: emit immediately unless held with ``hold()``,
+            held requests are emitted on ``release()``
+
+        interval : int
+            interval in milliseconds used by the ``debounce`` and ``throttle`` modes
+
+        parent : Optional[QtCore.QObject]
+            parent QObject
+
+        Attributes
+        ----------
+        n_requested : int
+            number of emission requests
+
+        n_emitted : int
+            number of times ``emit`` was actually called
+        """
+        super(Coalescer, self).__init__(parent)
+
+        if mode not in emit_modes:
+            raise ValueError(f"`mode` must be one of {emit_modes}, you passed: {mode}")
+
+        self._emit = emit
+        self.mode = mode
+
+        # pending args for each key, ordered by most recent request
+        self._pending = OrderedDict()
+        self._held = 0
+
+        self.n_requested = 0
+        self.n_emitted = 0
+
+        self._timer = QtCore.QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._on_timeout)
+
+        self.interval = interval
+
+    @property
+    def interval(self) -> int:
+        """interval in milliseconds for the ``debounce`` and ``throttle`` modes"""
+        return self._timer.interval()
+
+    @interval.setter
+    def interval(self, ms: int):
+        self._timer.setInterval(ms)
+
+    @property
+    def n_suppressed(self) -> int:
+        """number of requests that were dropped because a newer one replaced them"""
+        return self.n_requested - self.n_emitted - len(self._pending)
+
+    @property
+    def pending(self) -> bool:
+        """``True`` if there are requests that have not been emitted yet"""
+        return len(self._pending) > 0
+
+    def request(self, key: Hashable, *args):
+        """
+        Request an emission. Replaces any pending request with the same key.
+
+        Parameters
+        ----------
+        key : Hashable
+            requests with the same key are coalesced
+
+        *args
+            passed to ``emit``
+        """
+        self.n_requested += 1
+
+        if self.mode is None:
+            self.n_emitted += 1
+            self._emit(*args)
+            return
+
+        self._pending[key] = args
+        self._pending.move_to_end(key)
+
+        if self.mode == 'debounce':
+            # restart the timer on every request
+            self._timer.start()
+
+        elif self.mode == 'throttle':
+            if not self._timer.isActive():
+                # leading edge, emit now and block for the interval
+                self.flush()
+                self._timer.start()
+
+        elif self.mode == 'release':
+            if not self._held:
+                self.flush()
+
+    def hold(self):
+        """Hold emissions in ``release`` mode until ``release()`` is called."""
+        self._held += 1
+
+    def release(self):
+        """Release a ``hold()``, emits the pending requests if nothing else is holding."""
+        self._held = max(0, self._held - 1)
+        if not self._held:
+            self.flush()
+
+    def flush(self):
+        """Emit all pending requests now."""
+        if self.mode == 'debounce':
+            self._timer.stop()
+
+        while self._pending:
+            key, args = self._pending.popitem(last=False)
+            self.n_emitted += 1
+            self._emit(*args)
+
+    def _on_timeout(self):
+        if not self._pending:
+            return
+
+        self.flush()
+
+        if self.mode == 'throttle':
+            # trailing edge emitted, block the next interval
+            self._timer.start()
+
+    def reset_counters(self):
+        """Reset ``n_requested`` and ``n_emitted``, pending requests are kept."""
+        self.n_requested = len(self._pending)
+        self.n_emitted = 0
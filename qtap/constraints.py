@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@author: kushal
+
+GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007
+"""
+
+import ast
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+from functools import lru_cache
+
+
+# names that can be used in constraint expressions besides the argument names
+allowed_builtins = {
+    'abs': abs,
+    'min': min,
+    'max': max,
+    'len': len,
+    'round': round,
+    'int': int,
+    'float': float,
+    'bool': bool,
+    'all': all,
+    'any': any,
+    'sum': sum,
+    'True': True,
+    'False': False,
+    'None': None,
+}
+
+# lambdas & assignment expressions
+_forbidden = tuple(getattr(ast, name) for name in ('Lambda', 'NamedExpr') if hasattr(ast, name))
+
+
+class Constraint:
+    __slots__ = ('expression', 'names', '_code')
+
+    def __init__(self, expression: str, arg_names: Iterable[str]):
+        """
+        A cross-argument rule, a Python expression of the argument values that must be true,
+        such as ``"lo < hi"`` or ``"window % 2 == 1 and window < length"``.
+        Compiled once, usually created through the ``"constraint"`` arg opt.
+
+        Parameters
+        ----------
+        expression : str
+            expression that is true when the values are valid, can use the argument names and ``allowed_builtins``
+
+        arg_names : Iterable[str]
+            names of the arguments of the function
+
+        Raises
+        ------
+        ValueError
+            if the expression is not valid Python, uses an unknown name, or accesses private attributes
+        """
+        self.expression = expression
+
+        try:
+            tree = ast.parse(expression.strip(), mode='eval')
+        except SyntaxError as e:
+            raise ValueError(f"Invalid constraint `{expression}`: {e}")
+
+        arg_names = list(arg_names)
+
+        used = set()
+        # targets of comprehensions
+        bound = set()
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Name):
+                (bound if isinstance(node.ctx, ast.Store) else used).add(node.id)
+            elif isinstance(node, ast.Attribute) and node.attr.startswith('_'):
+                raise ValueError(f"Constraint `{expression}` cannot access the private attribute `{node.attr}`")
+            elif isinstance(node, _forbidden):
+                raise ValueError(f"Constraint `{expression}` cannot define functions or assign names")
+
+        used -= bound
+        unknown = used - set(arg_names) - set(allowed_builtins.keys())
+        if unknown:
+            raise ValueError(f"Constraint `{expression}` uses unknown names: {sorted(unknown)}")
+
+        # arguments that the constraint depends on, in signature order
+        self.names: Tuple[str, ...] = tuple(name for name in arg_names if name in used)
+
+        self._code = compile(tree, f'<constraint: {expression}>', 'eval')
+
+    def check(self, values: Mapping[str, object]) -> Optional[str]:
+        """
+        Evaluate the constraint
+
+        Parameters
+        ----------
+        values : Mapping[str, object]
+            argument values keyed by name
+
+        Returns
+        -------
+        Optional[str]
+            ``None`` if the constraint is satisfied, otherwise a message
+        """
+        try:
+            # values are globals so that they can be used in generator expressions
+            if eval(self._code, {'__builtins__': allowed_builtins, **values}):
+                return None
+        except Exception as e:
+            # such as comparing None
+            return f'{self.expression} ({type(e).__name__}: {e})'
+
+        return self.expression
+
+    def __repr__(self):
+        return f'Constraint({self.expression!r})'
+
+
+@lru_cache(maxsize=1024)
+def _compile(expression: str, arg_names: Tuple[str, ...]) -> Constraint:
+    # functions constructed with the same arg_opts share their constraints
+    return Constraint(expression, arg_names)
+
+
+def get_expressions(arg_opts: Dict[str, dict]) -> List[str]:
+    """
+    Constraint expressions declared with the ``"constraint"`` arg opt, which is an expression or a list of them
+
+    Parameters
+    ----------
+    arg_opts : Dict[str, dict]
+        arg_opts of a function
+
+    Returns
+    -------
+    List[str]
+        expressions without duplicates, in the order they are declared
+    """
+    expressions = list()
+
+    for opts in arg_opts.values():
+        declared = opts.get('constraint')
+
+        if declared is None:
+            continue
+
+        if isinstance(declared, str):
+            declared = [declared]
+
+        expressions.extend(declared)
+
+    return list(dict.fromkeys(expressions))
+
+
+class ConstraintSet:
+    def __init__(self, constraints: Iterable[Constraint]):
+        """
+        Constraints of a function with an index of the constraints that depend on each argument,
+        so that an edit only re-checks the constraints that use the edited argument. Does not use Qt.
+
+        Parameters
+        ----------
+        constraints : Iterable[Constraint]
+            compiled constraints
+
+        Attributes
+        ----------
+        violated : Dict[Constraint, str]
+            message for each constraint that is not satisfied
+        """
+        self.constraints: Tuple[Constraint, ...] = tuple(constraints)
+
+        self._index: Dict[str, List[Constraint]] = dict()
+        for constraint in self.constraints:
+            for name in constraint.names:
+                self._index.setdefault(name, list()).append(constraint)
+
+        self.violated: Dict[Constraint, str] = dict()
+
+    @classmethod
+    def from_arg_opts(cls, arg_opts: Dict[str, dict], arg_names: Iterable[str]) -> 'ConstraintSet':
+        """
+        Compile the constraints declared in arg_opts
+
+        Parameters
+        ----------
+        arg_opts : Dict[str, dict]
+            arg_opts of a function
+
+        arg_names : Iterable[str]
+            names of the arguments that the constraints can use
+
+        Returns
+        -------
+        ConstraintSet
+        """
+        arg_names = tuple(arg_names)
+        return cls(_compile(expression, arg_names) for expression in get_expressions(arg_opts))
+
+    @property
+    def valid(self) -> bool:
+        """``True`` if all constraints are satisfied"""
+        return not self.violated
+
+    def check_all(self, values: Mapping[str, object]) -> bool:
+        """
+        Check every constraint
+
+        Parameters
+        ----------
+        values : Mapping[str, object]
+            argument values keyed by name
+
+        Returns
+        -------
+        bool
+            ``True`` if the violated constraints changed
+        """
+        return self._check(self.constraints, values)
+
+    def update(self, name: str, values: Mapping[str, object]) -> bool:
+        """
+        Re-check the constraints that use an argument, after it changed
+
+        Parameters
+        ----------
+        name : str
+            name of the argument that changed
+
+        values : Mapping[str, object]
+            argument values keyed by name
+
+        Returns
+        -------
+        bool
+            ``True`` if the violated constraints changed
+        """
+        return self._check(self._index.get(name, ()), values)
+
+    def _check(self, constraints: Iterable[Constraint], values: Mapping[str, object]) -> bool:
+        changed = False
+
+        for constraint in constraints:
+            message = constraint.check(values)
+
+            if message is None:
+                if constraint in self.violated:
+                    del self.violated[constraint]
+                    changed = True
+            elif self.violated.get(constraint) != message:
+                self.violated[constraint] = message
+                changed = True
+
+        return changed
+
+    def messages(self) -> Dict[str, List[str]]:
+        """
+        Messages of the violated constraints for each argument they use
+
+        Returns
+        -------
+        Dict[str, List[str]]
+            messages keyed by argument name, only for arguments of violated constraints
+        """
+        messages = dict()
+        for constraint, message in self.violated.items():
+            for name in constraint.names:
+                messages.setdefault(name, list()).append(message)
+        return messages
+
+    def __len__(self):
+        return len(self.constraints)
+
+    def __repr__(self):
+        return '\n'.join(
+            f"{'violated' if c in self.violated else 'ok'}: {c.expression}" for c in self.constraints
+        )
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@author: kushal
+
+GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007
+"""
+
+from typing import Tuple
+import io
+import sys
+import ast
+import math
+import array
+import struct
+import pickle
+
+
+# Value encoding shared by the recorder log and the preset store, does not use Qt.
+#
+# value types:
+# b'u': utf-8 string, b'a': array.array, 1 byte typecode, uint32 length, little endian items,
+# b'y': NumPy array, .npy without pickled objects, b'P': utf-8 path,
+# b'r': repr() of a literal such as a list, tuple or dict of None, bool, int, float, str & bytes,
+# b'p': pickle, for everything else, only decoded with allow_pickle
+
+_uint = struct.Struct('<I')
+
+_big_endian = sys.byteorder == 'big'
+
+
+def _is_literal(val: object) -> bool:
+    # values that ast.literal_eval(repr(val)) gives back exactly
+    t = type(val)
+
+    if t is str or t is bytes or t is bool or t is int or val is None:
+        return True
+    elif t is float:
+        return math.isfinite(val)
+    elif t is complex:
+        return math.isfinite(val.real) and math.isfinite(val.imag)
+    elif t is list or t is tuple or (t is set and val):
+        return all(_is_literal(v) for v in val)
+    elif t is dict:
+        return all(_is_literal(k) and _is_literal(v) for k, v in val.items())
+
+    return False
+
+
+def _encode_array(val: array.array) -> bytes:
+    if _big_endian:
+        val = array.array(val.typecode, val)
+        val.byteswap()
+    b = val.tobytes()
+    return val.typecode.encode() + _uint.pack(len(b)) + b
+
+
+def _decode_array(typecode: str, b: bytes) -> array.array:
+    if typecode not in array.typecodes:
+        raise ValueError(f"Unknown array typecode {typecode!r}")
+
+    val = array.array(typecode)
+    val.frombytes(b)
+    if _big_endian:
+        val.byteswap()
+    return val
+
+
+def encode_value(val: object) -> Tuple[bytes, bytes]:
+    """
+    Encode a value, only values that have no safe encoding are pickled
+
+    Parameters
+    ----------
+    val : object
+        value to encode
+
+    Returns
+    -------
+    Tuple[bytes, bytes]
+        value type & bytes, see ``decode_value()``
+    """
+    if type(val) is str:
+        return b'u', val.encode()
+
+    if type(val) is array.array:
+        return b'a', _encode_array(val)
+
+    # only checked if the modules are loaded, in which case the value can be of their types
+    np = sys.modules.get('numpy')
+    if np is not None and isinstance(val, np.ndarray) and not val.dtype.hasobject:
+        f = io.BytesIO()
+        np.save(f, val, allow_pickle=False)
+        return b'y', f.getvalue()
+
+    pathlib = sys.modules.get('pathlib')
+    if pathlib is not None and isinstance(val, pathlib.PurePath):
+        return b'P', str(val).encode()
+
+    if _is_literal(val):
+        return b'r', repr(val).encode()
+
+    return b'p', pickle.dumps(val, protocol=4)
+
+
+def decode_value(typ: bytes, b: bytes, allow_pickle: bool = False) -> object:
+    """
+    Decode a value from ``encode_value()``
+
+    Parameters
+    ----------
+    typ : bytes
+        value type
+
+    b : bytes
+        encoded value
+
+    allow_pickle : bool
+        decode pickled values, which can run arbitrary code
+
+    Returns
+    -------
+    object
+        decoded value
+
+    Raises
+    ------
+    ValueError
+        if the value is invalid, or it is pickled and ``allow_pickle`` is ``False``
+    """
+    if typ == b'u':
+        return b.decode()
+
+    if typ == b'a':
+        if len(b) < 5 or _uint.unpack_from(b, 1)[0] != len(b) - 5:
+            raise ValueError("Invalid array value")
+        return _decode_array(b[:1].decode('latin-1'), b[5:])
+
+    if typ == b'r':
+        try:
+            return ast.literal_eval(b.decode())
+        except (ValueError, SyntaxError, RecursionError, MemoryError, TypeError):
+            raise ValueError("Invalid literal value")
+
+    if typ == b'y':
+        import numpy as np
+        return np.load(io.BytesIO(b), allow_pickle=False)
+
+    if typ == b'P':
+        import pathlib
+        return pathlib.Path(b.decode())
+
+    if typ == b'p':
+        if not allow_pickle:
+            raise ValueError(
+                "Pickled values can run arbitrary code when they are loaded. "
+                "Pass allow_pickle=True only if the data comes from a trusted source."
+            )
+        return pickle.loads(b)
+
+    raise ValueError(f"Unknown value type {typ!r}")
@@ -0,0 +1,473 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@author: kushal
+
+GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007
+"""
+
+from PyQt5 import QtCore
+from typing import Dict, Hashable, Optional, Set, Tuple, Union
+import os
+from time import perf_counter
+from functools import partial
+import pickle
+# ProcessPoolExecutor & BrokenProcessPool are imported when a ProcessExecutor is used,
+# importing them loads multiprocessing
+from concurrent.futures import Future
+
+
+class BaseExecutor(QtCore.QObject):
+    # emits the key and the result
+    sig_result = QtCore.pyqtSignal(object, object)
+
+    # emits the key and the exception raised by the callable
+    sig_error = QtCore.pyqtSignal(object, object)
+
+    # emits the key and the runtime of the callable in seconds, also for dropped results
+    sig_runtime = QtCore.pyqtSignal(object, float)
+
+    # True if cancel() stops the running request, not only drops its result
+    cancels_running = False
+
+    def __init__(self, parent: Optional[QtCore.QObject] = None):
+        """
+        Base class for executors that run callables away from the GUI thread.
+
+        Requests are grouped by ``key``, only the result of the most recent
+        request for a key is emitted. At most one request per key runs at a time,
+        the most recent request waits for the running one to finish and any request it replaces is discarded.
+        Results of requests that were replaced while running are dropped.
+
+        Attributes
+        ----------
+        sig_result : object, object
+            Emits the key and the result of the callable
+
+        sig_error : object, object
+            Emits the key and the exception raised by the callable
+
+        sig_runtime : object, float
+            Emits the key and the runtime of the callable in seconds, also for results that are dropped
+
+        n_submitted : int
+            number of submitted requests
+
+        n_superseded : int
+            number of requests that were superseded or whose results were dropped
+        """
+        super(BaseExecutor, self).__init__(parent)
+
+        self._request_id = 0
+
+        # latest request id for each key
+        self._latest: Dict[Hashable, int] = dict()
+
+        # keys with a request that is running
+        self._running: Set[Hashable] = set()
+
+        # the next request for each key, waiting for the running one to finish
+        self._queued: Dict[Hashable, tuple] = dict()
+
+        self.n_submitted = 0
+        self.n_superseded = 0
+
+    def submit(self, func: callable, kwargs: dict, key: Hashable = None) -> int:
+        """
+        Run ``func(**kwargs)``, the result is emitted through ``sig_result``
+
+        Parameters
+        ----------
+        func : callable
+            callable to run
+
+        kwargs : dict
+            kwargs for the callable, usually from ``Function.get_data()``
+
+        key : Hashable
+            requests with the same key supersede each other
+
+        Returns
+        -------
+        int
+            request id
+
+        """
+        self._request_id += 1
+        self._latest[key] = self._request_id
+        self.n_submitted += 1
+
+        self._submit(func, kwargs, key, self._request_id)
+
+        return self._request_id
+
+    def _submit(self, func: callable, kwargs: dict, key: Hashable, request_id: int):
+        if key in self._running:
+            if key in self._queued:
+                self.n_superseded += 1
+            self._queued[key] = (func, kwargs, request_id)
+            return
+
+        self._running.add(key)
+        self._start(func, kwargs, key, request_id)
+
+    def _start(self, func: callable, kwargs: dict, key: Hashable, request_id: int):
+        """start running the request, ``_on_finished()`` must be called from the GUI thread when done"""
+        raise NotImplementedError
+
+    def validate(self, func: callable):
+        """
+        Check that ``func`` can be run by this executor, raises an exception if it cannot.
+
+        Parameters
+        ----------
+        func : callable
+            callable to check
+        """
+        pass
+
+    def cancel(self, key: Hashable = None):
+        """
+        Drop the result of the current request for ``key``, and the request waiting to run for ``key``.
+        The running request is only stopped if ``cancels_running`` is ``True``.
+
+        Parameters
+        ----------
+        key : Hashable
+            request key
+        """
+        if self._queued.pop(key, None) is not None:
+            self.n_superseded += 1
+
+        if key in self._latest:
+            # no request will ever have this id, the running one becomes stale
+            self._request_id += 1
+            self._latest[key] = self._request_id
+
+    def is_running(self, key: Hashable = None) -> bool:
+        """``True`` if a request for ``key`` is running or waiting to run"""
+        return (key in self._running) or (key in self._queued)
+
+    def _on_finished(self, key: Hashable, request_id: int, ok: bool, result: object):
+        self._running.discard(key)
+
+        if self._latest.get(key) != request_id:
+            self.n_superseded += 1
+        elif ok:
+            self.sig_result.emit(key, result)
+        else:
+            self.sig_error.emit(key, result)
+
+        if key in self._queued:
+            func, kwargs, queued_id = self._queued.pop(key)
+
+            if self._latest.get(key) != queued_id:
+                # cancelled while waiting
+                self.n_superseded += 1
+                return
+
+            self._running.add(key)
+            self._start(func, kwargs, key, queued_id)
+
+
+class _RunnableSignals(QtCore.QObject):
+    # key, request id, success, result or exception
+    sig_finished = QtCore.pyqtSignal(object, int, bool, object)
+
+    # key, runtime
+    sig_runtime = QtCore.pyqtSignal(object, float)
+
+
+def _is_coroutine_function(func: callable) -> bool:
+    # same as aio.is_coroutine_function without importing asyncio, 0x80 is inspect.CO_COROUTINE
+    while isinstance(func, partial):
+        func = func.func
+    return bool(getattr(func, '__code__', None) and func.__code__.co_flags & 0x80)
+
+
+def _check_not_coroutine(func: callable, executor: str):
+    if _is_coroutine_function(func):
+        raise TypeError(
+            f"`{getattr(func, '__name__', func)}` is a coroutine function, "
+            f"it cannot be run by the {executor} executor, use the \"async\" executor"
+        )
+
+
+def _timed_call(func: callable, kwargs: dict) -> Tuple[bool, object, float]:
+    # returns success, result or exception, runtime
+    t0 = perf_counter()
+    try:
+        result = func(**kwargs)
+        ok = True
+    except Exception as e:
+        result = e
+        ok = False
+
+    return ok, result, perf_counter() - t0
+
+
+class _Runnable(QtCore.QRunnable):
+    def __init__(
+            self,
+            func: callable,
+            kwargs: dict,
+            key: Hashable,
+            request_id: int,
+            signals: _RunnableSignals
+    ):
+        super(_Runnable, self).__init__()
+
+        self.func = func
+        self.kwargs = kwargs
+        self.key = key
+        self.request_id = request_id
+        self.signals = signals
+
+    def run(self):
+        ok, result, runtime = _timed_call(self.func, self.kwargs)
+
+        self.signals.sig_runtime.emit(self.key, runtime)
+        self.signals.sig_finished.emit(self.key, self.request_id, ok, result)
+
+
+class ThreadExecutor(BaseExecutor):
+    def __init__(
+            self,
+            pool: Optional[QtCore.QThreadPool] = None,
+            parent: Optional[QtCore.QObject] = None
+    ):
+        """
+        Runs callables in a ``QThreadPool``.
+
+        Parameters
+        ----------
+        pool : Optional[QtCore.QThreadPool]
+            thread pool to use, the global instance is used by default
+
+        parent : Optional[QtCore.QObject]
+            parent QObject
+        """
+        super(ThreadExecutor, self).__init__(parent)
+
+        if pool is None:
+            pool = QtCore.QThreadPool.globalInstance()
+
+        self.pool = pool
+
+        # lives in the GUI thread, so finished requests are delivered through a queued connection
+        self._signals = _RunnableSignals(self)
+        self._signals.sig_finished.connect(self._on_finished)
+        self._signals.sig_runtime.connect(self.sig_runtime)
+
+    def validate(self, func: callable):
+        _check_not_coroutine(func, 'thread')
+
+    def _start(self, func: callable, kwargs: dict, key: Hashable, request_id: int):
+        self.pool.start(_Runnable(func, kwargs, key, request_id, self._signals))
+
+
+class NotImportableError(TypeError):
+    """Raised when a callable cannot be sent to worker processes"""
+    pass
+
+
+def check_importable(func: callable):
+    """
+    Check that ``func`` can be pickled by reference so that worker processes can import it.
+
+    Parameters
+    ----------
+    func : callable
+        callable to check
+
+    Raises
+    ------
+    NotImportableError
+        if the callable is a lambda, a nested function or otherwise not importable
+    """
+    name = getattr(func, '__qualname__', repr(func))
+    module = getattr(func, '__module__', None)
+
+    try:
+        pickle.dumps(func)
+    except Exception as e:
+        raise NotImportableError(
+            f"`{name}` from module `{module}` cannot be imported by worker processes. "
+            f"Callables used with the process executor must be defined at the top level of an "
+            f"importable module, lambdas and functions defined inside other functions are not supported."
+        ) from e
+
+
+def _warm():
+    return os.getpid()
+
+
+class ProcessExecutor(BaseExecutor):
+    def __init__(
+            self,
+            n_workers: Optional[int] = None,
+            mp_context=None,
+            warm: bool = True,
+            parent: Optional[QtCore.QObject] = None
+    ):
+        """
+        Runs callables in a persistent pool of worker processes, use this for CPU bound functions
+        that hold the GIL. The callable is pickled by reference and the kwargs are pickled by value.
+
+        If a worker crashes the pool is restarted and the crash is emitted through ``sig_error``
+        as a ``BrokenProcessPool`` exception.
+
+        Parameters
+        ----------
+        n_workers : Optional[int]
+            number of worker processes, uses ``os.cpu_count()`` by default
+
+        mp_context
+            multiprocessing context, for example ``multiprocessing.get_context("spawn")``
+
+        warm : bool
+            start the worker processes immediately instead of on the first ``submit()``
+
+        parent : Optional[QtCore.QObject]
+            parent QObject
+
+        Attributes
+        ----------
+        n_restarts : int
+            number of times the pool was restarted after a worker crashed
+        """
+        super(ProcessExecutor, self).__init__(parent)
+
+        self.n_workers = n_workers if n_workers is not None else os.cpu_count()
+        self.mp_context = mp_context
+        self.warm = warm
+
+        self.n_restarts = 0
+
+        # futures finish in a thread owned by the pool, deliver to the GUI thread with a queued connection
+        self._signals = _RunnableSignals(self)
+        self._signals.sig_finished.connect(self._on_process_finished)
+        self._signals.sig_runtime.connect(self.sig_runtime)
+
+        self._pool: Optional['ProcessPoolExecutor'] = None
+        self._start_pool()
+
+        app = QtCore.QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.shutdown)
+
+    def _start_pool(self):
+        from concurrent.futures import ProcessPoolExecutor
+
+        self._pool = ProcessPoolExecutor(max_workers=self.n_workers, mp_context=self.mp_context)
+
+        if self.warm:
+            for i in range(self.n_workers):
+                self._pool.submit(_warm)
+
+    def validate(self, func: callable):
+        _check_not_coroutine(func, 'process')
+        check_importable(func)
+
+    def _start(self, func: callable, kwargs: dict, key: Hashable, request_id: int):
+        from concurrent.futures.process import BrokenProcessPool
+
+        if self._pool is None:
+            # shut down, started again on demand
+            self._start_pool()
+
+        pool = self._pool
+
+        try:
+            future = pool.submit(_timed_call, func, kwargs)
+        except BrokenProcessPool as e:
+            self._restart()
+            self._on_finished(key, request_id, False, e)
+            return
+
+        future.add_done_callback(
+            lambda fut: self._future_done(fut, pool, key, request_id)
+        )
+
+    def _future_done(self, future: Future, pool: 'ProcessPoolExecutor', key: Hashable, request_id: int):
+        # called from a thread owned by the pool
+        try:
+            ok, result, runtime = future.result()
+        except Exception as e:
+            # the worker crashed or the result could not be unpickled
+            result = e
+            ok = False
+        else:
+            self._signals.sig_runtime.emit(key, runtime)
+
+        self._signals.sig_finished.emit((key, pool), request_id, ok, result)
+
+    def _on_process_finished(self, key_pool: tuple, request_id: int, ok: bool, result: object):
+        from concurrent.futures.process import BrokenProcessPool
+
+        key, pool = key_pool
+
+        # only restart once, other requests in the crashed pool fail with the same exception
+        if isinstance(result, BrokenProcessPool) and pool is self._pool:
+            self._restart()
+
+        self._on_finished(key, request_id, ok, result)
+
+    def _restart(self):
+        self.n_restarts += 1
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+        self._start_pool()
+
+    def shutdown(self, wait: bool = True):
+        """
+        Shutdown the worker processes, a later ``submit()`` starts a new pool
+
+        Parameters
+        ----------
+        wait : bool
+            wait for running requests to finish
+        """
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait)
+            self._pool = None
+
+
+executors = {
+    'thread': ThreadExecutor,
+    'process': ProcessExecutor,
+}
+
+
+def get_executor(executor: Union[str, BaseExecutor, None], parent: QtCore.QObject = None) -> Optional[BaseExecutor]:
+    """
+    Get an executor instance from an executor name or instance
+
+    Parameters
+    ----------
+    executor : Union[str, BaseExecutor, None]
+        One of ``"thread"``, ``"process"``, ``"async"``, an executor instance or ``None``
+
+    parent : QtCore.QObject
+        parent for a newly created executor
+
+    Returns
+    -------
+    Optional[BaseExecutor]
+
+    """
+    if executor is None or isinstance(executor, BaseExecutor):
+        return executor
+
+    if executor == 'async':
+        # asyncio is imported when it is used
+        from .aio import AsyncExecutor
+        return AsyncExecutor(parent=parent)
+
+    if executor not in executors.keys():
+        raise ValueError(
+            f"`executor` must be one of {list(executors.keys()) + ['async']} or a `BaseExecutor` instance, "
+            f"you passed: {executor}"
+        )
+
+    return executors[executor](parent=parent)
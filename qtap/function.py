@@ -6,39 +6,83 @@
 GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007
 """
 
-from PyQt5 import QtCore, QtGui, QtWidgets
-import inspect
-from typing import *
+from PyQt5 import QtCore, QtWidgets
+from typing import Dict, List, Optional, Sequence, Tuple, Union
 from collections import namedtuple
-from functools import partial
-from .argument import Arg, ArgNumeric
+from functools import partial, lru_cache
+from contextlib import contextmanager, nullcontext, ExitStack
+from time import perf_counter
+from .argument import Arg, ArgNumeric, ArgPool
+from .signature import compile_signature, ArgumentSpec
+from .model import ArgSpec, ParameterSet, specs_from_signature, _values_equal
+from .coalesce import Coalescer
+from .executor import BaseExecutor, get_executor, _is_coroutine_function
+from .cache import ResultCache
+from .instrument import Stats
+from .history import History
+from .pipeline import Pipeline
+from .constraints import ConstraintSet
+
+
+def _get_arg_class(spec: ArgumentSpec) -> type:
+    if spec.kind == 'numeric':
+        return ArgNumeric
+
+    elif spec.kind == 'array':
+        # numpy is only imported when a function has array arguments
+        from .array import ArgArray
+        return ArgArray
+
+    elif spec.kind == 'sequence':
+        from .sequence import ArgSequence
+        return ArgSequence
+
+    elif spec.kind == 'choice':
+        from .choice import ArgChoice
+        return ArgChoice
+
+    elif spec.kind == 'path':
+        from .path import ArgPath
+        return ArgPath
 
-
-def _get_argument(sig: inspect.Parameter, parent, vlayout, **opts):
-    if sig.default is inspect._empty:
-        default = None
     else:
-        default = sig.default
+        return Arg
+
 
+def _get_argument(spec: ArgumentSpec, param: ArgSpec, parent, vlayout, **opts):
     kwargs = dict(
-        name=sig.name,
-        typ=sig.annotation,
-        val=default,
         parent=parent,
         vlayout=vlayout
     )
 
+    kwargs.update(spec.kwargs)
+
+    # the widget is a view of the parameter, created with its current value
+    kwargs.update(val=param.val, spec=param)
     kwargs.update(opts)
 
-    if sig.annotation in [int, float]:
-        return ArgNumeric(**kwargs)
+    return _get_arg_class(spec)(**kwargs)
+
+
+def _signal_name(sig: QtCore.pyqtBoundSignal) -> str:
+    # signature is of the form "2sig_changed(QVariantMap)"
+    return sig.signal[1:sig.signal.index('(')]
 
-    else:
-        return Arg(**kwargs)
 
+def _get_stats(instrument: Union[bool, Stats, None]) -> Optional[Stats]:
+    if instrument is True:
+        return Stats()
+    elif instrument is False:
+        return None
+    return instrument
 
-# this is a massive nested lambda, not sure if there's a more elegant way to do this without a nasty loop
-_ignore_arguments = lambda d: (lambda d: True if d['ignore'] else False)(d) if 'ignore' in d.keys() else False
+
+def _get_history(history: Union[bool, History, None]) -> Optional[History]:
+    if history is True:
+        return History()
+    elif history is False:
+        return None
+    return history
 
 
 class Function(QtCore.QObject):
@@ -49,12 +93,35 @@ class Function(QtCore.QObject):
     # emits the name of the arg and its value
     sig_arg_changed = QtCore.pyqtSignal(str, object)
 
+    # emits the callable, name of the arg, old value and new value
+    sig_delta = QtCore.pyqtSignal(object, str, object, object)
+
+    # emits the previous callable and the new callable after rebind()
+    sig_rebound = QtCore.pyqtSignal(object, object)
+
+    # result or exception from running the callable with the executor
+    sig_result = QtCore.pyqtSignal(object)
+    sig_error = QtCore.pyqtSignal(object)
+
+    # emits True when all constraints become satisfied, False when one becomes violated
+    sig_valid_changed = QtCore.pyqtSignal(bool)
+
     def __init__(
             self,
             func: callable,
             arg_opts: dict = None,
             parent: Optional[QtWidgets.QWidget] = None,
             kwarg_entry: bool = False,
+            emit_mode: Optional[str] = None,
+            emit_interval: int = 50,
+            executor: Union[str, BaseExecutor, None] = None,
+            run_on: Optional[str] = None,
+            lazy: bool = False,
+            collapsible: bool = False,
+            arg_pool: Optional[ArgPool] = None,
+            cache: Union[bool, ResultCache, None] = None,
+            instrument: Union[bool, Stats, None] = None,
+            history: Union[bool, History, None] = None,
     ):
         """
         Creates a widget based on the function signature
@@ -65,7 +132,16 @@ class Function(QtCore.QObject):
             A function with type annotations
 
         arg_opts : dict
-            manually set certain features of an Arg
+            manually set certain features of an Arg.
+            ``"constraint"`` declares a cross-argument rule as an expression, or a list of expressions,
+            of the argument values, such as ``{'hi': {'constraint': 'lo < hi'}}``. Constraints are compiled once and
+            an edit only re-checks the constraints that use the edited argument. While a constraint is violated
+            its arguments are highlighted and ``sig_changed``, ``sig_set_clicked`` & ``run()`` are blocked,
+            see ``valid`` and ``sig_valid_changed``.
+            ``"choices"`` gives an argument a list of values, or a callable that returns them, to pick from,
+            ``Literal`` and ``Enum`` annotations get their choices from the annotation, see ``qtap.choice.ArgChoice``.
+            ``pathlib.Path`` arguments take ``"must_exist"``, ``"path_type"``, ``"max_size"``, ``"preview_size"``
+            and ``"debounce"``, see ``qtap.path.ArgPath``.
 
         parent : Optional[QtWidgets.QWidget]
             parent QWidget
@@ -74,6 +150,74 @@ class Function(QtCore.QObject):
             Not yet implemented.
             include a text box for kwargs entry
 
+        emit_mode : Optional[str]
+            Coalesce rapid emissions of ``sig_changed`` and ``sig_arg_changed``,
+            such as when dragging a slider. One of:
+
+            ``None``: emit on every change (default)
+
+            ``"debounce"``: emit once the value has not changed for ``emit_interval`` ms
+
+            ``"throttle"``: emit at most once every ``emit_interval`` ms
+
+            ``"release"``: while a slider is held down only emit when it is released
+
+            The final value is always emitted.
+
+        emit_interval : int
+            interval in milliseconds for the ``"debounce"`` and ``"throttle"`` modes
+
+        executor : Union[str, BaseExecutor, None]
+            Executor used by ``run()`` to call the function away from the GUI thread.
+            One of ``"thread"``, ``"process"``, ``"async"`` or a ``BaseExecutor`` instance, which can be shared between functions.
+            Use ``"process"``, or a ``ProcessExecutor`` to set the number of workers, for CPU bound functions.
+            The function must then be importable from a module by the worker processes.
+            Use ``"async"``, or an ``AsyncExecutor`` to use your own event loop, for ``async def`` functions.
+            If ``None`` an ``"async"`` executor for coroutine functions, otherwise a ``"thread"`` executor,
+            is created when ``run()`` is first called.
+
+        run_on : Optional[str]
+            Automatically call ``run()``, one of:
+
+            ``None``: only when ``run()`` is called (default)
+
+            ``"set"``: when the "Set" button is clicked
+
+            ``"changed"``: when ``sig_changed`` is emitted, combine with ``emit_mode`` for sliders
+
+            Only the result for the latest arguments is emitted, when the arguments change while ``run()``
+            is running its result is dropped. The ``"async"`` executor also cancels the running task.
+
+        lazy : bool
+            Do not create the argument widgets until they are needed,
+            i.e. when the function is expanded if ``collapsible``,
+            when it becomes visible, or when ``arguments`` is accessed.
+            ``get_data()`` and ``set_data()`` work before the widgets are created.
+
+        collapsible : bool
+            Show the function name as a header button that expands or collapses the arguments.
+            Collapsible functions start collapsed.
+
+        arg_pool : Optional[ArgPool]
+            pool of released argument widgets used by ``rebind()``, can be shared between functions
+
+        cache : Union[bool, ResultCache, None]
+            Cache the results of ``run()`` for each set of argument values.
+            ``True`` creates an in-memory ``ResultCache``, pass a ``ResultCache`` instance
+            to set the size, use a directory for results on disk, or share it between functions.
+            See ``ResultCache.stats()`` for hit and miss statistics.
+
+        instrument : Union[bool, Stats, None]
+            Record emission counts, time spent building data dicts and in connected slots,
+            latency from widget edits to ``sig_changed``, and runtimes of the callable.
+            ``True`` creates a ``Stats`` instance, pass a ``Stats`` instance to share it or to add hooks.
+            Available as the ``stats`` attribute.
+
+        history : Union[bool, History, None]
+            Keep an undo & redo history of argument edits, see ``undo()`` and ``redo()``.
+            ``True`` creates a ``History``, pass a ``History`` instance to share it or to set its size.
+            Available as the ``history`` attribute.
+
 
         Attributes
         -------
@@ -91,6 +235,28 @@ class Function(QtCore.QObject):
             Emitted when specific argument value changes.
             Emits argument name and argument value
 
+        sig_delta : object, str, object, object
+            Emitted when a specific argument value changes.
+            Emits the callable, argument name, old value and new value.
+            Cheaper than ``sig_changed`` since no dict is created, use with ``snapshot()``.
+
+        sig_rebound : object, object
+            Emitted after ``rebind()`` with the previous callable and the new callable
+
+        sig_result : object
+            Emitted with the return value of the callable after ``run()``.
+            Only the result from the most recent ``run()`` is emitted.
+
+        sig_error : object
+            Emitted with the exception raised by the callable after ``run()``
+
+        sig_valid_changed : bool
+            Emitted when the declared constraints become satisfied (``True``) or violated (``False``)
+
+        params : ParameterSet
+            Qt-free model of the argument values, changes made through it are shown in the widgets
+            and emitted like changes made in the GUI.
+
 
         Examples
         --------
@@ -160,67 +326,829 @@ class Function(QtCore.QObject):
 
         self.widget = QtWidgets.QWidget(parent)
 
-        self.vlayout = QtWidgets.QVBoxLayout(self.widget)
-
         self.callable = func
 
         self.name = self.callable.__name__
-        self._qlabel = QtWidgets.QLabel(self.widget)
+
+        self.collapsible = collapsible
+
+        if self.collapsible:
+            # header button that shows or hides the arguments
+            self._outer_layout = QtWidgets.QVBoxLayout(self.widget)
+            self._qlabel = QtWidgets.QToolButton(self.widget)
+            self._qlabel.setCheckable(True)
+            self._qlabel.setArrowType(QtCore.Qt.RightArrow)
+            self._qlabel.setToolButtonStyle(QtCore.Qt.ToolButtonTextBesideIcon)
+            self._qlabel.setAutoRaise(True)
+            self._qlabel.toggled.connect(self.set_expanded)
+            self._outer_layout.addWidget(self._qlabel)
+
+            self._body = QtWidgets.QWidget(self.widget)
+            self._body.setVisible(False)
+            self._outer_layout.addWidget(self._body)
+
+            self.vlayout = QtWidgets.QVBoxLayout(self._body)
+            self.vlayout.setContentsMargins(0, 0, 0, 0)
+        else:
+            self._body = self.widget
+            self.vlayout = QtWidgets.QVBoxLayout(self.widget)
+            self._qlabel = QtWidgets.QLabel(self.widget)
+            self.vlayout.addWidget(self._qlabel)
+
         self._qlabel.setStyleSheet("font-weight: bold")
         self._qlabel.setText(self.name)
-        self.vlayout.addWidget(self._qlabel)
 
-        arg_names = inspect.signature(func).parameters.keys()
-        arg_sigs = inspect.signature(func).parameters.values()
+        # cached, so constructing the same function again skips the introspection
+        self._signature = compile_signature(func, arg_opts)
+
+        # copy so that modifying the opts of this instance does not modify the cache
+        self.arg_opts = {arg: dict(opts) for arg, opts in self._signature.arg_opts.items()}
 
-        self.arg_opts = dict.fromkeys(arg_names)
-        self.arg_opts = {arg: {} for arg in arg_names}
-        if arg_opts is not None:
-            self.arg_opts.update(arg_opts)
+        self._arguments = None
+
+        if arg_pool is None:
+            arg_pool = ArgPool()
+        self.arg_pool = arg_pool
+
+        # coalesce rapid changes, such as slider drags
+        self._changed_coalescer = Coalescer(
+            partial(self._emit_data, self.sig_changed),
+            mode=emit_mode,
+            interval=emit_interval,
+            parent=self
+        )
+
+        self._arg_changed_coalescer = Coalescer(
+            self._emit_arg_changed,
+            mode=emit_mode,
+            interval=emit_interval,
+            parent=self
+        )
 
-        ignore = [
-            k for k in self.arg_opts.keys() if _ignore_arguments(self.arg_opts[k])
-        ]
+        # model of the argument values, the Arg widgets are views of its specs
+        # holds the values until the widgets are created in lazy mode
+        self.params = ParameterSet(specs_from_signature(self._signature), func)
+        self.params.add_callback(self._param_changed)
 
-        arg_names = [n for n in arg_names if n not in ignore]
+        # cross-argument rules from the "constraint" arg opts, compiled once
+        self.constraints = ConstraintSet.from_arg_opts(self.arg_opts, self.params.names)
+        self.constraints.check_all(self.params.values)
+
+        # number of sig_changed & sig_set_clicked emissions blocked by violated constraints
+        self.n_blocked = 0
+
+        # True while a change from a widget is written to the params
+        self._widget_edit = False
+
+        # emissions requested within batch_update() are made once when it exits
+        self._batch_depth = 0
+        self._batch_changed = False
+        self._batch_arg_changed: Dict[str, object] = dict()
+
+        self.history: Optional[History] = _get_history(history)
+
+        self.lazy = lazy
+
+        if self.lazy:
+            # reserve roughly the space the arguments will use so scrolling is stable
+            self._body.setMinimumHeight(30 * (len(self._signature.specs) + 1))
+
+            if not self.collapsible:
+                self.widget.installEventFilter(self)
+        else:
+            self.materialize()
+
+        self._executor = None
+        self.executor = executor
+
+        if cache is True:
+            cache = ResultCache()
+        elif cache is False:
+            cache = None
+        self.cache: Optional[ResultCache] = cache
+
+        # callable and kwargs of the latest run(), used to cache the result
+        self._run_request = None
+
+        self.stats: Optional[Stats] = _get_stats(instrument)
+
+        # time of the first edit that has not been emitted through sig_changed yet
+        self._edit_time: Optional[float] = None
+        # edit time for the sig_changed emission in progress
+        self._emitting_edit_time: Optional[float] = None
+
+        if run_on not in [None, 'set', 'changed']:
+            raise ValueError(f"`run_on` must be one of None, 'set' or 'changed', you passed: {run_on}")
+
+        if run_on == 'set':
+            self.sig_set_clicked.connect(self.run)
+        elif run_on == 'changed':
+            self.sig_changed.connect(self.run)
+
+        if run_on != 'changed':
+            # with run_on="changed" the new run supersedes the running one
+            self.sig_changed.connect(self._cancel_running)
+
+    @property
+    def materialized(self) -> bool:
+        """``True`` if the argument widgets have been created"""
+        return self._arguments is not None
+
+    @property
+    def arguments(self) -> tuple:
+        """
+        namedtuple of the ``Arg`` instances for the function arguments.
+        Creates the widgets if the function is lazy and they have not been created yet.
+        """
+        if self._arguments is None:
+            self.materialize()
+        return self._arguments
+
+    def materialize(self):
+        """
+        Create the argument widgets, values set while the function was lazy are applied to the widgets.
+        Called automatically for lazy functions when they become visible or are expanded.
+        """
+        if self._arguments is not None:
+            return
 
         # Add all the arguments as named tuples
         # so they're accessible like attributes
         # dynamically named based on the args from the function!
-        Arguments = namedtuple("Arguments", arg_names)
-        self.arguments = Arguments(
+        self._arguments = self._signature.Arguments(
             *(
                 _get_argument(
-                    sig,
-                    parent=self.widget,
+                    spec,
+                    self.params[spec.name],
+                    parent=self._body,
                     vlayout=self.vlayout,
-                    **self.arg_opts[sig.name]
                 )
-                for sig in arg_sigs if sig.name not in ignore
+                for spec in self._signature.specs
             )
         )
 
         # button at the bottom, sends a "set" signal when clicked
-        self.button_set = QtWidgets.QPushButton(self.widget)
+        self.button_set = QtWidgets.QPushButton(self._body)
         self.button_set.setText('Set')
         self.vlayout.addWidget(self.button_set)
-        self.button_set.clicked.connect(
-            partial(self._emit_data, self.sig_set_clicked)
+        self.button_set.clicked.connect(self._set_clicked)
+
+        for arg in self._arguments:
+            # sync with the widget, which may have clipped the value
+            self._update_data(arg.name, arg.val)
+
+            self._connect_arg(arg)
+
+        self._show_violations()
+
+        self._body.setMinimumHeight(0)
+
+    def _connect_arg(self, arg: Arg):
+        # keep the cached data up to date before anything else is emitted
+        arg.sig_changed.connect(
+            partial(self._update_data, arg.name)
         )
 
-        for arg in self.arguments:
-            # emit entire dict when arg is changed
-            arg.sig_changed.connect(
-                partial(self._emit_data, self.sig_changed)
+        # array edited in place, the value is the same object so it is not a change for the params
+        if getattr(arg, 'sig_modified', None) is not None:
+            arg.sig_modified.connect(
+                partial(self._value_modified, arg.name)
             )
 
-            # also emit just arg.name and arg.val when changed
-            arg.sig_changed.connect(
-                partial(self.sig_arg_changed.emit, arg.name)
-            )
+        # emit entire dict when arg is changed
+        arg.sig_changed.connect(self._request_changed)
+
+        # also emit just arg.name and arg.val when changed
+        arg.sig_changed.connect(
+            partial(self._request_arg_changed, arg.name)
+        )
+
+        # hold emissions while a slider is being dragged
+        if getattr(arg, 'slider', None) is not None:
+            for c in (self._changed_coalescer, self._arg_changed_coalescer):
+                arg.slider.sliderPressed.connect(c.hold)
+                arg.slider.sliderReleased.connect(c.release)
+
+    def _disconnect_arg(self, arg: Arg):
+        arg.sig_changed.disconnect()
+
+        if getattr(arg, 'sig_modified', None) is not None:
+            arg.sig_modified.disconnect()
+
+        if getattr(arg, 'slider', None) is not None:
+            for c in (self._changed_coalescer, self._arg_changed_coalescer):
+                for sig, slot in [(arg.slider.sliderPressed, c.hold), (arg.slider.sliderReleased, c.release)]:
+                    try:
+                        sig.disconnect(slot)
+                    except TypeError:
+                        # was not connected
+                        pass
+
+    def rebind(self, func: callable, arg_opts: dict = None):
+        """
+        Use this instance for a different function. Argument widgets are reused where the widget type matches,
+        only the widgets for the difference between the two signatures are created or released to ``arg_pool``.
+
+        Pending emissions for the previous function are flushed and its ``run()`` result is dropped.
+
+        Parameters
+        ----------
+        func : callable
+            A function with type annotations
+
+        arg_opts : dict
+            manually set certain features of an Arg
+        """
+        self.flush()
+
+        if self.executor is not None:
+            self.executor.validate(func)
+            self.executor.cancel(key=self)
+
+        old_callable = self.callable
+
+        self._signature = compile_signature(func, arg_opts)
+        self.arg_opts = {arg: dict(opts) for arg, opts in self._signature.arg_opts.items()}
+
+        self.callable = func
+        self.name = self.callable.__name__
+        self._qlabel.setText(self.name)
+
+        if self.history is not None:
+            # the steps refer to the arguments of the previous function
+            self.history.discard(self)
+
+        # params.values is updated in place since Functions keeps a reference to it
+        self.params.func = func
+        self.params.reset(specs_from_signature(self._signature))
+
+        valid = self.valid
+        self.constraints = ConstraintSet.from_arg_opts(self.arg_opts, self.params.names)
+        self.constraints.check_all(self.params.values)
+
+        if self.materialized:
+            self._rebind_arguments()
+            self._show_violations()
+
+            if self.valid:
+                self.sig_changed.emit(self.get_data())
+        else:
+            self._body.setMinimumHeight(30 * (len(self._signature.specs) + 1))
+
+        if valid != self.valid:
+            self.sig_valid_changed.emit(self.valid)
+
+        self.sig_rebound.emit(old_callable, func)
+
+    def _rebind_arguments(self):
+        old = {arg.name: arg for arg in self._arguments}
+
+        # specs that can reuse the argument with the same name
+        reuse = dict()
+        for spec in self._signature.specs:
+            arg = old.get(spec.name)
+            if arg is not None and \
+                    type(arg) is _get_arg_class(spec) and \
+                    type(arg.widget) is _get_arg_class(spec).get_widget_type(spec.kwargs['typ']):
+                reuse[spec.name] = old.pop(spec.name)
+
+        # release the rest so the new arguments can take them
+        for arg in old.values():
+            self._disconnect_arg(arg)
+            self.arg_pool.release(arg)
+
+        # detach to reinsert in the order of the new signature
+        for arg in reuse.values():
+            self._disconnect_arg(arg)
+            arg.detach()
+
+        index = self.vlayout.indexOf(self.button_set)
+
+        args = list()
+        for spec in self._signature.specs:
+            arg = reuse.get(spec.name)
+
+            if arg is None:
+                arg = self.arg_pool.acquire(_get_arg_class(spec).get_widget_type(spec.kwargs['typ']))
+
+                if arg is not None and type(arg) is not _get_arg_class(spec):
+                    self.arg_pool.release(arg)
+                    arg = None
+
+            param = self.params[spec.name]
+
+            if arg is None:
+                arg = _get_argument(spec, param, parent=self._body, vlayout=self.vlayout)
+                arg.detach()
+            else:
+                arg.configure(**dict(spec.kwargs, val=param.val, spec=param))
+
+            index = arg.attach(self._body, self.vlayout, index)
+
+            # the widget may have clipped the value, no delta for the new signature
+            self.params.values[arg.name] = arg.val
+            self._connect_arg(arg)
+            args.append(arg)
+
+        self._arguments = self._signature.Arguments(*args)
+
+    def set_expanded(self, expanded: bool):
+        """
+        Show or hide the arguments of a collapsible function, creates the widgets if necessary.
+
+        Parameters
+        ----------
+        expanded : bool
+            ``True`` to show the arguments
+        """
+        if not self.collapsible:
+            return
+
+        if expanded:
+            self.materialize()
+
+        if self._qlabel.isChecked() != expanded:
+            # calls this method again through the toggled signal
+            self._qlabel.setChecked(expanded)
+            return
+
+        self._qlabel.setArrowType(QtCore.Qt.DownArrow if expanded else QtCore.Qt.RightArrow)
+        self._body.setVisible(expanded)
+
+    def materialize_if_visible(self):
+        """Create the widgets of a lazy, non-collapsible function if it is within the visible region."""
+        if self.materialized or self.collapsible:
+            return
+
+        if not self.widget.visibleRegion().isEmpty():
+            self.materialize()
+
+    def eventFilter(self, obj: QtCore.QObject, event: QtCore.QEvent) -> bool:
+        if obj is self.widget and event.type() == QtCore.QEvent.Show and not self.materialized:
+            # geometry is not final until the event loop has processed the show
+            QtCore.QTimer.singleShot(0, self.materialize_if_visible)
+        return super(Function, self).eventFilter(obj, event)
+
+    @property
+    def executor(self) -> Optional[BaseExecutor]:
+        """executor used by ``run()``"""
+        return self._executor
+
+    @executor.setter
+    def executor(self, executor: Union[str, BaseExecutor, None]):
+        if self._executor is not None:
+            self._executor.sig_result.disconnect(self._on_result)
+            self._executor.sig_error.disconnect(self._on_error)
+            self._executor.sig_runtime.disconnect(self._on_runtime)
+
+        self._executor = get_executor(executor, parent=self)
+
+        if self._executor is not None:
+            self._executor.validate(self.callable)
+
+            self._executor.sig_result.connect(self._on_result)
+            self._executor.sig_error.connect(self._on_error)
+            self._executor.sig_runtime.connect(self._on_runtime)
+
+    def run(self, *args) -> Optional[int]:
+        """
+        Call the function with the current argument values using the ``executor``.
+        The result is emitted through ``sig_result``, exceptions through ``sig_error``.
+        If the function is still running from a previous call the new call replaces it,
+        only the result of the most recent call is emitted.
+
+        If a ``cache`` is used and it has a result for the current argument values,
+        the result is emitted immediately without calling the function.
+
+        Returns
+        -------
+        Optional[int]
+            request id from the executor, ``None`` if the result came from the cache or the constraints are violated
+
+        """
+        if not self.constraints.valid:
+            self.n_blocked += 1
+            return None
+
+        if self.executor is None:
+            self.executor = 'async' if _is_coroutine_function(self.callable) else 'thread'
+
+        kwargs = self.get_data()
+
+        if self.stats is not None:
+            self.stats.count('run', function=self.name)
+
+        if self.cache is not None:
+            found, result = self.cache.get(self.callable, kwargs)
+            if found:
+                if self.stats is not None:
+                    self.stats.count('cache_hit', function=self.name)
+
+                # the result of a previous run that is still running is now stale
+                self.executor.cancel(key=self)
+                self._run_request = None
+                self.sig_result.emit(result)
+                return None
+
+        self._run_request = (self.callable, kwargs)
+
+        return self.executor.submit(self.callable, kwargs, key=self)
+
+    def _arg_range(self, name: str) -> tuple:
+        # (min, max, step, type) of a numeric argument, from the widget if it exists
+        spec = {spec.name: spec for spec in self._signature.specs}[name]
+
+        if spec.kind != 'numeric':
+            raise TypeError(f"Only numeric arguments can be swept, `{name}` is: {spec.kwargs['typ']}")
+
+        if self.materialized:
+            arg = getattr(self.arguments, name)
+            return arg.min, arg.max, arg.step, arg.typ
+
+        lo, hi = spec.kwargs.get('minmax', (-1, 999))
+        return lo, hi, spec.kwargs.get('step', 1), spec.kwargs['typ']
+
+    def sweep(
+            self,
+            args: Union[List[str], Dict[str, Union[int, Sequence, None]]],
+            mode: str = 'grid',
+            n: int = 100,
+            seed: Optional[int] = None,
+            batch_size: int = 64,
+            executor: str = 'thread',
+            n_workers: Optional[int] = None,
+            start: bool = True,
+    ) -> 'Sweep':
+        """
+        Run the function over samples of numeric arguments, using the min, max and step of each argument.
+        Arguments that are not swept use their current values.
+
+        Functions decorated with ``@qtap.sweep.vectorized`` are called once with NumPy arrays
+        that broadcast to all the samples, other functions are called for each sample in parallel batches.
+
+        Parameters
+        ----------
+        args : Union[List[str], Dict[str, Union[int, Sequence, None]]]
+            Names of the arguments to sweep, or a dict mapping names to one of:
+
+            ``None``: all values from min to max using the step size (default for a list of names)
+
+            ``int``: number of evenly spaced values between min and max
+
+            ``Sequence``: explicit values
+
+        mode : str
+            ``"grid"`` for all combinations of the values or ``"random"`` for ``n`` random samples
+
+        n : int
+            number of samples for ``"random"`` mode
+
+        seed : Optional[int]
+            random seed for ``"random"`` mode
+
+        batch_size : int
+            number of samples per batch
+
+        executor : str
+            ``"thread"`` or ``"process"`` for running batches in parallel,
+            use ``"process"`` for CPU bound functions, which must then be importable by the worker processes
+
+        n_workers : Optional[int]
+            number of threads or processes
+
+        start : bool
+            start running in the background immediately, otherwise call ``Sweep.start()`` or ``Sweep.run()``
+
+        Returns
+        -------
+        Sweep
+            connect to ``sig_progress``, ``sig_batch`` and ``sig_finished`` for the results
+
+        """
+        # imported here since it imports numpy
+        from .sweep import Sweep, grid_values, random_samples
+
+        if mode not in ['grid', 'random']:
+            raise ValueError(f"`mode` must be one of 'grid' or 'random', you passed: {mode}")
+
+        if not isinstance(args, dict):
+            args = dict.fromkeys(args)
+
+        ranges = {name: self._arg_range(name) for name in args.keys()}
+
+        if mode == 'grid':
+            values = grid_values(ranges, args)
+        else:
+            values = random_samples(ranges, args, n, seed)
+
+        fixed = {k: v for k, v in self.get_data().items() if k not in args.keys()}
+
+        sweep = Sweep(
+            self.callable,
+            fixed=fixed,
+            values=values,
+            grid=(mode == 'grid'),
+            batch_size=batch_size,
+            executor=executor,
+            n_workers=n_workers,
+            parent=self
+        )
+
+        if start:
+            sweep.start()
+
+        return sweep
+
+    @property
+    def running(self) -> bool:
+        """``True`` if a ``run()`` has not finished yet"""
+        if self.executor is None:
+            return False
+        return self.executor.is_running(key=self)
+
+    def _cancel_running(self, *args):
+        # the arguments changed, the result of the running task is stale and is dropped by every executor,
+        # executors with ``cancels_running`` also interrupt the task
+        if self.executor is not None and self.running:
+            self.executor.cancel(key=self)
+
+    def _on_result(self, key, result):
+        if key is not self:
+            return
+
+        if self.cache is not None and self._run_request is not None:
+            # the executor only delivers the result of the latest request
+            self.cache.put(*self._run_request, result)
+
+        self.sig_result.emit(result)
+
+    def _on_error(self, key, e):
+        if key is self:
+            self.sig_error.emit(e)
+
+    def _on_runtime(self, key, seconds: float):
+        if key is self and self.stats is not None:
+            self.stats.record('runtime', seconds, function=self.name)
+
+    def _update_data(self, name: str, val: object):
+        # change from a widget
+        self._widget_edit = True
+        try:
+            self.params.set(name, val)
+        finally:
+            self._widget_edit = False
+
+    def _value_modified(self, name: str):
+        # in place edit from a widget
+        self._widget_edit = True
+        try:
+            self.params.modified(name)
+        finally:
+            self._widget_edit = False
+
+    def _param_changed(self, name: str, old: object, new: object):
+        if self._widget_edit:
+            self._check_constraints(name)
+
+            # modified in place, the previous value no longer exists so it cannot be undone
+            if self.history is not None and old is not new:
+                self.history.record(self, name, old, new)
+
+            self.sig_delta.emit(self.callable, name, old, new)
+            return
+
+        # changed through the params, show it in the widget
+        if self.materialized:
+            arg = getattr(self._arguments, name)
+
+            # emitted below, the same way for all widgets
+            arg.blockSignals(True)
+            try:
+                arg.val = new
+            finally:
+                arg.blockSignals(False)
+
+            if not _values_equal(arg.val, new):
+                # the widget rounded the value
+                new = arg.val
+                self.params.values[name] = new
+
+        self._check_constraints(name)
+
+        if self.history is not None and old is not new:
+            self.history.record(self, name, old, new)
+
+        self.sig_delta.emit(self.callable, name, old, new)
+        self._request_changed()
+        self._request_arg_changed(name, new)
+
+    def _check_constraints(self, name: str):
+        # only the constraints that use this argument
+        if not self.constraints:
+            return
+
+        valid = self.constraints.valid
+
+        if self.constraints.update(name, self.params.values):
+            self._show_violations()
+
+            if valid != self.constraints.valid:
+                self.sig_valid_changed.emit(self.constraints.valid)
+
+    def _show_violations(self):
+        if not self.constraints or not self.materialized:
+            return
+
+        messages = self.constraints.messages()
+        for arg in self._arguments:
+            arg.set_invalid(messages.get(arg.name))
+
+    @property
+    def valid(self) -> bool:
+        """
+        ``True`` if all the constraints declared with the ``"constraint"`` arg opt are satisfied.
+        ``sig_changed``, ``sig_set_clicked`` and ``run()`` are blocked while it is ``False``.
+        """
+        return self.constraints.valid
+
+    def _request_changed(self, *args):
+        if self.stats is not None and self._edit_time is None:
+            self._edit_time = perf_counter()
+
+        if self._batch_depth:
+            self._batch_changed = True
+            return
+
+        self._changed_coalescer.request(None)
+
+    def _request_arg_changed(self, name: str, val: object):
+        if self._batch_depth:
+            self._batch_arg_changed[name] = val
+            return
+
+        self._arg_changed_coalescer.request(name, name, val)
+
+    @contextmanager
+    def batch_update(self):
+        """
+        Context manager for changing several arguments as one update. Changes made within it,
+        through ``set_data()``, ``params`` or the GUI, are emitted once when the outermost batch exits:
+        ``sig_changed`` once with the final values and ``sig_arg_changed`` once for each changed argument.
+        The changes are one undo step.
+
+        If an exception is raised within the batch, the arguments are restored to their values
+        from the start of the batch and nothing is emitted.
+
+        .. code-block:: python
+
+            with func.batch_update():
+                func.set_data({'a': 1})
+                func.params.set('b', 2.0)
+        """
+        outer = self._batch_depth == 0
+        if outer:
+            initial = dict(self.params.values)
+
+        self._batch_depth += 1
+        try:
+            with self._history_group():
+                try:
+                    yield
+                except BaseException:
+                    if outer:
+                        self._rollback(initial)
+                    raise
+        finally:
+            self._batch_depth -= 1
+
+            if outer:
+                changed, self._batch_changed = self._batch_changed, False
+                arg_changed, self._batch_arg_changed = self._batch_arg_changed, dict()
+
+                for name, val in arg_changed.items():
+                    self._arg_changed_coalescer.request(name, name, val)
+
+                if changed:
+                    self._changed_coalescer.request(None)
+
+    def _rollback(self, values: Dict[str, object]):
+        # within the history group, so the rolled back changes cancel out
+        for name, val in values.items():
+            if name in self.params:
+                self.params.set(name, val)
+
+        self._batch_changed = False
+        self._batch_arg_changed.clear()
+
+    def _apply_values(self, values: Dict[str, object]):
+        # apply undo or redo values as one update, without recording them
+        with self.history.applying(), self.batch_update():
+            for name, val in values.items():
+                self.params.set(name, val)
+
+    def undo(self) -> bool:
+        """
+        Undo the latest edit of the arguments of this function, requires ``history``.
+        Rapid edits of the same argument, such as a slider drag, and ``set_data()`` calls are undone in one step.
+        The values are applied as one update, ``sig_changed`` is emitted once.
+
+        Returns
+        -------
+        bool
+            ``True`` if an edit was undone
+        """
+        if self.history is None:
+            return False
+
+        entry = self.history.pop_undo([self])
+        if entry is None:
+            return False
+
+        self._apply_values(entry.values(0)[self])
+        return True
+
+    def redo(self) -> bool:
+        """
+        Redo the latest undone edit of the arguments of this function, requires ``history``.
+
+        Returns
+        -------
+        bool
+            ``True`` if an edit was redone
+        """
+        if self.history is None:
+            return False
+
+        entry = self.history.pop_redo([self])
+        if entry is None:
+            return False
+
+        self._apply_values(entry.values(1)[self])
+        return True
+
+    def _emit_arg_changed(self, name: str, val: object):
+        if self.stats is None:
+            self.sig_arg_changed.emit(name, val)
+            return
+
+        with self.stats.timer('emit.sig_arg_changed', function=self.name):
+            self.sig_arg_changed.emit(name, val)
+
+    def _set_clicked(self):
+        # deliver pending changes before the "set"
+        self.flush()
+        self._emit_data(self.sig_set_clicked)
 
     def _emit_data(self, sig: QtCore.pyqtBoundSignal):
-        sig.emit(self.get_data())
+        if not self.constraints.valid:
+            # invalid combinations of values never reach the slots
+            self.n_blocked += 1
+            self._edit_time = None
+            return
+
+        if self.stats is None:
+            sig.emit(self.get_data())
+            return
+
+        name = _signal_name(sig)
+
+        with self.stats.timer('get_data', function=self.name):
+            data = self.get_data()
+
+        if name == 'sig_changed':
+            self._emitting_edit_time, self._edit_time = self._edit_time, None
+            if self._emitting_edit_time is not None:
+                self.stats.record(
+                    'latency.sig_changed', perf_counter() - self._emitting_edit_time, function=self.name
+                )
+
+        # time spent in the connected slots
+        with self.stats.timer(f'emit.{name}', function=self.name):
+            sig.emit(data)
+
+        self._emitting_edit_time = None
+
+    def flush(self):
+        """
+        Immediately emit any changes that are being held back by ``emit_mode``
+        """
+        self._arg_changed_coalescer.flush()
+        self._changed_coalescer.flush()
+
+    def get_suppressed_counts(self) -> Dict[str, int]:
+        """
+        Number of emissions that were suppressed by ``emit_mode``
+
+        Returns
+        -------
+        dict
+            {'sig_changed': int, 'sig_arg_changed': int}
+
+        """
+        return {
+            'sig_changed': self._changed_coalescer.n_suppressed,
+            'sig_arg_changed': self._arg_changed_coalescer.n_suppressed,
+        }
 
     def get_data(self) -> Dict[str, object]:
         """
@@ -233,11 +1161,95 @@ class Function(QtCore.QObject):
 
         """
 
-        return {arg.name: arg.val for arg in self.arguments}
+        return self.params.to_dict()
+
+    def snapshot(self) -> Dict[str, object]:
+        """
+        Get the cached argument values without creating a new dict.
+        The returned dict is updated in place when arguments change, do not modify it.
+
+        Returns
+        -------
+        dict
+            dict keys are the argument names, dict values are the argument vals
+
+        """
+        return self.params.values
 
     def set_data(self, d: dict):
-        for arg in d.keys():
-            getattr(self.arguments, arg).val = d[arg]
+        """
+        Set argument values as one update, see ``batch_update()``.
+        The whole dict is validated before any value is set, ``sig_changed`` is emitted once with the final values.
+        Values are kept in ``params`` until the widgets are created in lazy mode.
+
+        Parameters
+        ----------
+        d : dict
+            values keyed by argument name
+
+        Raises
+        ------
+        AttributeError
+            if an argument does not exist, nothing is set
+
+        TypeError
+            if a value has the wrong type, nothing is set
+        """
+        self.validate_data(d)
+
+        with self.batch_update():
+            for arg, val in d.items():
+                self.params.set(arg, val)
+
+    def validate_data(self, d: dict):
+        """
+        Check argument values without setting them
+
+        Parameters
+        ----------
+        d : dict
+            values keyed by argument name
+
+        Raises
+        ------
+        AttributeError
+            if an argument does not exist
+
+        TypeError
+            if a value has the wrong type
+        """
+        for arg, val in d.items():
+            if arg not in self.params:
+                raise AttributeError(f"'Arguments' object has no attribute '{arg}'")
+
+            self.params[arg].validate(val)
+
+    def data_modified(self, name: str):
+        """
+        Tell the function that the value of an argument was modified in place, such as an array written to
+        by other code. ``set_data()`` with the same object is not a change, this updates the widget, checks
+        the constraints, emits ``sig_delta`` and ``sig_changed`` as for a new value. It is not recorded
+        in the ``history`` since the previous value no longer exists.
+
+        Parameters
+        ----------
+        name : str
+            argument name
+
+        Raises
+        ------
+        AttributeError
+            if the argument does not exist
+        """
+        if name not in self.params:
+            raise AttributeError(f"'Arguments' object has no attribute '{name}'")
+
+        self.params.modified(name)
+
+    def _history_group(self):
+        if self.history is None:
+            return nullcontext()
+        return self.history.group()
 
     def set_title(self, title: str):
         """
@@ -260,18 +1272,30 @@ class Function(QtCore.QObject):
                    f'\n' + \
             '\n'.join(
                 [
-                    f'  {arg.name}:\n' \
-                        f'    {arg.typ}\n' \
-                        f'    {arg.val}'
-                    for arg in self.arguments
+                    f'  {spec.name}:\n' \
+                        f'    {spec.kwargs["typ"]}\n' \
+                        f'    {self.params.get(spec.name)}'
+                    for spec in self._signature.specs
                 ]
             )
 
 
+@lru_cache(maxsize=64)
+def _functions_tuple(names: Tuple[str]) -> type:
+    return namedtuple('Functions', names)
+
+
 class Functions(QtWidgets.QWidget):
     sig_changed = QtCore.pyqtSignal(dict)
     sig_set_clicked = QtCore.pyqtSignal(dict)
 
+    # emits the function and the result or exception
+    sig_result = QtCore.pyqtSignal(object, object)
+    sig_error = QtCore.pyqtSignal(object, object)
+
+    # emits the callable, name of the arg, old value and new value
+    sig_delta = QtCore.pyqtSignal(object, str, object, object)
+
     def __init__(
             self,
             functions: List[callable],
@@ -280,6 +1304,16 @@ class Functions(QtWidgets.QWidget):
             scroll: bool = False,
             orient: str = 'V',
             columns: bool = False,
+            emit_mode: Optional[str] = None,
+            emit_interval: int = 50,
+            executor: Union[str, BaseExecutor, None] = None,
+            run_on: Optional[str] = None,
+            lazy: bool = False,
+            collapsible: bool = False,
+            cache: Union[bool, ResultCache, None] = None,
+            instrument: Union[bool, Stats, None] = None,
+            history: Union[bool, History, None] = None,
+            pipeline: bool = False,
             **kwargs
     ):
         """
@@ -297,7 +1331,7 @@ class Functions(QtWidgets.QWidget):
             parent widget
 
         scroll : bool
-            Not yet implemented
+            Put the functions in a scroll area, ``orient`` is not used when ``scroll`` is ``True``
 
         orient : str
             orientation of the individual functions. One of ``V`` or ``H``.
@@ -306,6 +1340,45 @@ class Functions(QtWidgets.QWidget):
         columns : bool
             Not yet implemented
 
+        emit_mode : Optional[str]
+            Coalesce rapid emissions, one of ``None``, ``"debounce"``, ``"throttle"`` or ``"release"``.
+            Used for ``sig_changed`` and passed to each ``Function``.
+            See ``Function`` for details.
+
+        emit_interval : int
+            interval in milliseconds for the ``"debounce"`` and ``"throttle"`` modes
+
+        executor : Union[str, BaseExecutor, None]
+            executor shared by all functions, see ``Function``
+
+        run_on : Optional[str]
+            passed to each ``Function``, one of ``None``, ``"set"`` or ``"changed"``
+
+        lazy : bool
+            Only create the widgets for each function when it is scrolled into view or expanded.
+            Use with ``scroll=True`` and/or ``collapsible=True`` for large numbers of functions.
+
+        collapsible : bool
+            Each function can be expanded or collapsed by clicking on its name
+
+        cache : Union[bool, ResultCache, None]
+            result cache shared by all functions, ``True`` creates an in-memory ``ResultCache``.
+            See ``Function``
+
+        instrument : Union[bool, Stats, None]
+            ``Stats`` shared by all functions, ``True`` creates a ``Stats`` instance. See ``Function``.
+            Events for ``Functions`` itself are prefixed with ``functions.``
+
+        history : Union[bool, History, None]
+            undo & redo ``History`` shared by all functions, ``True`` creates a ``History``.
+            See ``undo()`` and ``redo()``
+
+        pipeline : bool
+            Chain the functions, an argument takes the output of an upstream function with the ``"input"`` arg opt,
+            such as ``{'img': {'input': 'load'}}``. Only the functions whose arguments or inputs changed are
+            recomputed, results are cached. See ``qtap.pipeline.Pipeline``.
+            ``run_on`` then runs the pipeline, with the ``executor`` independent branches run in parallel.
+
         **kwargs
             passed to QtWidgets.QWidget.__init__()
 
@@ -321,6 +1394,18 @@ class Functions(QtWidgets.QWidget):
             The emitted dict comes from ``get_data()``,
             see the docstring for ``get_data()`` for details.
 
+        sig_delta : object, str, object, object
+            Emitted when an underlying function emits ``sig_delta``.
+            Emits the callable, argument name, old value and new value.
+
+        sig_result : object, object
+            Emitted when an underlying function emits ``sig_result``.
+            Emits the callable and the result.
+
+        sig_error : object, object
+            Emitted when an underlying function emits ``sig_error``.
+            Emits the callable and the exception.
+
         Examples
         --------
 
@@ -405,20 +1490,46 @@ class Functions(QtWidgets.QWidget):
         """
         super().__init__(parent, **kwargs)
 
-        _functions = namedtuple(
-            'Functions',
-            [f.__name__ for f in functions]
-        )
+        _functions = _functions_tuple(tuple(f.__name__ for f in functions))
 
         if arg_opts is None:
             arg_opts = [None] * len(functions)
 
+        # one executor shared by all the functions
+        self.executor = get_executor(executor, parent=self)
+
+        if cache is True:
+            cache = ResultCache()
+        elif cache is False:
+            cache = None
+        self.cache: Optional[ResultCache] = cache
+
+        self.stats: Optional[Stats] = _get_stats(instrument)
+        self.history: Optional[History] = _get_history(history)
+
+        # sig_changed requested within batch_update() is emitted once when it exits
+        self._batch_depth = 0
+        self._batch_changed = False
+
+        # edit time of the earliest change that has not been emitted through sig_changed yet
+        self._edit_time: Optional[float] = None
+
         self.functions = _functions(
             *(
                 Function(
                     func,
                     opt,
-                    parent=self
+                    parent=self,
+                    emit_mode=emit_mode,
+                    emit_interval=emit_interval,
+                    executor=self.executor,
+                    # the pipeline runs the functions
+                    run_on=None if pipeline else run_on,
+                    lazy=lazy,
+                    collapsible=collapsible,
+                    cache=self.cache,
+                    instrument=self.stats,
+                    history=self.history,
                 )
                 for func, opt in zip(functions, arg_opts)
             )
@@ -434,6 +1545,12 @@ class Functions(QtWidgets.QWidget):
             self.scroll_content = QtWidgets.QWidget(self.scroll_area)
             self.scroll_layout = QtWidgets.QVBoxLayout(self.scroll_content)
             self.scroll_content.setLayout(self.scroll_layout)
+            self.scroll_area.setWidget(self.scroll_content)
+
+            if lazy:
+                # create the widgets of functions as they are scrolled into view
+                self.scroll_area.verticalScrollBar().valueChanged.connect(self._materialize_visible)
+                self.scroll_area.horizontalScrollBar().valueChanged.connect(self._materialize_visible)
 
             self.main_layout = self.scroll_layout
         else:
@@ -442,22 +1559,224 @@ class Functions(QtWidgets.QWidget):
             elif orient in ['H', 'horizontal']:
                 self.main_layout = QtWidgets.QHBoxLayout(self)
 
+        self._changed_coalescer = Coalescer(
+            partial(self._emit_data, self.sig_changed),
+            mode=emit_mode,
+            interval=emit_interval,
+            parent=self
+        )
+
+        # the per-function dicts are the cached dicts from each function
+        self._data = {f.callable: f.snapshot() for f in self.functions}
+
+        self.pipeline: Optional[Pipeline] = None
+        if pipeline:
+            self.pipeline = Pipeline(self.functions, executor=self.executor, parent=self)
+
+            if run_on == 'set':
+                self.sig_set_clicked.connect(self.pipeline.run)
+            elif run_on == 'changed':
+                self.sig_changed.connect(self.pipeline.run)
+            elif run_on is not None:
+                raise ValueError(f"`run_on` must be one of None, 'set' or 'changed', you passed: {run_on}")
+
         f: Function
         for f in self.functions:
             self.main_layout.addWidget(f.widget)
 
             # emit dict when any function changes
-            f.sig_changed.connect(
-                partial(self._emit_data, self.sig_changed)
-            )
+            f.sig_changed.connect(partial(self._request_changed, f))
 
             # emit dict when any function is set
-            f.sig_set_clicked.connect(
-                partial(self._emit_data, self.sig_set_clicked)
-            )
+            f.sig_set_clicked.connect(self._set_clicked)
+
+            f.sig_delta.connect(self.sig_delta)
+            f.sig_rebound.connect(self._function_rebound)
+
+            # look up the callable when emitting since it can change with rebind()
+            f.sig_result.connect(partial(self._emit_function_signal, self.sig_result, f))
+            f.sig_error.connect(partial(self._emit_function_signal, self.sig_error, f))
+
+    def _emit_function_signal(self, sig, f: Function, obj: object):
+        sig.emit(f.callable, obj)
+
+    def _function_rebound(self, old: callable, new: callable):
+        # keep the order of the functions
+        data = {f.callable: f.snapshot() for f in self.functions}
+        self._data.clear()
+        self._data.update(data)
+
+    def _materialize_visible(self, *args):
+        for f in self.functions:
+            f.materialize_if_visible()
+
+    def resizeEvent(self, event):
+        super(Functions, self).resizeEvent(event)
+        QtCore.QTimer.singleShot(0, self._materialize_visible)
+
+    def _request_changed(self, f: Function, *args):
+        if self.stats is not None and self._edit_time is None:
+            # latency is measured from the edit in the function
+            self._edit_time = f._emitting_edit_time
+
+        if self._batch_depth:
+            self._batch_changed = True
+            return
+
+        self._changed_coalescer.request(None)
+
+    @contextmanager
+    def batch_update(self):
+        """
+        Context manager for changing the arguments of several functions as one update,
+        ``sig_changed`` is emitted once when the outermost batch exits. See ``Function.batch_update()``,
+        if an exception is raised within the batch all the functions are restored.
+        """
+        self._batch_depth += 1
+        try:
+            with ExitStack() as stack:
+                for f in self.functions:
+                    stack.enter_context(f.batch_update())
+                yield
+        finally:
+            self._batch_depth -= 1
+
+            if not self._batch_depth:
+                changed, self._batch_changed = self._batch_changed, False
+                if changed:
+                    self._changed_coalescer.request(None)
+
+    def _get_function(self, key: Union[callable, str]) -> Function:
+        for f in self.functions:
+            if f.callable is key or f.name == key:
+                return f
+        raise KeyError(f"No function {key!r}")
+
+    def set_data(self, d: dict):
+        """
+        Set the argument values of several functions as one update.
+        Everything is validated before any value is set, ``sig_changed`` is emitted once with the final values.
+
+        Parameters
+        ----------
+        d : dict
+            dict keys are the functions or function names, dict values are dicts of argument values
+
+        Raises
+        ------
+        KeyError
+            if a function does not exist, nothing is set
+
+        AttributeError
+            if an argument does not exist, nothing is set
+
+        TypeError
+            if a value has the wrong type, nothing is set
+        """
+        values = [(self._get_function(key), data) for key, data in d.items()]
+
+        for f, data in values:
+            f.validate_data(data)
+
+        with self.batch_update():
+            for f, data in values:
+                f.set_data(data)
+
+    def _apply_entry(self, entry, which: int):
+        with self.batch_update():
+            for f, values in entry.values(which).items():
+                f._apply_values(values)
+
+    def undo(self) -> bool:
+        """
+        Undo the latest edit in any of the functions, requires ``history``.
+        Edits that span several functions are undone together, ``sig_changed`` is emitted once.
+
+        Returns
+        -------
+        bool
+            ``True`` if an edit was undone
+        """
+        if self.history is None:
+            return False
+
+        entry = self.history.pop_undo(list(self.functions))
+        if entry is None:
+            return False
+
+        self._apply_entry(entry, 0)
+        return True
+
+    def redo(self) -> bool:
+        """
+        Redo the latest undone edit in any of the functions, requires ``history``.
+
+        Returns
+        -------
+        bool
+            ``True`` if an edit was redone
+        """
+        if self.history is None:
+            return False
+
+        entry = self.history.pop_redo(list(self.functions))
+        if entry is None:
+            return False
+
+        self._apply_entry(entry, 1)
+        return True
+
+    def _set_clicked(self):
+        self._changed_coalescer.flush()
+        self._emit_data(self.sig_set_clicked)
 
     def _emit_data(self, sig):
-        sig.emit(self.get_data())
+        if not all(f.constraints.valid for f in self.functions):
+            # a function with violated constraints has blocked its own emission
+            self._edit_time = None
+            return
+
+        if self.stats is None:
+            sig.emit(self.get_data())
+            return
+
+        name = _signal_name(sig)
+
+        with self.stats.timer('functions.get_data'):
+            data = self.get_data()
+
+        if name == 'sig_changed':
+            edit_time, self._edit_time = self._edit_time, None
+            if edit_time is not None:
+                self.stats.record('functions.latency.sig_changed', perf_counter() - edit_time)
+
+        with self.stats.timer(f'functions.emit.{name}'):
+            sig.emit(data)
+
+    def flush(self):
+        """
+        Immediately emit any changes that are being held back by ``emit_mode``
+        """
+        for f in self.functions:
+            f.flush()
+        self._changed_coalescer.flush()
+
+    def get_suppressed_counts(self) -> Dict[str, int]:
+        """
+        Number of emissions of ``sig_changed`` that were suppressed by ``emit_mode``,
+        this includes the suppressed emissions of all the underlying functions.
+
+        Returns
+        -------
+        dict
+            {'sig_changed': int}
+
+        """
+        return {
+            'sig_changed':
+                self._changed_coalescer.n_suppressed +
+                sum(f.get_suppressed_counts()['sig_changed'] for f in self.functions)
+        }
 
     def get_data(self) -> Dict[callable, dict]:
         """
@@ -470,6 +1789,20 @@ class Functions(QtWidgets.QWidget):
         """
         return {f.callable: f.get_data() for f in self.functions}
 
+    def snapshot(self) -> Dict[callable, dict]:
+        """
+        Get the cached data for all functions without creating new dicts.
+        The returned dict and the dicts within it are updated in place when arguments change,
+        do not modify them.
+
+        Returns
+        -------
+            dict
+                dict keys are the functions, each dict value is the ``snapshot()`` of that function
+
+        """
+        return self._data
+
     def __repr__(self):
         return '\n'.join(
             [
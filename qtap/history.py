@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@author: kushal
+
+GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007
+"""
+
+from time import monotonic
+from typing import Dict, Hashable, List, Optional, Tuple
+from collections import deque
+from contextlib import contextmanager
+from .model import _values_equal
+
+
+class HistoryEntry:
+    __slots__ = ('deltas', 'time')
+
+    def __init__(self, t: float):
+        """
+        One undo step, the old & new value of every argument that was changed in the step
+
+        Attributes
+        ----------
+        deltas : Dict[Tuple[object, str], list]
+            [old, new] keyed by (target, argument name), the target is usually a ``Function``
+
+        time : float
+            ``time.monotonic()`` of the latest edit in the step
+        """
+        self.deltas: Dict[Tuple[object, str], list] = dict()
+        self.time = t
+
+    def targets(self) -> List[object]:
+        """targets that have arguments in this step, in the order they were changed"""
+        return list(dict.fromkeys(target for target, name in self.deltas.keys()))
+
+    def values(self, which: int) -> Dict[object, Dict[str, object]]:
+        """
+        Values of this step for each target
+
+        Parameters
+        ----------
+        which : int
+            ``0`` for the old values, ``1`` for the new values
+
+        Returns
+        -------
+        Dict[object, Dict[str, object]]
+            {target: {argument name: value}}
+        """
+        values = dict()
+        for (target, name), delta in self.deltas.items():
+            values.setdefault(target, dict())[name] = delta[which]
+        return values
+
+    def __repr__(self):
+        return ', '.join(f'{name}: {old!r} -> {new!r}' for (target, name), (old, new) in self.deltas.items())
+
+
+class History:
+    def __init__(self, maxlen: int = 256, coalesce_interval: float = 0.5):
+        """
+        Bounded undo & redo history of argument edits, does not use Qt.
+        Only the old & new value of each changed argument is stored, not the full argument dicts.
+        Usually created through the ``history`` argument of ``Function`` or ``Functions``,
+        can be shared between functions.
+
+        Parameters
+        ----------
+        maxlen : int
+            maximum number of undo steps, the oldest steps are dropped first
+
+        coalesce_interval : float
+            edits of the same argument within this many seconds of each other are merged into one step,
+            so that a slider drag is undone in one step
+        """
+        self.maxlen = maxlen
+        self.coalesce_interval = coalesce_interval
+
+        # ring buffers, appending to a full deque drops the oldest step
+        self._undo: deque = deque(maxlen=maxlen)
+        self._redo: deque = deque(maxlen=maxlen)
+
+        # edits are grouped into this entry while a group() is open
+        self._group: Optional[HistoryEntry] = None
+        self._group_depth = 0
+
+        # True while undo or redo values are applied, edits are not recorded
+        self._applying = False
+
+    @property
+    def can_undo(self) -> bool:
+        """``True`` if there is a step to undo"""
+        return len(self._undo) > 0
+
+    @property
+    def can_redo(self) -> bool:
+        """``True`` if there is a step to redo"""
+        return len(self._redo) > 0
+
+    def record(self, target: Hashable, name: str, old: object, new: object):
+        """
+        Record an edit, clears the redo steps
+
+        Parameters
+        ----------
+        target : Hashable
+            object the argument belongs to, usually a ``Function``
+
+        name : str
+            argument name
+
+        old : object
+            value before the edit
+
+        new : object
+            value after the edit
+        """
+        if self._applying:
+            return
+
+        self._redo.clear()
+
+        now = monotonic()
+        key = (target, name)
+
+        if self._group is not None:
+            entry = self._group
+        elif self._undo and self._can_coalesce(self._undo[-1], key, now):
+            entry = self._undo[-1]
+        else:
+            entry = HistoryEntry(now)
+            self._undo.append(entry)
+
+        entry.time = now
+
+        if key in entry.deltas:
+            # keep the oldest value
+            entry.deltas[key][1] = new
+        else:
+            entry.deltas[key] = [old, new]
+
+        if self._group is None and _values_equal(*entry.deltas[key]):
+            # edited back to where it started
+            del entry.deltas[key]
+            if not entry.deltas:
+                self._undo.pop()
+
+    def _can_coalesce(self, entry: HistoryEntry, key: tuple, now: float) -> bool:
+        return len(entry.deltas) == 1 and key in entry.deltas and (now - entry.time) < self.coalesce_interval
+
+    @contextmanager
+    def group(self):
+        """
+        Context manager, all the edits made within it are one undo step. Can be nested.
+
+        .. code-block:: python
+
+            with history.group():
+                func.set_data({'a': 1, 'b': 2})
+        """
+        if self._group_depth == 0:
+            self._group = HistoryEntry(monotonic())
+        self._group_depth += 1
+
+        try:
+            yield
+        finally:
+            self._group_depth -= 1
+
+            if self._group_depth == 0:
+                entry, self._group = self._group, None
+
+                for key in [k for k, (old, new) in entry.deltas.items() if _values_equal(old, new)]:
+                    del entry.deltas[key]
+
+                if entry.deltas:
+                    self._undo.append(entry)
+
+    def _find(self, steps: deque, targets: Optional[list]) -> Optional[HistoryEntry]:
+        # latest step that only changes the given targets
+        for i in range(len(steps) - 1, -1, -1):
+            entry = steps[i]
+            if targets is None or all(t in targets for t in entry.targets()):
+                del steps[i]
+                return entry
+        return None
+
+    def pop_undo(self, targets: Optional[list] = None) -> Optional[HistoryEntry]:
+        """
+        Remove the latest undo step and move it to the redo steps, the caller applies its old values.
+
+        Parameters
+        ----------
+        targets : Optional[list]
+            only consider steps that change these targets, any target by default
+
+        Returns
+        -------
+        Optional[HistoryEntry]
+            ``None`` if there is nothing to undo
+        """
+        entry = self._find(self._undo, targets)
+        if entry is not None:
+            self._redo.append(entry)
+        return entry
+
+    def pop_redo(self, targets: Optional[list] = None) -> Optional[HistoryEntry]:
+        """
+        Remove the latest redo step and move it to the undo steps, the caller applies its new values.
+
+        Parameters
+        ----------
+        targets : Optional[list]
+            only consider steps that change these targets, any target by default
+
+        Returns
+        -------
+        Optional[HistoryEntry]
+            ``None`` if there is nothing to redo
+        """
+        entry = self._find(self._redo, targets)
+        if entry is not None:
+            self._undo.append(entry)
+        return entry
+
+    @contextmanager
+    def applying(self):
+        """Context manager, edits made within it are not recorded. Used while applying undo & redo values."""
+        applying, self._applying = self._applying, True
+        try:
+            yield
+        finally:
+            self._applying = applying
+
+    def discard(self, target: Hashable):
+        """
+        Remove all the steps that change a target, used when its arguments are replaced
+
+        Parameters
+        ----------
+        target : Hashable
+            object the arguments belong to
+        """
+        for steps in (self._undo, self._redo):
+            keep = [entry for entry in steps if target not in entry.targets()]
+            steps.clear()
+            steps.extend(keep)
+
+    def clear(self):
+        """Remove all undo & redo steps"""
+        self._undo.clear()
+        self._redo.clear()
+
+    def __len__(self):
+        return len(self._undo)
+
+    def __repr__(self):
+        return f'History(undo={len(self._undo)}, redo={len(self._redo)})'
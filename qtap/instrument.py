@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@author: kushal
+
+GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007
+"""
+
+from time import perf_counter
+from typing import Dict, List
+from contextlib import contextmanager
+
+
+class TimingStat:
+    __slots__ = ('count', 'total', 'min', 'max')
+
+    def __init__(self):
+        """Summary of the recorded durations for one event, in seconds"""
+        self.count = 0
+        self.total = 0.0
+        self.min = float('inf')
+        self.max = 0.0
+
+    def add(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+
+        if seconds < self.min:
+            self.min = seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    @property
+    def mean(self) -> float:
+        """mean duration in seconds"""
+        if self.count == 0:
+            return 0.0
+        return self.total / self.count
+
+    def to_dict(self) -> Dict[str, float]:
+        return {
+            'count': self.count,
+            'total': self.total,
+            'mean': self.mean,
+            'min': self.min if self.count else 0.0,
+            'max': self.max,
+        }
+
+    def __repr__(self):
+        return f"count: {self.count}, mean: {self.mean:.6g}s, min: {self.min:.6g}s, max: {self.max:.6g}s"
+
+
+class Stats:
+    def __init__(self):
+        """
+        Counters and timings recorded by an instrumented ``Function`` or ``Functions``,
+        can be shared between functions.
+
+        Recorded timings:
+
+        ``get_data``: building the data dict before an emission
+
+        ``emit.<signal name>``: delivering the signal, i.e. time spent in the connected slots
+
+        ``latency.sig_changed``: time from the first widget edit to the delivery of ``sig_changed``,
+        includes time held back by ``emit_mode``
+
+        ``runtime``: runtime of the callable when run by qtap
+
+        The ``count`` of a timing is the number of times it was recorded, e.g. the number of emissions.
+
+        Recorded counters:
+
+        ``run``: number of ``run()`` calls
+
+        ``cache_hit``: number of ``run()`` calls answered from the result cache
+
+        Hooks are called for every record with the event name, the value and a dict of tags,
+        such as ``{'function': 'func_name'}``, use them to forward metrics elsewhere.
+
+        Attributes
+        ----------
+        counters : Dict[str, int]
+            counters, keyed by event name
+
+        timings : Dict[str, TimingStat]
+            timing summaries, keyed by event name
+        """
+        self.counters: Dict[str, int] = dict()
+        self.timings: Dict[str, TimingStat] = dict()
+
+        self._hooks: List[callable] = list()
+
+    def add_hook(self, hook: callable):
+        """
+        Add a hook that is called for every recorded event
+
+        Parameters
+        ----------
+        hook : callable
+            called as ``hook(event: str, value: float, tags: dict)``,
+            ``value`` is seconds for timings and the increment for counters
+        """
+        self._hooks.append(hook)
+
+    def remove_hook(self, hook: callable):
+        """Remove a hook"""
+        self._hooks.remove(hook)
+
+    def count(self, event: str, n: int = 1, **tags):
+        """
+        Increment a counter
+
+        Parameters
+        ----------
+        event : str
+            event name
+
+        n : int
+            increment
+
+        **tags
+            passed to the hooks
+        """
+        self.counters[event] = self.counters.get(event, 0) + n
+
+        for hook in self._hooks:
+            hook(event, n, tags)
+
+    def record(self, event: str, seconds: float, **tags):
+        """
+        Record a duration
+
+        Parameters
+        ----------
+        event : str
+            event name
+
+        seconds : float
+            duration in seconds
+
+        **tags
+            passed to the hooks
+        """
+        try:
+            stat = self.timings[event]
+        except KeyError:
+            stat = self.timings[event] = TimingStat()
+
+        stat.add(seconds)
+
+        for hook in self._hooks:
+            hook(event, seconds, tags)
+
+    @contextmanager
+    def timer(self, event: str, **tags):
+        """
+        Context manager that records the duration of its block
+
+        Parameters
+        ----------
+        event : str
+            event name
+
+        **tags
+            passed to the hooks
+        """
+        t0 = perf_counter()
+        try:
+            yield
+        finally:
+            self.record(event, perf_counter() - t0, **tags)
+
+    def summary(self) -> dict:
+        """
+        Get all the counters and timings
+
+        Returns
+        -------
+        dict
+            {'counters': {event: int}, 'timings': {event: {'count', 'total', 'mean', 'min', 'max'}}}
+        """
+        return {
+            'counters': dict(self.counters),
+            'timings': {event: stat.to_dict() for event, stat in self.timings.items()},
+        }
+
+    def reset(self):
+        """Clear all counters and timings, hooks are kept"""
+        self.counters.clear()
+        self.timings.clear()
+
+    def __repr__(self):
+        return '\n'.join(
+            [f'{event}: {n}' for event, n in self.counters.items()] +
+            [f'{event}: {stat}' for event, stat in self.timings.items()]
+        )
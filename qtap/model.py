@@ -0,0 +1,512 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@author: kushal
+
+GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007
+"""
+
+import os
+import sys
+import array
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+from .signature import compile_signature, CompiledSignature, sequence_item_type, sequence_typecodes, \
+    literal_values, is_enum
+
+
+# defaults for numeric arguments, also used by ArgNumeric
+default_minmax = (-1, 999)
+default_step = 1
+
+
+def to_sequence(val, typecode: str) -> array.array:
+    """
+    Convert a value to the ``array.array`` storage of a sequence argument, arrays of the right type are not copied
+
+    Parameters
+    ----------
+    val : Union[array.array, list, tuple, np.ndarray]
+        values
+
+    typecode : str
+        ``array.array`` typecode
+
+    Returns
+    -------
+    array.array
+        array with the values
+    """
+    if isinstance(val, array.array) and val.typecode == typecode:
+        return val
+
+    np = sys.modules.get('numpy')
+    if np is not None and isinstance(val, np.ndarray):
+        # one copy of the buffer instead of a Python object per element
+        return array.array(typecode, np.ascontiguousarray(val, dtype=typecode).ravel().tobytes())
+
+    return array.array(typecode, val)
+
+
+def _values_equal(a, b) -> bool:
+    if a is b:
+        return True
+
+    np = sys.modules.get('numpy')
+    if np is not None and (isinstance(a, np.ndarray) or isinstance(b, np.ndarray)):
+        # arrays are passed by reference, compare identity only instead of every element
+        return False
+
+    try:
+        return bool(a == b)
+    except (ValueError, TypeError):
+        # elementwise comparison of other array-likes
+        return False
+
+
+def _open_memmap(path: str, dtype=None, shape: Optional[tuple] = None, mode: str = 'r+'):
+    """
+    Memory map a file with ``np.memmap`` for the ``"memmap"`` opt of array arguments
+
+    Parameters
+    ----------
+    path : str
+        path to the file
+
+    dtype
+        dtype of the file, default is ``float64``
+
+    shape : Optional[tuple]
+        shape of the array
+
+    mode : str
+        mode for ``np.memmap``
+
+    Returns
+    -------
+    np.memmap
+    """
+    import numpy as np
+
+    if dtype is None:
+        dtype = np.float64
+    return np.memmap(path, dtype=dtype, mode=mode, shape=shape)
+
+
+class ArgSpec:
+    __slots__ = ('name', 'typ', 'kind', 'val', 'minmax', 'step', 'suffix', 'use_slider', 'tooltip', 'opts')
+
+    def __init__(
+            self,
+            name: str,
+            typ: type,
+            val: object = None,
+            kind: str = 'generic',
+            minmax: Optional[tuple] = None,
+            step: Union[int, float, None] = None,
+            suffix: Optional[str] = None,
+            use_slider: bool = False,
+            tooltip: Optional[str] = None,
+            **opts
+    ):
+        """
+        State of a single argument, does not use Qt.
+        ``Arg`` instances are views of an ``ArgSpec``, the GUI reads and writes its state here.
+
+        Parameters
+        ----------
+        name : str
+            argument name
+
+        typ : type
+            argument type
+
+        val : object
+            current value
+
+        kind : str
+            ``"numeric"``, ``"array"``, ``"sequence"``, ``"choice"``, ``"path"`` or ``"generic"``,
+            see ``qtap.signature``.
+            Values of sequence arguments are stored as ``array.array``.
+
+        minmax : Optional[tuple]
+            min & max values of numeric arguments, default is ``(-1, 999)``
+
+        step : Union[int, float, None]
+            step size of numeric arguments, default is ``1``
+
+        suffix : Optional[str]
+            text suffix of numeric arguments, like data units
+
+        use_slider : bool
+            show a slider for numeric arguments
+
+        tooltip : Optional[str]
+            toolTip
+
+        **opts
+            any other arg opts, such as the opts for array arguments.
+            The ``"memmap"`` file of array arguments is opened here and used instead of ``val``.
+        """
+        self.name = name
+        self.typ = typ
+        self.kind = kind
+
+        if kind == 'numeric':
+            if minmax is None:
+                minmax = default_minmax
+            if step is None:
+                step = default_step
+
+        self.minmax = None if minmax is None else tuple(minmax)
+        self.step = step
+        self.suffix = suffix
+        self.use_slider = use_slider
+        self.tooltip = tooltip
+        self.opts = opts
+
+        if kind == 'array' and opts.get('memmap') is not None:
+            # opened here so that headless parameter sets hold the same array as the widget
+            val = _open_memmap(opts['memmap'], opts.get('dtype'), opts.get('shape'), opts.get('mode', 'r+'))
+
+        self.val = self.coerce(val)
+
+    def validate(self, val: object):
+        """
+        Check that a value can be held by this argument, ``None`` is always allowed
+
+        Parameters
+        ----------
+        val : object
+            value to check
+
+        Raises
+        ------
+        TypeError
+            if the value has the wrong type
+        """
+        if val is None:
+            return
+
+        if self.kind == 'numeric':
+            expected = (int, float)
+        elif self.kind == 'array':
+            # an argument can only be an array if numpy has been imported
+            expected = sys.modules['numpy'].ndarray
+        elif self.kind == 'sequence':
+            np = sys.modules.get('numpy')
+            expected = (array.array, list, tuple) + (() if np is None else (np.ndarray,))
+        elif self.kind == 'choice':
+            values = literal_values(self.typ)
+
+            if values is not None:
+                if val not in values:
+                    raise TypeError(f"Argument `{self.name}` must be one of {values}, not {val!r}")
+                return
+
+            if not is_enum(self.typ):
+                # choices from the "choices" arg opt are only known once they are loaded
+                return
+
+            # members or their names
+            expected = (self.typ, str)
+        elif self.kind == 'path':
+            expected = (os.PathLike, str)
+        elif self.typ in (int, float, str, bool):
+            expected = self.typ
+        else:
+            return
+
+        if not isinstance(val, expected):
+            raise TypeError(
+                f"Argument `{self.name}` of type {getattr(self.typ, '__name__', self.typ)} "
+                f"cannot be set to a value of type {type(val).__name__}: {val!r}"
+            )
+
+    def coerce(self, val: object) -> object:
+        """
+        Value as the widget would hold it, numeric values are clipped to ``minmax``,
+        sequences are converted to ``array.array``, ``Enum`` member names to members,
+        paths to the annotation type such as ``pathlib.Path``
+
+        Parameters
+        ----------
+        val : object
+            value to coerce
+
+        Returns
+        -------
+        object
+            coerced value
+        """
+        if self.kind == 'numeric' and val is not None and self.minmax is not None:
+            return min(max(val, self.minmax[0]), self.minmax[1])
+
+        if self.kind == 'sequence' and val is not None:
+            try:
+                return to_sequence(val, sequence_typecodes[sequence_item_type(self.typ)])
+            except (TypeError, ValueError) as e:
+                raise TypeError(f"Argument `{self.name}` cannot be set to {type(val).__name__}: {e}")
+
+        if self.kind == 'choice' and isinstance(val, str) and is_enum(self.typ):
+            try:
+                return self.typ[val]
+            except KeyError:
+                raise TypeError(f"Argument `{self.name}` must be a member of {self.typ.__name__}, not {val!r}")
+
+        if self.kind == 'path' and val is not None and not isinstance(val, self.typ):
+            return self.typ(val)
+
+        return val
+
+    def __repr__(self):
+        return f"ArgSpec(name={self.name!r}, typ={self.typ}, val={self.val!r}, kind={self.kind!r})"
+
+
+def specs_from_signature(signature: CompiledSignature) -> List[ArgSpec]:
+    """
+    Create new ``ArgSpec`` instances from a compiled signature
+
+    Parameters
+    ----------
+    signature : CompiledSignature
+        from ``compile_signature()``
+
+    Returns
+    -------
+    List[ArgSpec]
+        one for each argument that is not ignored, with the default values
+    """
+    return [ArgSpec(kind=spec.kind, **spec.kwargs) for spec in signature.specs]
+
+
+class ParameterSet:
+    def __init__(self, specs: Iterable[ArgSpec], func: Optional[callable] = None):
+        """
+        Argument values of a function with change callbacks, does not use Qt.
+        ``Function`` is a view of a ``ParameterSet``, it can also be used on its own
+        to drive headless runs with the same ``arg_opts``.
+
+        .. code-block:: python
+
+            params = ParameterSet.from_function(f, arg_opts)
+            params.add_callback(lambda name, old, new: print(name, old, new))
+            params.set('a', 10)
+            result = params.call()
+
+        Parameters
+        ----------
+        specs : Iterable[ArgSpec]
+            argument specs, in the order of the function signature
+
+        func : Optional[callable]
+            function, used by ``call()``
+
+        Attributes
+        ----------
+        values : Dict[str, object]
+            current values keyed by argument name, updated in place, do not modify it
+        """
+        self.func = func
+
+        self._specs: Dict[str, ArgSpec] = dict()
+        self.values: Dict[str, object] = dict()
+
+        self._callbacks: List[callable] = list()
+
+        self.reset(specs)
+
+    @classmethod
+    def from_function(cls, func: callable, arg_opts: Optional[dict] = None) -> 'ParameterSet':
+        """
+        Create a ``ParameterSet`` for a function with type annotations
+
+        Parameters
+        ----------
+        func : callable
+            A function with type annotations
+
+        arg_opts : Optional[dict]
+            arg_opts as passed to ``Function``
+
+        Returns
+        -------
+        ParameterSet
+            with the default values of the function
+        """
+        return cls(specs_from_signature(compile_signature(func, arg_opts)), func)
+
+    def reset(self, specs: Iterable[ArgSpec]):
+        """
+        Replace all the argument specs, ``values`` is updated in place. Callbacks are kept but not called.
+
+        Parameters
+        ----------
+        specs : Iterable[ArgSpec]
+            new argument specs
+        """
+        self._specs.clear()
+        self.values.clear()
+
+        for spec in specs:
+            self._specs[spec.name] = spec
+            self.values[spec.name] = spec.val
+
+    def add_callback(self, callback: callable):
+        """
+        Add a callback that is called when an argument value changes
+
+        Parameters
+        ----------
+        callback : callable
+            called as ``callback(name: str, old, new)``
+        """
+        self._callbacks.append(callback)
+
+    def remove_callback(self, callback: callable):
+        """Remove a callback"""
+        self._callbacks.remove(callback)
+
+    def set(self, name: str, val: object) -> bool:
+        """
+        Set the value of an argument, callbacks are called if the value changed
+
+        Parameters
+        ----------
+        name : str
+            argument name
+
+        val : object
+            new value, validated and coerced by the ``ArgSpec``
+
+        Returns
+        -------
+        bool
+            ``True`` if the value changed
+
+        Raises
+        ------
+        TypeError
+            if the value has the wrong type
+        """
+        spec = self._specs[name]
+        spec.validate(val)
+        val = spec.coerce(val)
+
+        # the spec can already hold the value if a view wrote it
+        spec.val = val
+
+        old = self.values[name]
+        if _values_equal(old, val):
+            return False
+
+        self.values[name] = val
+
+        for callback in self._callbacks:
+            callback(name, old, val)
+
+        return True
+
+    def modified(self, name: str):
+        """
+        Call the callbacks for a value that was modified in place, such as an array edited by its table.
+        ``set()`` cannot see these changes since the value is the same object, old and new are both that object.
+
+        Parameters
+        ----------
+        name : str
+            argument name
+
+        Raises
+        ------
+        KeyError
+            if the argument does not exist
+        """
+        val = self.values[name]
+
+        for callback in self._callbacks:
+            callback(name, val, val)
+
+    def validate(self, d: Dict[str, object]):
+        """
+        Check a dict of values without setting them
+
+        Parameters
+        ----------
+        d : Dict[str, object]
+            values keyed by argument name
+
+        Raises
+        ------
+        KeyError
+            if an argument does not exist
+
+        TypeError
+            if a value has the wrong type
+        """
+        for name, val in d.items():
+            self._specs[name].validate(val)
+
+    def update(self, d: Dict[str, object]):
+        """
+        Set several values, all values are validated before any are set
+
+        Parameters
+        ----------
+        d : Dict[str, object]
+            values keyed by argument name
+        """
+        self.validate(d)
+
+        for name, val in d.items():
+            self.set(name, val)
+
+    def get(self, name: str) -> object:
+        """current value of an argument"""
+        return self._specs[name].val
+
+    def to_dict(self) -> Dict[str, object]:
+        """
+        Returns
+        -------
+        Dict[str, object]
+            new dict of the current values, usable as kwargs for the function
+        """
+        return {name: spec.val for name, spec in self._specs.items()}
+
+    def call(self, **kwargs) -> object:
+        """
+        Call ``func`` with the current values
+
+        Parameters
+        ----------
+        **kwargs
+            values to use instead of the current values, for this call only
+
+        Returns
+        -------
+        object
+            return value of ``func``
+        """
+        d = self.to_dict()
+        d.update(kwargs)
+        return self.func(**d)
+
+    @property
+    def names(self) -> List[str]:
+        """argument names"""
+        return list(self._specs.keys())
+
+    def __getitem__(self, name: str) -> ArgSpec:
+        return self._specs[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._specs
+
+    def __iter__(self) -> Iterator[ArgSpec]:
+        return iter(self._specs.values())
+
+    def __len__(self) -> int:
+        return len(self._specs)
+
+    def __repr__(self):
+        return '\n'.join(f'{name}: {spec.val!r}' for name, spec in self._specs.items())
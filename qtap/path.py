@@ -0,0 +1,469 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@author: kushal
+
+GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007
+"""
+
+from PyQt5 import QtCore, QtGui, QtWidgets
+from typing import List, Optional
+from collections import namedtuple, OrderedDict
+import os
+import stat
+import mmap
+from .argument import Arg
+from .model import ArgSpec
+
+
+# size is 0 if it is not a regular file, preview is the text of the head of the file or a hex dump if it is binary,
+# error is the message of an OSError raised while checking the path, other than it not existing
+PathInfo = namedtuple('PathInfo', ['path', 'exists', 'is_file', 'is_dir', 'size', 'mtime_ns', 'preview', 'error'])
+
+# bytes of binary files shown in the preview
+_hex_bytes = 256
+
+
+def _preview(head: bytes, size: int) -> str:
+    if b'\x00' in head:
+        text = ' '.join(f'{b:02x}' for b in head[:_hex_bytes])
+        truncated = size > _hex_bytes
+    else:
+        text = head.decode('utf-8', errors='replace')
+        truncated = size > len(head)
+
+    return text + ' …' if truncated else text
+
+
+def stat_path(path: str, preview_size: int = 4096, previous: Optional[PathInfo] = None) -> PathInfo:
+    """
+    Check a path. For regular files the first ``preview_size`` bytes are read through ``mmap``,
+    only the pages of the head are mapped so the cost does not depend on the size of the file.
+    Does not use Qt, called from a worker thread by ``ArgPath``.
+
+    Parameters
+    ----------
+    path : str
+        path to check
+
+    preview_size : int
+        maximum number of bytes of the preview, 0 for no preview
+
+    previous : Optional[PathInfo]
+        earlier result for the same path, its preview is reused if the size & modification time are unchanged
+
+    Returns
+    -------
+    PathInfo
+    """
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return PathInfo(path, False, False, False, 0, 0, '', None)
+    except (OSError, ValueError) as e:
+        # such as permission errors or embedded null bytes
+        return PathInfo(path, False, False, False, 0, 0, '', str(e))
+
+    is_file = stat.S_ISREG(st.st_mode)
+    is_dir = stat.S_ISDIR(st.st_mode)
+    size = st.st_size if is_file else 0
+
+    if previous is not None and previous.exists and previous.error is None and \
+            (previous.is_file, previous.size, previous.mtime_ns) == (is_file, size, st.st_mtime_ns):
+        return previous._replace(path=path)
+
+    preview = ''
+    error = None
+
+    n = min(size, preview_size)
+    if is_file and n > 0:
+        try:
+            with open(path, 'rb') as f:
+                # only maps the head, an empty length would map the whole file
+                with mmap.mmap(f.fileno(), length=n, access=mmap.ACCESS_READ) as mm:
+                    preview = _preview(mm[:n], size)
+        except (OSError, ValueError) as e:
+            error = str(e)
+
+    return PathInfo(path, True, is_file, is_dir, size, st.st_mtime_ns, preview, error)
+
+
+def format_size(size: int) -> str:
+    """Human readable size, such as ``"1.5 MB"``"""
+    for unit in ('B', 'kB', 'MB', 'GB', 'TB'):
+        if size < 1000 or unit == 'TB':
+            break
+        size /= 1000
+
+    return f'{size} {unit}' if unit == 'B' else f'{size:.1f} {unit}'
+
+
+# results shared by every ArgPath, only used from the GUI thread
+_cache: 'OrderedDict[str, PathInfo]' = OrderedDict()
+_cache_size = 256
+
+
+def get_cached(path: str) -> Optional[PathInfo]:
+    """
+    Latest result for a path, it may be out of date
+
+    Parameters
+    ----------
+    path : str
+        path that was checked
+
+    Returns
+    -------
+    Optional[PathInfo]
+        ``None`` if the path has not been checked
+    """
+    info = _cache.get(path)
+    if info is not None:
+        _cache.move_to_end(path)
+    return info
+
+
+def _put_cached(info: PathInfo):
+    _cache[info.path] = info
+    _cache.move_to_end(info.path)
+
+    while len(_cache) > _cache_size:
+        _cache.popitem(last=False)
+
+
+def clear_cache():
+    """Drop the cached results"""
+    _cache.clear()
+
+
+_pool: Optional[QtCore.QThreadPool] = None
+
+
+def _get_pool() -> QtCore.QThreadPool:
+    # separate from the global pool, so that checks are not queued behind function runs,
+    # and a slow network drive does not hold up the executor
+    global _pool
+    if _pool is None:
+        _pool = QtCore.QThreadPool()
+        _pool.setMaxThreadCount(2)
+    return _pool
+
+
+class _StatSignals(QtCore.QObject):
+    # request id, PathInfo
+    sig_finished = QtCore.pyqtSignal(int, object)
+
+
+class _StatRunnable(QtCore.QRunnable):
+    def __init__(
+            self,
+            path: str,
+            preview_size: int,
+            previous: Optional[PathInfo],
+            request_id: int,
+            signals: _StatSignals
+    ):
+        super(_StatRunnable, self).__init__()
+
+        self.path = path
+        self.preview_size = preview_size
+        self.previous = previous
+        self.request_id = request_id
+        self.signals = signals
+
+    def run(self):
+        info = stat_path(self.path, self.preview_size, self.previous)
+
+        try:
+            self.signals.sig_finished.emit(self.request_id, info)
+        except RuntimeError:
+            # the argument was deleted while the path was checked
+            pass
+
+
+class ArgPath(Arg):
+    acceptable_types = (os.PathLike, str)
+    kind = 'path'
+    stretch = True
+
+    # emits the PathInfo when a check finishes
+    sig_validated = QtCore.pyqtSignal(object)
+
+    def __init__(
+            self,
+            name: str,
+            typ: type,
+            val,
+            parent: QtWidgets.QWidget,
+            vlayout: QtWidgets.QVBoxLayout,
+            must_exist: bool = False,
+            path_type: Optional[str] = None,
+            max_size: Optional[int] = None,
+            preview_size: int = 4096,
+            debounce: int = 250,
+            **kwargs
+    ):
+        """
+        Creates a line edit with a browse button for an argument annotated as ``pathlib.Path``,
+        its value is an instance of the annotation type. The value changes when editing is finished
+        or a path is picked with "…".
+
+        While the path is edited it is checked on a background thread, ``debounce`` milliseconds after
+        the last keystroke. A status label shows the size or the problem, and a preview shows the head of
+        the file, read through ``mmap`` so that large files are not read. Results are cached for each path
+        and shown immediately when a path is entered again, the check still runs to update them.
+
+        Parameters
+        ----------
+        must_exist : bool
+            the path must exist
+
+        path_type : Optional[str]
+            ``"file"`` or ``"dir"``, the path must be of this type if it exists
+
+        max_size : Optional[int]
+            maximum size of files in bytes
+
+        preview_size : int
+            maximum number of bytes of the file shown in the preview, 0 hides the preview
+
+        debounce : int
+            milliseconds without edits before the path is checked
+
+        **kwargs
+            passed to Arg
+        """
+        self._signals = _StatSignals()
+        self._request_id = 0
+
+        self._info: Optional[PathInfo] = None
+        self._messages: List[str] = list()
+
+        self.timer = QtCore.QTimer()
+        self.timer.setSingleShot(True)
+
+        self.status = QtWidgets.QLabel(parent)
+
+        self.preview = QtWidgets.QPlainTextEdit(parent)
+        self.preview.setReadOnly(True)
+        self.preview.setLineWrapMode(QtWidgets.QPlainTextEdit.NoWrap)
+        self.preview.setFont(QtGui.QFontDatabase.systemFont(QtGui.QFontDatabase.FixedFont))
+        self.preview.setMaximumHeight(6 * self.preview.fontMetrics().lineSpacing())
+
+        self._set_opts(must_exist, path_type, max_size, preview_size, debounce)
+
+        super(ArgPath, self).__init__(name, typ, val, parent, vlayout, **kwargs)
+
+        self._signals.setParent(self)
+        self.timer.setParent(self)
+
+        self.button_browse = QtWidgets.QToolButton(self.parent)
+        self.button_browse.setText('…')
+        self.hlayout.addWidget(self.status)
+        self.hlayout.addWidget(self.button_browse)
+
+        self.vlayout.addWidget(self.preview)
+
+        self._signals.sig_finished.connect(self._on_checked)
+        self.timer.timeout.connect(self.check)
+        self.widget.textEdited.connect(self._text_edited)
+        self.widget.editingFinished.connect(self._editing_finished)
+        self.button_browse.clicked.connect(self._browse_clicked)
+
+    def _set_opts(self, must_exist, path_type, max_size, preview_size, debounce):
+        if path_type not in (None, 'file', 'dir'):
+            raise ValueError(f'`path_type` must be one of None, "file" or "dir", not {path_type!r}')
+
+        self.must_exist = must_exist
+        self.path_type = path_type
+        self.max_size = max_size
+        self.preview_size = preview_size
+
+        self.timer.setInterval(debounce)
+        self.preview.setVisible(preview_size > 0)
+
+    @classmethod
+    def get_widget_type(cls, typ: type) -> type:
+        return QtWidgets.QLineEdit
+
+    def _widgets(self) -> list:
+        return [self._qlabel, self.widget, self.status, self.button_browse, self.preview]
+
+    def _layout_items(self) -> list:
+        return [self.hlayout, self.preview]
+
+    def attach(self, parent: QtWidgets.QWidget, vlayout: QtWidgets.QVBoxLayout, index: int) -> int:
+        index = super(ArgPath, self).attach(parent, vlayout, index)
+        self.preview.setVisible(self.preview_size > 0)
+        return index
+
+    def configure(
+            self,
+            name: str,
+            val,
+            tooltip: Optional[str] = None,
+            spec: Optional[ArgSpec] = None,
+            must_exist: bool = False,
+            path_type: Optional[str] = None,
+            max_size: Optional[int] = None,
+            preview_size: int = 4096,
+            debounce: int = 250,
+            **kwargs
+    ):
+        self._set_opts(must_exist, path_type, max_size, preview_size, debounce)
+
+        super(ArgPath, self).configure(name, val, tooltip, spec)
+
+    @property
+    def val(self):
+        """current path, an instance of the annotation type"""
+        return self.spec.val
+
+    @val.setter
+    def val(self, v):
+        if v is not None and not isinstance(v, self.typ):
+            v = self.typ(v)
+
+        self.spec.val = v
+
+        text = '' if v is None else str(v)
+        if self.widget.text() != text:
+            self.widget.setText(text)
+
+        self._show_cached(text)
+        self.timer.start()
+
+    @property
+    def info(self) -> Optional[PathInfo]:
+        """result of the latest check of the text, ``None`` until it has been checked"""
+        return self._info
+
+    @property
+    def valid(self) -> Optional[bool]:
+        """``True`` if the path meets the requirements, ``None`` until it has been checked"""
+        if self._info is None:
+            return None
+        return not self._messages
+
+    @property
+    def messages(self) -> List[str]:
+        """requirements that the path does not meet"""
+        return list(self._messages)
+
+    def check(self):
+        """Check the current text now on a background thread, instead of after the debounce interval"""
+        self.timer.stop()
+
+        path = self.widget.text()
+        if not path:
+            self._show(None)
+            return
+
+        self._request_id += 1
+        _get_pool().start(
+            _StatRunnable(path, self.preview_size, _cache.get(path), self._request_id, self._signals)
+        )
+
+    def _on_checked(self, request_id: int, info: PathInfo):
+        _put_cached(info)
+
+        # results of older text are only cached
+        if request_id == self._request_id and info.path == self.widget.text():
+            self._show(info)
+            self.sig_validated.emit(info)
+
+    def _text_edited(self, text: str):
+        self._show_cached(text)
+        self.timer.start()
+
+    def _show_cached(self, text: str):
+        if not text:
+            self._show(None)
+            return
+
+        info = get_cached(text)
+        if info is not None:
+            self._show(info)
+        else:
+            self._info = None
+            self._messages = list()
+            self.status.setText('…')
+            self.status.setStyleSheet('')
+
+    def _get_messages(self, info: PathInfo) -> List[str]:
+        if info.error is not None:
+            return [info.error]
+
+        if not info.exists:
+            return ['does not exist'] if self.must_exist else []
+
+        messages = list()
+
+        if self.path_type == 'file' and not info.is_file:
+            messages.append('not a file')
+        elif self.path_type == 'dir' and not info.is_dir:
+            messages.append('not a directory')
+
+        if self.max_size is not None and info.size > self.max_size:
+            messages.append(f'larger than {format_size(self.max_size)}')
+
+        return messages
+
+    def _show(self, info: Optional[PathInfo]):
+        self._info = info
+
+        if info is None:
+            self._messages = list()
+            self.status.setText('')
+            self.status.setStyleSheet('')
+            self.preview.clear()
+            return
+
+        self._messages = self._get_messages(info)
+
+        if self._messages:
+            text = ', '.join(self._messages)
+        elif info.is_file:
+            text = format_size(info.size)
+        elif info.is_dir:
+            text = 'directory'
+        elif info.exists:
+            text = 'exists'
+        else:
+            text = 'new'
+
+        self.status.setText(text)
+        self.status.setStyleSheet('color: red' if self._messages else '')
+
+        if self.preview_size > 0:
+            self.preview.setPlainText(info.preview[:self.preview_size])
+
+    def _editing_finished(self):
+        text = self.widget.text()
+
+        if text == ('' if self.val is None else str(self.val)):
+            return
+
+        self.val = text if text else None
+        self.sig_changed.emit(self.val)
+
+    def _browse_clicked(self):
+        if self.path_type == 'dir':
+            path = QtWidgets.QFileDialog.getExistingDirectory(self.parent, self.name, self.widget.text())
+        elif self.must_exist:
+            path, _ = QtWidgets.QFileDialog.getOpenFileName(self.parent, self.name, self.widget.text())
+        else:
+            path, _ = QtWidgets.QFileDialog.getSaveFileName(
+                self.parent, self.name, self.widget.text(), options=QtWidgets.QFileDialog.DontConfirmOverwrite
+            )
+
+        if not path:
+            return
+
+        self.widget.setText(path)
+        self._editing_finished()
+        self.check()
+
+    def __repr__(self):
+        return f"{super(ArgPath, self).__repr__()}\n" \
+               f"status:\t{self.status.text()}"
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@author: kushal
+
+GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007
+"""
+
+from PyQt5 import QtCore
+from typing import Dict, Hashable, List, Optional, Sequence, Set
+from .executor import BaseExecutor
+
+
+def get_inputs(arg_opts: Dict[str, dict]) -> Dict[str, str]:
+    """
+    Arguments that take the output of an upstream function, declared with the ``"input"`` arg opt
+
+    Parameters
+    ----------
+    arg_opts : Dict[str, dict]
+        arg_opts of a function
+
+    Returns
+    -------
+    Dict[str, str]
+        upstream function name keyed by argument name
+    """
+    return {arg: opts['input'] for arg, opts in arg_opts.items() if opts.get('input') is not None}
+
+
+def _sort(upstream: Dict[str, Set[str]], names: Sequence[str]) -> List[str]:
+    # topological order, stages without dependencies between them keep the order of ``names``
+    order = list()
+    done = set()
+    remaining = list(names)
+
+    while remaining:
+        ready = [name for name in remaining if upstream[name] <= done]
+
+        if not ready:
+            raise ValueError(f"The inputs of these functions form a cycle: {remaining}")
+
+        order.extend(ready)
+        done.update(ready)
+        remaining = [name for name in remaining if name not in done]
+
+    return order
+
+
+class Pipeline(QtCore.QObject):
+    # emitted when every stage is up to date
+    sig_finished = QtCore.pyqtSignal()
+
+    def __init__(
+            self,
+            functions: Sequence,
+            executor: Optional[BaseExecutor] = None,
+            parent: Optional[QtCore.QObject] = None,
+    ):
+        """
+        Runs chained functions as a DAG, usually created through the ``pipeline`` argument of ``Functions``.
+
+        A function argument takes the output of an upstream function with the ``"input"`` arg opt,
+        such arguments do not get a widget:
+
+        .. code-block:: python
+
+            def load(path: str = 'a.tiff'):
+                ...
+
+            def smooth(img: object = None, sigma: float = 1.0):
+                ...
+
+            functions = Functions(
+                [load, smooth],
+                arg_opts=[None, {'img': {'input': 'load'}}],
+                pipeline=True,
+                run_on='changed',
+            )
+
+        The result of each stage is cached. Changing the arguments of a function marks that stage and its
+        downstream stages as stale, ``run()`` only recomputes the stale stages, in topological order.
+        Stages are marked through ``sig_delta``, which is also emitted for arrays that are edited in place
+        in their table. Call ``Function.data_modified()`` after writing into an argument value from other code.
+        Each result is emitted through the ``sig_result`` of its ``Function``, exceptions through
+        ``sig_error``, stages downstream of an error are not run.
+
+        With an executor, every stage whose inputs are ready is submitted at once so that independent branches
+        run in parallel. Without an executor the stages run in the GUI thread and ``run()`` blocks.
+
+        Parameters
+        ----------
+        functions : Sequence[Function]
+            ``Function`` instances, such as ``Functions.functions``
+
+        executor : Optional[BaseExecutor]
+            executor for the stages, ``None`` runs the stages in the GUI thread
+
+        parent : Optional[QtCore.QObject]
+            parent QObject
+
+        Attributes
+        ----------
+        results : Dict[str, object]
+            cached result of each stage that is up to date, keyed by function name
+        """
+        super(Pipeline, self).__init__(parent)
+
+        self.functions = list(functions)
+        self.executor = executor
+
+        self.results: Dict[str, object] = dict()
+
+        # incremented when a stage becomes stale, results of older versions are dropped
+        self._versions: Dict[str, int] = dict()
+
+        # stages that need to be recomputed
+        self._stale: Set[str] = set()
+
+        # version of each stage that is running
+        self._pending: Dict[str, int] = dict()
+
+        # stages that raised, cleared when they become stale again
+        self._failed: Set[str] = set()
+
+        self._in_run = False
+
+        self._build()
+
+        for f in self.functions:
+            f.sig_delta.connect(self._on_delta)
+            f.sig_rebound.connect(self._rebuild)
+
+        if self.executor is not None:
+            self.executor.sig_result.connect(self._on_result)
+            self.executor.sig_error.connect(self._on_error)
+
+    def _build(self):
+        self._by_name = {f.name: f for f in self.functions}
+        self._by_callable = {f.callable: f.name for f in self.functions}
+
+        # argument name: upstream name, for each stage
+        self._inputs: Dict[str, Dict[str, str]] = dict()
+        self._upstream: Dict[str, Set[str]] = dict()
+        self._downstream: Dict[str, Set[str]] = {name: set() for name in self._by_name.keys()}
+
+        for name, f in self._by_name.items():
+            inputs = get_inputs(f.arg_opts)
+
+            for arg, upstream in inputs.items():
+                if upstream not in self._by_name:
+                    raise KeyError(f"Argument `{arg}` of `{name}` takes the output of `{upstream}`, which does not exist")
+
+            self._inputs[name] = inputs
+            self._upstream[name] = set(inputs.values())
+
+            for upstream in self._upstream[name]:
+                self._downstream[upstream].add(name)
+
+        self.order: List[str] = _sort(self._upstream, list(self._by_name.keys()))
+
+        for name in self.order:
+            self._versions.setdefault(name, 0)
+
+        self._stale.update(self.order)
+
+    def _rebuild(self, *args):
+        self._build()
+
+        # names can change with rebind()
+        self.results = {name: r for name, r in self.results.items() if name in self._by_name}
+        self.invalidate()
+
+    def _descendants(self, name: str) -> List[str]:
+        found = list()
+        stack = [name]
+
+        while stack:
+            for downstream in self._downstream[stack.pop()]:
+                if downstream not in found:
+                    found.append(downstream)
+                    stack.append(downstream)
+
+        return found
+
+    def invalidate(self, name: Optional[str] = None):
+        """
+        Mark a stage and its downstream stages as stale, all stages by default
+
+        Parameters
+        ----------
+        name : Optional[str]
+            function name
+        """
+        names = self.order if name is None else [name] + self._descendants(name)
+
+        for n in names:
+            self._stale.add(n)
+            self._failed.discard(n)
+            self._versions[n] += 1
+            self.results.pop(n, None)
+
+    def _on_delta(self, func: callable, *args):
+        # also emitted for values modified in place, old and new are then the same object
+        self.invalidate(self._by_callable[func])
+
+    @property
+    def stale(self) -> List[str]:
+        """names of the stages that need to be recomputed, in topological order"""
+        return [name for name in self.order if name in self._stale]
+
+    @property
+    def running(self) -> bool:
+        """``True`` while stages are running"""
+        return bool(self._pending)
+
+    def run(self, *args):
+        """
+        Recompute the stale stages whose inputs are ready, downstream stages are started as their inputs finish
+        """
+        if self._in_run:
+            return
+
+        self._in_run = True
+        try:
+            # in topological order, so without an executor a stage is computed before its downstream stages
+            for name in self.order:
+                if self._ready(name):
+                    self._start(name)
+        finally:
+            self._in_run = False
+
+        if not self._stale and not self._pending:
+            self.sig_finished.emit()
+
+    def _ready(self, name: str) -> bool:
+        if name not in self._stale or name in self._failed or not self._by_name[name].valid:
+            return False
+
+        if self._pending.get(name) == self._versions[name]:
+            # already running with the current arguments
+            return False
+
+        return not any(upstream in self._stale for upstream in self._upstream[name])
+
+    def _start(self, name: str):
+        f = self._by_name[name]
+
+        kwargs = f.get_data()
+        for arg, upstream in self._inputs[name].items():
+            kwargs[arg] = self.results[upstream]
+
+        version = self._versions[name]
+
+        if self.executor is None:
+            try:
+                result = f.callable(**kwargs)
+            except Exception as e:
+                self._finished(name, version, False, e)
+            else:
+                self._finished(name, version, True, result)
+            return
+
+        # a stale request of this stage that is still running is superseded, the executor only emits the latest
+        self._pending[name] = version
+        self.executor.submit(f.callable, kwargs, key=(self, name))
+
+    def _on_result(self, key: Hashable, result: object):
+        if isinstance(key, tuple) and len(key) == 2 and key[0] is self:
+            self._finished(key[1], self._pending.get(key[1]), True, result)
+
+    def _on_error(self, key: Hashable, e: Exception):
+        if isinstance(key, tuple) and len(key) == 2 and key[0] is self:
+            self._finished(key[1], self._pending.get(key[1]), False, e)
+
+    def _finished(self, name: str, version: Optional[int], ok: bool, result: object):
+        self._pending.pop(name, None)
+
+        f = self._by_name.get(name)
+
+        if f is None or version != self._versions[name]:
+            # the arguments changed while it was running
+            self.run()
+            return
+
+        if ok:
+            self.results[name] = result
+            self._stale.discard(name)
+            f.sig_result.emit(result)
+        else:
+            self._failed.add(name)
+            f.sig_error.emit(result)
+
+        # start the downstream stages
+        self.run()
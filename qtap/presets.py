@@ -0,0 +1,509 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@author: kushal
+
+GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007
+"""
+
+import json
+import enum
+import time
+import base64
+import pickle
+import sqlite3
+import hashlib
+from typing import Dict, Iterable, List, Optional, Sequence
+from collections import namedtuple
+from .cache import _callable_name
+from .encoding import encode_value, decode_value
+from .signature import compile_signature
+
+
+# summary of a stored preset, without the data
+PresetInfo = namedtuple('PresetInfo', ['id', 'function', 'name', 'tags', 'created', 'modified'])
+
+
+_schema = """
+CREATE TABLE IF NOT EXISTS presets (
+    id INTEGER PRIMARY KEY,
+    function TEXT NOT NULL,
+    signature TEXT NOT NULL,
+    name TEXT NOT NULL,
+    data BLOB NOT NULL,
+    created REAL NOT NULL,
+    modified REAL NOT NULL,
+    UNIQUE (function, signature, name)
+);
+CREATE INDEX IF NOT EXISTS presets_name ON presets (name);
+CREATE INDEX IF NOT EXISTS presets_modified ON presets (function, modified);
+CREATE TABLE IF NOT EXISTS tags (
+    tag TEXT NOT NULL,
+    preset_id INTEGER NOT NULL REFERENCES presets (id) ON DELETE CASCADE,
+    PRIMARY KEY (tag, preset_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS tags_preset ON tags (preset_id);
+"""
+
+
+# value types of qtap.encoding that are stored as text in the JSON, the others as base64
+_text_types = (b'u', b'r', b'P')
+
+
+def _dumps(data: dict) -> str:
+    # JSON of [value type, value] keyed by argument name, Enum members are stored by name
+    # and the argument converts the name back to the member
+    d = dict()
+    for arg, val in data.items():
+        if isinstance(val, enum.Enum):
+            val = val.name
+
+        typ, b = encode_value(val)
+        d[arg] = [typ.decode(), b.decode() if typ in _text_types else base64.b64encode(b).decode()]
+
+    return json.dumps(d)
+
+
+def _loads(data, allow_pickle: bool) -> dict:
+    if isinstance(data, bytes):
+        # a pickled dict, as presets were stored by earlier versions
+        if not allow_pickle:
+            raise ValueError(
+                "The preset was stored with pickle, which can run arbitrary code when it is loaded. "
+                "Pass allow_pickle=True only if the presets come from a trusted source."
+            )
+        return pickle.loads(data)
+
+    d = dict()
+    for arg, (typ, text) in json.loads(data).items():
+        typ = typ.encode()
+        d[arg] = decode_value(typ, text.encode() if typ in _text_types else base64.b64decode(text), allow_pickle)
+
+    return d
+
+
+def _type_name(typ) -> str:
+    module = getattr(typ, '__module__', None)
+    qualname = getattr(typ, '__qualname__', None)
+    if qualname is None:
+        return repr(typ)
+    return f'{module}.{qualname}'
+
+
+def signature_hash(func: callable, arg_opts: Optional[dict] = None) -> str:
+    """
+    Hash of the argument names, types and kinds of a function.
+    Presets are stored with this hash so that they are not applied to a different signature.
+
+    Parameters
+    ----------
+    func : callable
+        A function with type annotations
+
+    arg_opts : Optional[dict]
+        arg_opts as passed to ``Function``, ignored arguments and ``typ`` overrides change the hash
+
+    Returns
+    -------
+    str
+        hex digest
+    """
+    specs = compile_signature(func, arg_opts).specs
+    items = [(spec.name, _type_name(spec.kwargs['typ']), spec.kind) for spec in specs]
+    return hashlib.sha1(repr(items).encode()).hexdigest()
+
+
+class PresetStore:
+    def __init__(self, path: str = ':memory:', allow_pickle: bool = False):
+        """
+        Named presets of argument values for many functions, stored in a single SQLite file.
+        Presets are keyed by the module & qualname of the function, a hash of its signature, and the preset name.
+        Lookup by name, tags and modification time is indexed.
+
+        Values are stored as JSON with the encoding of ``qtap.encoding``, the same as the ``Recorder`` log.
+        Values that have no other encoding are pickled, and are only loaded with ``allow_pickle=True``.
+
+        .. code-block:: python
+
+            store = PresetStore('presets.db')
+
+            # save() & load() take the function, save_from() & apply() take a Function or Functions
+            store.save(func, 'fast', {'sigma': 0.5}, tags=['draft'])
+
+            f = Function(func)
+            store.save_from(f, 'current')
+            store.apply(f, 'fast')
+
+            store.find(func, tags=['draft'])
+
+        Parameters
+        ----------
+        path : str
+            path to the SQLite file, created if it does not exist. The default keeps the presets in memory.
+
+        allow_pickle : bool
+            load values that were pickled when they were saved. Only allow it for presets from a trusted source.
+        """
+        self.path = path
+        self.allow_pickle = allow_pickle
+
+        self._conn = sqlite3.connect(path)
+        self._conn.execute('PRAGMA foreign_keys = ON')
+
+        if path != ':memory:':
+            # readers are not blocked by a writer
+            self._conn.execute('PRAGMA journal_mode = WAL')
+            self._conn.execute('PRAGMA synchronous = NORMAL')
+
+        self._conn.executescript(_schema)
+
+    @staticmethod
+    def _key(func: callable, arg_opts: Optional[dict]) -> tuple:
+        return _callable_name(func), signature_hash(func, arg_opts)
+
+    def save(
+            self,
+            func: callable,
+            name: str,
+            data: dict,
+            tags: Iterable[str] = (),
+            arg_opts: Optional[dict] = None,
+    ) -> int:
+        """
+        Save a preset, replaces the data & tags of an existing preset with the same name
+
+        Parameters
+        ----------
+        func : callable
+            function the preset is for
+
+        name : str
+            preset name
+
+        data : dict
+            argument values, such as from ``Function.get_data()``
+
+        tags : Iterable[str]
+            tags for searching with ``find()``
+
+        arg_opts : Optional[dict]
+            arg_opts of the function, only used for the signature hash
+
+        Returns
+        -------
+        int
+            preset id
+        """
+        return self.save_many(func, {name: data}, tags, arg_opts)[0]
+
+    def save_many(
+            self,
+            func: callable,
+            presets: Dict[str, dict],
+            tags: Iterable[str] = (),
+            arg_opts: Optional[dict] = None,
+    ) -> List[int]:
+        """
+        Save several presets for a function in one transaction, such as when importing JSON files
+
+        Parameters
+        ----------
+        func : callable
+            function the presets are for
+
+        presets : Dict[str, dict]
+            argument values keyed by preset name
+
+        tags : Iterable[str]
+            tags for all the presets
+
+        arg_opts : Optional[dict]
+            arg_opts of the function, only used for the signature hash
+
+        Returns
+        -------
+        List[int]
+            preset ids, in the order of ``presets``
+        """
+        function, signature = self._key(func, arg_opts)
+        tags = list(dict.fromkeys(tags))
+        now = time.time()
+
+        ids = list()
+        with self._conn:
+            for name, data in presets.items():
+                blob = _dumps(data)
+
+                self._conn.execute(
+                    'INSERT INTO presets (function, signature, name, data, created, modified) '
+                    'VALUES (?, ?, ?, ?, ?, ?) '
+                    'ON CONFLICT (function, signature, name) DO UPDATE SET data = excluded.data, modified = excluded.modified',
+                    (function, signature, name, blob, now, now)
+                )
+
+                preset_id = self._conn.execute(
+                    'SELECT id FROM presets WHERE function = ? AND signature = ? AND name = ?',
+                    (function, signature, name)
+                ).fetchone()[0]
+
+                self._conn.execute('DELETE FROM tags WHERE preset_id = ?', (preset_id,))
+                self._conn.executemany(
+                    'INSERT INTO tags (tag, preset_id) VALUES (?, ?)', [(tag, preset_id) for tag in tags]
+                )
+
+                ids.append(preset_id)
+
+        return ids
+
+    def load(self, func: callable, name: str, arg_opts: Optional[dict] = None, strict: bool = True) -> dict:
+        """
+        Load the data of a preset
+
+        Parameters
+        ----------
+        func : callable
+            function the preset is for
+
+        name : str
+            preset name
+
+        arg_opts : Optional[dict]
+            arg_opts of the function, only used for the signature hash
+
+        strict : bool
+            if ``False`` and there is no preset for the current signature, the latest preset with this name
+            for any signature of the function is used, arguments that no longer exist are dropped
+
+        Returns
+        -------
+        dict
+            argument values
+
+        Raises
+        ------
+        KeyError
+            if there is no preset with this name
+
+        ValueError
+            if the preset contains a pickled value and ``allow_pickle`` is ``False``
+        """
+        function, signature = self._key(func, arg_opts)
+
+        row = self._conn.execute(
+            'SELECT data FROM presets WHERE function = ? AND signature = ? AND name = ?',
+            (function, signature, name)
+        ).fetchone()
+
+        if row is not None:
+            return _loads(row[0], self.allow_pickle)
+
+        if not strict:
+            row = self._conn.execute(
+                'SELECT data FROM presets WHERE function = ? AND name = ? ORDER BY modified DESC LIMIT 1',
+                (function, name)
+            ).fetchone()
+
+            if row is not None:
+                names = {spec.name for spec in compile_signature(func, arg_opts).specs}
+                return {k: v for k, v in _loads(row[0], self.allow_pickle).items() if k in names}
+
+        raise KeyError(f"No preset named '{name}' for `{function}` with its current signature")
+
+    def delete(self, func: callable, name: str, arg_opts: Optional[dict] = None) -> bool:
+        """
+        Delete a preset
+
+        Returns
+        -------
+        bool
+            ``True`` if a preset was deleted
+        """
+        function, signature = self._key(func, arg_opts)
+
+        with self._conn:
+            cursor = self._conn.execute(
+                'DELETE FROM presets WHERE function = ? AND signature = ? AND name = ?',
+                (function, signature, name)
+            )
+
+        return cursor.rowcount > 0
+
+    def find(
+            self,
+            func: Optional[callable] = None,
+            name: Optional[str] = None,
+            tags: Sequence[str] = (),
+            since: Optional[float] = None,
+            until: Optional[float] = None,
+            arg_opts: Optional[dict] = None,
+            limit: Optional[int] = None,
+    ) -> List[PresetInfo]:
+        """
+        Search presets, newest first. The data is not loaded.
+
+        Parameters
+        ----------
+        func : Optional[callable]
+            only presets for this function with its current signature, any function by default
+
+        name : Optional[str]
+            preset name, ``*`` and ``?`` can be used as wildcards
+
+        tags : Sequence[str]
+            only presets that have all of these tags
+
+        since : Optional[float]
+            only presets modified at or after this unix time
+
+        until : Optional[float]
+            only presets modified before this unix time
+
+        arg_opts : Optional[dict]
+            arg_opts of the function, only used for the signature hash
+
+        limit : Optional[int]
+            maximum number of results
+
+        Returns
+        -------
+        List[PresetInfo]
+            namedtuples with fields ``id``, ``function``, ``name``, ``tags``, ``created``, ``modified``
+        """
+        where = list()
+        params = list()
+
+        if func is not None:
+            where.append('p.function = ? AND p.signature = ?')
+            params.extend(self._key(func, arg_opts))
+
+        if name is not None:
+            if '*' in name or '?' in name:
+                where.append('p.name GLOB ?')
+            else:
+                where.append('p.name = ?')
+            params.append(name)
+
+        for tag in tags:
+            where.append('p.id IN (SELECT preset_id FROM tags WHERE tag = ?)')
+            params.append(tag)
+
+        if since is not None:
+            where.append('p.modified >= ?')
+            params.append(since)
+
+        if until is not None:
+            where.append('p.modified < ?')
+            params.append(until)
+
+        query = 'SELECT p.id, p.function, p.name, p.created, p.modified FROM presets p'
+        if where:
+            query += ' WHERE ' + ' AND '.join(where)
+        query += ' ORDER BY p.modified DESC'
+
+        if limit is not None:
+            query += ' LIMIT ?'
+            params.append(limit)
+
+        rows = self._conn.execute(query, params).fetchall()
+
+        # tags for all the results in one query
+        preset_tags = dict()
+        ids = [row[0] for row in rows]
+        for i in range(0, len(ids), 900):
+            chunk = ids[i:i + 900]
+            for tag, preset_id in self._conn.execute(
+                    f'SELECT tag, preset_id FROM tags WHERE preset_id IN ({",".join("?" * len(chunk))})', chunk
+            ):
+                preset_tags.setdefault(preset_id, list()).append(tag)
+
+        return [
+            PresetInfo(row[0], row[1], row[2], tuple(sorted(preset_tags.get(row[0], ()))), row[3], row[4])
+            for row in rows
+        ]
+
+    def names(self, func: callable, arg_opts: Optional[dict] = None) -> List[str]:
+        """names of the presets for a function with its current signature, sorted"""
+        return [
+            row[0] for row in self._conn.execute(
+                'SELECT name FROM presets WHERE function = ? AND signature = ? ORDER BY name',
+                self._key(func, arg_opts)
+            )
+        ]
+
+    def apply(self, target, name: str, strict: bool = True):
+        """
+        Apply a preset to a ``Function``, or to every function of a ``Functions`` that has a preset with this name
+
+        Parameters
+        ----------
+        target : Union[Function, Functions]
+            ``Function`` or ``Functions`` instance
+
+        name : str
+            preset name
+
+        strict : bool
+            see ``load()``
+
+        Raises
+        ------
+        KeyError
+            if a ``Function`` or none of the functions of a ``Functions`` have a preset with this name
+        """
+        functions = getattr(target, 'functions', None)
+
+        if functions is None:
+            target.set_data(self.load(target.callable, name, target.arg_opts, strict))
+            return
+
+        data = dict()
+        for f in functions:
+            try:
+                data[f.callable] = self.load(f.callable, name, f.arg_opts, strict)
+            except KeyError:
+                continue
+
+        if not data:
+            raise KeyError(f"No preset named '{name}' for any of the functions")
+
+        target.set_data(data)
+
+    def save_from(self, target, name: str, tags: Iterable[str] = ()) -> List[int]:
+        """
+        Save the current values of a ``Function``, or of every function of a ``Functions``, as a preset
+
+        Parameters
+        ----------
+        target : Union[Function, Functions]
+            ``Function`` or ``Functions`` instance
+
+        name : str
+            preset name
+
+        tags : Iterable[str]
+            tags for searching with ``find()``
+
+        Returns
+        -------
+        List[int]
+            preset ids
+        """
+        functions = getattr(target, 'functions', None)
+        if functions is None:
+            functions = [target]
+
+        tags = list(tags)
+        return [self.save(f.callable, name, f.get_data(), tags, f.arg_opts) for f in functions]
+
+    def close(self):
+        """Close the database"""
+        self._conn.close()
+
+    def __len__(self):
+        return self._conn.execute('SELECT COUNT(*) FROM presets').fetchone()[0]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,526 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@author: kushal
+
+GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007
+"""
+
+from PyQt5 import QtCore
+from typing import Dict, Iterator, List, Optional, Tuple
+import enum
+import time
+import struct
+from time import perf_counter
+from functools import partial
+from collections import namedtuple
+from .encoding import encode_value, decode_value, _decode_array
+
+
+# Log format, all numbers little endian:
+#
+# file:     magic, then records
+# record:   1 byte tag, then the payload of the tag
+# session:  b'S', float64 unix time of the start of the session, the string table is cleared
+# string:   b'N', uint32 id, uint16 length, utf-8 bytes, adds a string to the string table
+# event:    b'E', float64 seconds since the start of the session, uint32 function string id,
+#           uint32 argument string id, 1 byte value type, value
+#
+# value types:
+# b'n': None, b'T' & b'F': bool, b'i': int64, b'f': float64,
+# b's': uint32 string id for short strings, b'u': uint32 length, utf-8 for long strings,
+# b'a': array.array, 1 byte typecode, uint32 length, little endian items,
+# b'y': NumPy array, uint32 length, .npy without pickled objects, b'P': uint32 length, utf-8 path,
+# b'r': uint32 length, repr() of a literal such as a list, tuple or dict of the types above,
+# b'p': uint32 length, pickle, for everything else, only read with allow_pickle
+#
+# Enum members are recorded by name, the argument converts the name back to the member.
+# Values that do not fit in an event are encoded by ``qtap.encoding``, which the preset store also uses.
+#
+# A log can contain several sessions, recording to an existing log appends a new session.
+
+magic = b'QTAPREC1'
+
+_session = struct.Struct('<cd')
+_string = struct.Struct('<cIH')
+_event = struct.Struct('<cdIIc')
+_int = struct.Struct('<q')
+_float = struct.Struct('<d')
+_uint = struct.Struct('<I')
+
+_int_min, _int_max = -2 ** 63, 2 ** 63 - 1
+
+# strings up to this length are added to the string table, such as choices that repeat
+_max_interned = 256
+
+# one recorded change, ``time`` is unix time
+Event = namedtuple('Event', ['time', 'function', 'name', 'value'])
+
+
+class Recorder:
+    def __init__(self, target, path: str, buffer_size: int = 1 << 16, start: bool = True):
+        """
+        Append-only recorder of the argument changes of a ``Functions`` or ``Function``,
+        to reproduce what an operator did. Subscribes to ``sig_arg_changed`` of every function
+        and appends a timestamped (function, argument, value) event to a compact binary log for each emission.
+
+        Function & argument names are written once in a string table, events are fixed size for
+        ``None``, bool, int & float values. Strings are interned. ``array.array``, NumPy arrays without
+        Python objects, paths, ``Enum`` members and literals such as lists, tuples & dicts of these types are
+        encoded without pickle. Other values are pickled, and are only read back with ``allow_pickle=True``.
+        Writes are buffered, call ``flush()`` to make sure the events are on disk.
+
+        Play a log back with ``Replayer`` or read it with ``read_log()``.
+
+        .. code-block:: python
+
+            with Recorder(functions, 'session.qrec'):
+                app.exec()
+
+        Parameters
+        ----------
+        target : Union[Functions, Function]
+            ``Functions`` or ``Function`` instance
+
+        path : str
+            log file, events are appended if it exists
+
+        buffer_size : int
+            size of the write buffer in bytes
+
+        start : bool
+            start recording immediately
+
+        Attributes
+        ----------
+        n_events : int
+            number of events recorded
+        """
+        self.target = target
+        self.path = path
+
+        self.n_events = 0
+
+        self._file = open(path, 'ab', buffering=buffer_size)
+        if self._file.tell() == 0:
+            self._file.write(magic)
+
+        self._strings: Dict[str, int] = dict()
+        self._connections: List[tuple] = list()
+
+        self._t0 = 0.0
+
+        if start:
+            self.start()
+
+    @property
+    def recording(self) -> bool:
+        """``True`` while recording"""
+        return bool(self._connections)
+
+    def start(self):
+        """Start a new session in the log and start recording"""
+        if self.recording:
+            return
+
+        self._strings.clear()
+        self._file.write(_session.pack(b'S', time.time()))
+        self._t0 = perf_counter()
+
+        for f in getattr(self.target, 'functions', [self.target]):
+            slot = partial(self._record, f)
+            f.sig_arg_changed.connect(slot)
+            self._connections.append((f.sig_arg_changed, slot))
+
+    def stop(self):
+        """Stop recording and flush the buffer"""
+        for sig, slot in self._connections:
+            sig.disconnect(slot)
+        self._connections.clear()
+
+        self.flush()
+
+    def _string_id(self, s: str) -> int:
+        try:
+            return self._strings[s]
+        except KeyError:
+            i = self._strings[s] = len(self._strings)
+            b = s.encode()
+            self._file.write(_string.pack(b'N', i, len(b)) + b)
+            return i
+
+    def _record(self, f, name: str, val: object):
+        # look up the name when recording since it can change with rebind()
+        function = self._string_id(f.name)
+        arg = self._string_id(name)
+
+        t = perf_counter() - self._t0
+
+        if val is None:
+            tail = b''
+            typ = b'n'
+        elif val is True or val is False:
+            tail = b''
+            typ = b'T' if val else b'F'
+        elif type(val) is int and _int_min <= val <= _int_max:
+            tail = _int.pack(val)
+            typ = b'i'
+        elif type(val) is float:
+            tail = _float.pack(val)
+            typ = b'f'
+        elif type(val) is str and len(val) <= _max_interned:
+            tail = _uint.pack(self._string_id(val))
+            typ = b's'
+        elif isinstance(val, enum.Enum) and len(val.name) <= _max_interned:
+            tail = _uint.pack(self._string_id(val.name))
+            typ = b's'
+        else:
+            typ, b = encode_value(val)
+            tail = b if typ == b'a' else _uint.pack(len(b)) + b
+
+        self._file.write(_event.pack(b'E', t, function, arg, typ) + tail)
+        self.n_events += 1
+
+    def flush(self):
+        """Write the buffered events to the file"""
+        if not self._file.closed:
+            self._file.flush()
+
+    def close(self):
+        """Stop recording and close the log"""
+        self.stop()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def read_log(path: str, allow_pickle: bool = False) -> Iterator[Event]:
+    """
+    Read the events of a log written by a ``Recorder``
+
+    Parameters
+    ----------
+    path : str
+        log file
+
+    allow_pickle : bool
+        load values that were pickled when they were recorded, values that have no other encoding
+        such as instances of custom classes. Unpickling can run arbitrary code, only allow it for logs
+        from a trusted source.
+
+    Returns
+    -------
+    Iterator[Event]
+        namedtuples with fields ``time`` (unix time), ``function``, ``name``, ``value``.
+        A truncated event at the end of the log, such as after a crash, is ignored.
+
+    Raises
+    ------
+    ValueError
+        if the file is not a qtap log, or it contains a pickled value and ``allow_pickle`` is ``False``
+    """
+    with open(path, 'rb') as f:
+        buf = f.read()
+
+    if not buf.startswith(magic):
+        raise ValueError(f"`{path}` is not a qtap log")
+
+    # local names for the loop, logs can have millions of events
+    unpack_event = _event.unpack_from
+    unpack_int = _int.unpack_from
+    unpack_float = _float.unpack_from
+    unpack_uint = _uint.unpack_from
+    event_size = _event.size
+
+    strings: List[str] = list()
+    start = 0.0
+
+    pos = len(magic)
+    end = len(buf)
+
+    try:
+        while pos < end:
+            tag = buf[pos:pos + 1]
+
+            if tag == b'E':
+                _, t, function, name, typ = unpack_event(buf, pos)
+                pos += event_size
+
+                if typ == b'f':
+                    val = unpack_float(buf, pos)[0]
+                    pos += 8
+                elif typ == b'i':
+                    val = unpack_int(buf, pos)[0]
+                    pos += 8
+                elif typ == b's':
+                    val = strings[unpack_uint(buf, pos)[0]]
+                    pos += 4
+                elif typ == b'T':
+                    val = True
+                elif typ == b'F':
+                    val = False
+                elif typ == b'n':
+                    val = None
+                elif typ == b'a':
+                    typecode = buf[pos:pos + 1].decode('latin-1')
+                    n = unpack_uint(buf, pos + 1)[0]
+                    pos += 5
+                    if pos + n > end:
+                        raise struct.error('truncated value')
+                    val = _decode_array(typecode, buf[pos:pos + n])
+                    pos += n
+                else:
+                    n = unpack_uint(buf, pos)[0]
+                    pos += 4
+                    if pos + n > end:
+                        raise struct.error('truncated value')
+                    try:
+                        val = decode_value(typ, buf[pos:pos + n], allow_pickle)
+                    except ValueError as e:
+                        raise ValueError(f"Byte {pos} of `{path}`: {e}") from None
+                    pos += n
+
+                yield Event(start + t, strings[function], strings[name], val)
+
+            elif tag == b'N':
+                _, i, n = _string.unpack_from(buf, pos)
+                pos += _string.size
+                if pos + n > end:
+                    raise struct.error('truncated string')
+                strings.append(buf[pos:pos + n].decode())
+                pos += n
+
+            elif tag == b'S':
+                start = _session.unpack_from(buf, pos)[1]
+                pos += _session.size
+                strings.clear()
+
+            else:
+                raise ValueError(f"Unknown record {tag!r} at byte {pos} of `{path}`")
+
+    except struct.error:
+        # the log ends within a record
+        return
+
+
+class Replayer(QtCore.QObject):
+    # emits the number of events applied so far
+    sig_progress = QtCore.pyqtSignal(int)
+
+    # emitted when all events have been applied or the replay was stopped
+    sig_finished = QtCore.pyqtSignal()
+
+    def __init__(
+            self,
+            target,
+            path: str,
+            speed: Optional[float] = None,
+            batch_size: int = 10_000,
+            allow_pickle: bool = False,
+            parent: Optional[QtCore.QObject] = None
+    ):
+        """
+        Plays a log written by a ``Recorder`` back into the ``set_data()`` of a ``Functions`` or ``Function``.
+
+        Events are applied in batches, each batch is one ``set_data()`` with the last value of each argument
+        within the batch, so ``sig_changed`` is emitted once per batch.
+        At maximum speed batches are ``batch_size`` events, in real time a batch is all the events that are due
+        when the timer fires. Events of functions or arguments that the target does not have are skipped.
+        Gaps between the sessions of a log are also played back in real time.
+
+        .. code-block:: python
+
+            # real time, does not block
+            replayer = Replayer(functions, 'session.qrec', speed=1.0)
+            replayer.start()
+
+            # as fast as possible, blocks until done
+            Replayer(functions, 'session.qrec').run()
+
+        Parameters
+        ----------
+        target : Union[Functions, Function]
+            ``Functions`` or ``Function`` instance
+
+        path : str
+            log file
+
+        speed : Optional[float]
+            ``1.0`` plays back in real time, ``2.0`` twice as fast. ``None`` plays back as fast as possible.
+
+        batch_size : int
+            maximum number of events per batch at maximum speed
+
+        allow_pickle : bool
+            load pickled values, see ``read_log()``. Only allow it for logs from a trusted source.
+
+        parent : Optional[QtCore.QObject]
+            parent QObject
+
+        Attributes
+        ----------
+        n_applied : int
+            number of events applied
+
+        n_skipped : int
+            number of events skipped because the function or argument does not exist
+        """
+        super(Replayer, self).__init__(parent)
+
+        self.target = target
+        self.path = path
+        self.speed = speed
+        self.batch_size = batch_size
+        self.allow_pickle = allow_pickle
+
+        self.n_applied = 0
+        self.n_skipped = 0
+
+        self._events: Optional[Iterator[Event]] = None
+        self._next: Optional[Event] = None
+
+        # log time & perf_counter at the start of a real time replay
+        self._t0_log = 0.0
+        self._t0 = 0.0
+
+        self._timer = QtCore.QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._tick)
+
+        self._reset()
+
+    def _argument_names(self) -> Dict[str, set]:
+        return {f.name: set(f.params.names) for f in getattr(self.target, 'functions', [self.target])}
+
+    @property
+    def running(self) -> bool:
+        """``True`` while a real time replay is running"""
+        return self._events is not None
+
+    def _apply(self, batch: Dict[Tuple[str, str], object], n: int):
+        if not batch:
+            return
+
+        data = dict()
+        for (function, name), val in batch.items():
+            data.setdefault(function, dict())[name] = val
+
+        if hasattr(self.target, 'functions'):
+            self.target.set_data(data)
+        else:
+            self.target.set_data(data[self.target.name])
+
+        self.n_applied += n
+        self.sig_progress.emit(self.n_applied)
+
+    def _exists(self, key: Tuple[str, str]) -> bool:
+        # cached since every event is checked
+        try:
+            return self._known[key]
+        except KeyError:
+            function, name = key
+            exists = self._known[key] = name in self._names.get(function, ())
+            return exists
+
+    def _add(self, batch: Dict[Tuple[str, str], object], event: Event) -> bool:
+        key = (event.function, event.name)
+
+        if not self._exists(key):
+            self.n_skipped += 1
+            return False
+
+        # last value wins within a batch
+        batch[key] = event.value
+        return True
+
+    def _reset(self):
+        self._names = self._argument_names()
+        self._known: Dict[Tuple[str, str], bool] = dict()
+
+    def run(self):
+        """Apply all the events as fast as possible, blocks until done"""
+        self._reset()
+
+        batch = dict()
+        n = 0
+
+        exists = self._exists
+        batch_size = self.batch_size
+
+        for t, function, name, val in read_log(self.path, self.allow_pickle):
+            key = (function, name)
+
+            if not exists(key):
+                self.n_skipped += 1
+                continue
+
+            batch[key] = val
+
+            n += 1
+            if n >= batch_size:
+                self._apply(batch, n)
+                batch = dict()
+                n = 0
+
+        self._apply(batch, n)
+        self.sig_finished.emit()
+
+    def start(self):
+        """
+        Start the replay, at real time ``speed`` the events are applied by a timer and this returns immediately.
+        If ``speed`` is ``None`` this is the same as ``run()``.
+        """
+        if self.speed is None:
+            self.run()
+            return
+
+        self._reset()
+
+        self._events = read_log(self.path, self.allow_pickle)
+        self._next = next(self._events, None)
+
+        if self._next is None:
+            self.sig_finished.emit()
+            return
+
+        self._t0_log = self._next.time
+        self._t0 = perf_counter()
+
+        self._tick()
+
+    def stop(self):
+        """Stop a real time replay"""
+        if self._events is None:
+            return
+
+        self._timer.stop()
+        self._events = None
+        self._next = None
+
+        self.sig_finished.emit()
+
+    def _tick(self):
+        now = self._t0_log + (perf_counter() - self._t0) * self.speed
+
+        batch = dict()
+        n = 0
+
+        # everything that is due is applied as one batch
+        while self._next is not None and self._next.time <= now:
+            if self._add(batch, self._next):
+                n += 1
+            self._next = next(self._events, None)
+
+        self._apply(batch, n)
+
+        if self._next is None:
+            self._events = None
+            self.sig_finished.emit()
+            return
+
+        delay = (self._next.time - now) / self.speed
+        self._timer.start(max(0, int(delay * 1000)))
@@ -0,0 +1,568 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@author: kushal
+
+GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007
+"""
+
+from PyQt5 import QtCore
+from typing import Dict, Iterator, List, Optional, Set, Tuple, Union
+import os
+import json
+import queue
+import socket
+import ipaddress
+import threading
+import socketserver
+from functools import partial
+from concurrent.futures import Future, TimeoutError
+
+
+# JSON-RPC 2.0 error codes
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+SERVER_ERROR = -32000
+
+# events that clients can subscribe to
+events = ('changed', 'arg_changed', 'result', 'error')
+
+
+class RemoteError(Exception):
+    """Error response from a ``RemoteServer``, ``code`` is the JSON-RPC error code"""
+    def __init__(self, code: int, message: str):
+        super(RemoteError, self).__init__(f'{message} ({code})')
+        self.code = code
+        self.message = message
+
+
+def _json_default(obj):
+    # numpy arrays & scalars
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    return str(obj)
+
+
+def _encode(msg: dict) -> bytes:
+    return json.dumps(msg, default=_json_default, separators=(',', ':')).encode() + b'\n'
+
+
+def _error(request_id, code: int, message: str) -> dict:
+    return {'jsonrpc': '2.0', 'id': request_id, 'error': {'code': code, 'message': message}}
+
+
+class _Client:
+    def __init__(self, sock: socket.socket, wfile, maxsize: int):
+        # messages are written by one thread per client so that a slow client never blocks the GUI thread
+        self.sock = sock
+        self.wfile = wfile
+        self.queue: queue.Queue = queue.Queue(maxsize)
+        self.events: Set[str] = set()
+        self.n_dropped = 0
+
+        self._writer = threading.Thread(target=self._write, name='qtap-remote-writer', daemon=True)
+        self._writer.start()
+
+    def send(self, data: bytes, block: bool = True):
+        if block:
+            self.queue.put(data)
+            return
+
+        try:
+            self.queue.put_nowait(data)
+        except queue.Full:
+            # notifications are dropped for clients that do not keep up
+            self.n_dropped += 1
+
+    def _write(self):
+        while True:
+            data = self.queue.get()
+            if data is None:
+                return
+
+            try:
+                self.wfile.write(data)
+                self.wfile.flush()
+            except OSError:
+                return
+
+    def close(self):
+        try:
+            self.queue.put_nowait(None)
+        except queue.Full:
+            pass
+
+    def disconnect(self):
+        # ends the read loop of the handler thread
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    # runs in its own thread for each client
+    def handle(self):
+        remote: RemoteServer = self.server.remote
+        client = _Client(self.request, self.wfile, remote.queue_size)
+
+        remote._add_client(client)
+        try:
+            for line in self.rfile:
+                if not line.strip():
+                    continue
+
+                response = remote._handle_line(client, line)
+
+                if response is not None:
+                    client.send(_encode(response))
+        except OSError:
+            pass
+        finally:
+            remote._remove_client(client)
+            client.close()
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+if hasattr(socketserver, 'ThreadingUnixStreamServer'):
+    class _UnixServer(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+else:
+    _UnixServer = None
+
+
+class RemoteServer(QtCore.QObject):
+    # emits the address once the server is listening
+    sig_started = QtCore.pyqtSignal(object)
+
+    # callable & future, delivered to the GUI thread through a queued connection
+    _sig_call = QtCore.pyqtSignal(object, object)
+
+    def __init__(
+            self,
+            target,
+            address: Union[str, Tuple[str, int]] = ('127.0.0.1', 0),
+            timeout: float = 10.0,
+            queue_size: int = 10_000,
+            parent: Optional[QtCore.QObject] = None,
+    ):
+        """
+        Local JSON-RPC 2.0 server for driving a ``Functions`` or ``Function`` from scripts and test rigs.
+        Messages are JSON objects, one per line.
+
+        Clients are handled in their own threads, every request is run on the GUI thread and the client
+        thread waits for its result, so calls are safe. Notifications are queued for each client and written by
+        a thread of that client, a slow client does not block the GUI. Notifications for a client whose queue
+        is full are dropped.
+
+        Methods, the ``function`` param is a function name and can be omitted if the target is a ``Function``:
+
+        ``functions()``: list of the function names
+
+        ``get_data(function=None)``: argument values of one function, or of all functions keyed by name
+
+        ``set_data(data)``: set argument values as one update, same format as ``get_data``.
+        Everything is validated before any value is set.
+
+        ``set(function=None)``: same as clicking the "Set" button
+
+        ``run(function=None)``: call ``Function.run()``, the result is sent as a ``result`` notification
+
+        ``subscribe(events)``, ``unsubscribe(events)``: receive notifications for the
+        ``"changed"``, ``"arg_changed"``, ``"result"`` or ``"error"`` events
+
+        Notifications are sent as JSON-RPC requests without an id, such as
+        ``{"jsonrpc": "2.0", "method": "arg_changed", "params": {"function": "f", "name": "a", "value": 1}}``
+
+        .. code-block:: python
+
+            server = RemoteServer(functions, ('127.0.0.1', 8765))
+            server.start()
+
+            # in another process
+            with RemoteClient(('127.0.0.1', 8765)) as client:
+                client.call('set_data', data={'func_A': {'a': 10}})
+
+        Parameters
+        ----------
+        target : Union[Functions, Function]
+            ``Functions`` or ``Function`` instance
+
+        address : Union[str, Tuple[str, int]]
+            path of a Unix socket, or (host, port) for TCP. Only loopback hosts are allowed,
+            port ``0`` picks a free port, see ``address`` after ``start()``.
+
+        timeout : float
+            seconds to wait for the GUI thread to answer a request
+
+        queue_size : int
+            maximum number of messages waiting to be sent to each client
+
+        parent : Optional[QtCore.QObject]
+            parent QObject
+        """
+        super(RemoteServer, self).__init__(parent)
+
+        if not isinstance(address, str):
+            host = address[0]
+            if host != 'localhost' and not ipaddress.ip_address(host).is_loopback:
+                raise ValueError(f"The server only listens on loopback hosts, not `{host}`")
+
+        self.target = target
+        self.address = address
+        self.timeout = timeout
+        self.queue_size = queue_size
+
+        self._server: Optional[socketserver.BaseServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+        self._clients: List[_Client] = list()
+        self._clients_lock = threading.Lock()
+
+        # number of subscribed clients for each event, read by the GUI thread
+        self._n_subscribed: Dict[str, int] = {event: 0 for event in events}
+
+        self._sig_call.connect(self._run_call, QtCore.Qt.QueuedConnection)
+
+        self._connections: List[tuple] = list()
+
+        self._methods = {
+            'functions': self._functions,
+            'get_data': self._get_data,
+            'set_data': self._set_data,
+            'set': self._set,
+            'run': self._run,
+        }
+
+    @property
+    def _function_list(self) -> list:
+        return list(getattr(self.target, 'functions', [self.target]))
+
+    @property
+    def running(self) -> bool:
+        """``True`` if the server is listening"""
+        return self._server is not None
+
+    def start(self):
+        """Start listening, the address is emitted through ``sig_started``"""
+        if self._server is not None:
+            return
+
+        if isinstance(self.address, str):
+            if _UnixServer is None:
+                raise OSError("Unix sockets are not supported on this platform")
+
+            if os.path.exists(self.address):
+                os.remove(self.address)
+
+            self._server = _UnixServer(self.address, _Handler)
+        else:
+            self._server = _TCPServer(tuple(self.address), _Handler)
+            self.address = self._server.server_address[:2]
+
+        self._server.remote = self
+
+        self._connect_signals()
+
+        self._thread = threading.Thread(target=self._server.serve_forever, name='qtap-remote', daemon=True)
+        self._thread.start()
+
+        self.sig_started.emit(self.address)
+
+    def stop(self):
+        """Stop listening and disconnect all clients"""
+        if self._server is None:
+            return
+
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+        with self._clients_lock:
+            for client in self._clients:
+                client.disconnect()
+
+        self._server = None
+        self._thread = None
+
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.remove(self.address)
+
+        self._disconnect_signals()
+
+    def _connect_signals(self):
+        self._connections.append((self.target.sig_changed, self._on_changed))
+
+        for f in self._function_list:
+            self._connections.append((f.sig_arg_changed, partial(self._on_arg_changed, f)))
+            self._connections.append((f.sig_result, partial(self._on_result, f)))
+            self._connections.append((f.sig_error, partial(self._on_error, f)))
+
+        for sig, slot in self._connections:
+            sig.connect(slot)
+
+    def _disconnect_signals(self):
+        for sig, slot in self._connections:
+            sig.disconnect(slot)
+        self._connections.clear()
+
+    def _add_client(self, client: _Client):
+        with self._clients_lock:
+            self._clients.append(client)
+
+    def _remove_client(self, client: _Client):
+        with self._clients_lock:
+            self._clients.remove(client)
+            for event in client.events:
+                self._n_subscribed[event] -= 1
+
+    # --- requests, client threads ---
+
+    def _handle_line(self, client: _Client, line: bytes) -> Optional[dict]:
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            return _error(None, PARSE_ERROR, f'Parse error: {e}')
+
+        if not isinstance(request, dict) or not isinstance(request.get('method'), str):
+            return _error(None, INVALID_REQUEST, 'Invalid request')
+
+        request_id = request.get('id')
+        method = request['method']
+        params = request.get('params', dict())
+
+        if not isinstance(params, dict):
+            response = _error(request_id, INVALID_PARAMS, 'params must be an object')
+        elif method in ('subscribe', 'unsubscribe'):
+            response = self._subscribe(client, request_id, params.get('events', events), method == 'subscribe')
+        elif method not in self._methods.keys():
+            response = _error(request_id, METHOD_NOT_FOUND, f"Method not found: {method}")
+        else:
+            response = self._call_in_gui(request_id, partial(self._methods[method], **params))
+
+        if 'id' not in request:
+            # notification, no response
+            return None
+
+        return response
+
+    def _call_in_gui(self, request_id, func: callable) -> dict:
+        future = Future()
+        self._sig_call.emit(func, future)
+
+        try:
+            result = future.result(self.timeout)
+        except TimeoutError:
+            future.cancel()
+            return _error(request_id, SERVER_ERROR, f'No answer from the GUI thread within {self.timeout}s')
+        except (KeyError, AttributeError, TypeError) as e:
+            return _error(request_id, INVALID_PARAMS, f'{type(e).__name__}: {e}')
+        except Exception as e:
+            return _error(request_id, SERVER_ERROR, f'{type(e).__name__}: {e}')
+
+        return {'jsonrpc': '2.0', 'id': request_id, 'result': result}
+
+    def _subscribe(self, client: _Client, request_id, names: List[str], subscribe: bool) -> dict:
+        if isinstance(names, str):
+            names = [names]
+
+        unknown = [name for name in names if name not in events]
+        if unknown:
+            return _error(request_id, INVALID_PARAMS, f'Unknown events: {unknown}, must be in {list(events)}')
+
+        with self._clients_lock:
+            for name in names:
+                if subscribe and name not in client.events:
+                    client.events.add(name)
+                    self._n_subscribed[name] += 1
+                elif not subscribe and name in client.events:
+                    client.events.remove(name)
+                    self._n_subscribed[name] -= 1
+
+            subscribed = sorted(client.events)
+
+        return {'jsonrpc': '2.0', 'id': request_id, 'result': subscribed}
+
+    # --- GUI thread ---
+
+    def _run_call(self, func: callable, future: Future):
+        if not future.set_running_or_notify_cancel():
+            # timed out
+            return
+
+        try:
+            result = func()
+        except Exception as e:
+            future.set_exception(e)
+        else:
+            future.set_result(result)
+
+    def _get_function(self, function: Optional[str]):
+        if function is None:
+            if hasattr(self.target, 'functions'):
+                raise TypeError("`function` is required when the target is a `Functions`")
+            return self.target
+
+        for f in self._function_list:
+            if f.name == function:
+                return f
+
+        raise KeyError(f"No function named {function!r}")
+
+    def _functions(self) -> List[str]:
+        return [f.name for f in self._function_list]
+
+    def _get_data(self, function: Optional[str] = None) -> dict:
+        if function is None and hasattr(self.target, 'functions'):
+            return {f.name: f.get_data() for f in self._function_list}
+
+        return self._get_function(function).get_data()
+
+    def _set_data(self, data: dict):
+        if not isinstance(data, dict):
+            raise TypeError("`data` must be an object")
+
+        # Functions.set_data() accepts function names as keys and validates everything first
+        self.target.set_data(data)
+
+    def _set(self, function: Optional[str] = None):
+        if function is None:
+            self.target._set_clicked()
+        else:
+            self._get_function(function)._set_clicked()
+
+    def _run(self, function: Optional[str] = None) -> Optional[int]:
+        return self._get_function(function).run()
+
+    def _broadcast(self, event: str, params: dict):
+        if not self._n_subscribed[event]:
+            return
+
+        # encoded once for all the clients
+        data = _encode({'jsonrpc': '2.0', 'method': event, 'params': params})
+
+        with self._clients_lock:
+            for client in self._clients:
+                if event in client.events:
+                    client.send(data, block=False)
+
+    def _on_changed(self, data: dict):
+        if not self._n_subscribed['changed']:
+            return
+
+        if hasattr(self.target, 'functions'):
+            # keyed by the callables
+            data = {f.name: data[f.callable] for f in self._function_list if f.callable in data}
+
+        self._broadcast('changed', {'data': data})
+
+    def _on_arg_changed(self, f, name: str, val: object):
+        self._broadcast('arg_changed', {'function': f.name, 'name': name, 'value': val})
+
+    def _on_result(self, f, result: object):
+        self._broadcast('result', {'function': f.name, 'result': result})
+
+    def _on_error(self, f, e: Exception):
+        self._broadcast('error', {'function': f.name, 'error': f'{type(e).__name__}: {e}'})
+
+
+class RemoteClient:
+    def __init__(self, address: Union[str, Tuple[str, int]], timeout: Optional[float] = 10.0):
+        """
+        Blocking client for a ``RemoteServer``, does not use Qt. Notifications received while waiting for a
+        response are kept until they are read with ``notifications()``.
+
+        Parameters
+        ----------
+        address : Union[str, Tuple[str, int]]
+            path of a Unix socket, or (host, port)
+
+        timeout : Optional[float]
+            socket timeout in seconds
+        """
+        if isinstance(address, str):
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        else:
+            self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+
+        self._sock.settimeout(timeout)
+        self._sock.connect(address if isinstance(address, str) else tuple(address))
+
+        self._rfile = self._sock.makefile('rb')
+        self._request_id = 0
+        self._pending: List[dict] = list()
+
+    def call(self, method: str, **params) -> object:
+        """
+        Call a method and wait for the response
+
+        Returns
+        -------
+        object
+            result of the method
+
+        Raises
+        ------
+        RemoteError
+            if the server returned an error
+        """
+        self._request_id += 1
+        self._sock.sendall(_encode({'jsonrpc': '2.0', 'id': self._request_id, 'method': method, 'params': params}))
+
+        while True:
+            msg = self._read()
+
+            if 'id' not in msg:
+                self._pending.append(msg)
+                continue
+
+            if msg['id'] != self._request_id:
+                continue
+
+            if 'error' in msg:
+                raise RemoteError(msg['error']['code'], msg['error']['message'])
+
+            return msg['result']
+
+    def notify(self, method: str, **params):
+        """Call a method without waiting for a response"""
+        self._sock.sendall(_encode({'jsonrpc': '2.0', 'method': method, 'params': params}))
+
+    def notifications(self, block: bool = True) -> Iterator[dict]:
+        """
+        Yields received notifications as dicts with ``"method"`` and ``"params"``.
+        If ``block`` is ``False`` only the notifications that were already received are yielded.
+        """
+        while True:
+            while self._pending:
+                yield self._pending.pop(0)
+
+            if not block:
+                return
+
+            msg = self._read()
+            if 'id' not in msg:
+                yield msg
+
+    def _read(self) -> dict:
+        line = self._rfile.readline()
+        if not line:
+            raise ConnectionError("Connection closed by the server")
+        return json.loads(line)
+
+    def close(self):
+        """Close the connection"""
+        self._rfile.close()
+        self._sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@author: kushal
+
+GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007
+"""
+
+from PyQt5 import QtCore, QtGui, QtWidgets
+from typing import Optional
+import re
+import array
+from .argument import Arg
+from .model import ArgSpec, to_sequence
+from .signature import sequence_item_type, sequence_typecodes
+
+
+# separators for pasted & imported values
+_separators = re.compile(r'[\s,;]+')
+
+
+def parse_values(text: str, typecode: str) -> array.array:
+    """
+    Parse numbers separated by whitespace, commas or semicolons, such as a column copied from a spreadsheet
+
+    Parameters
+    ----------
+    text : str
+        text to parse
+
+    typecode : str
+        ``array.array`` typecode of the result
+
+    Returns
+    -------
+    array.array
+        parsed values
+
+    Raises
+    ------
+    ValueError
+        if a value is not a number of the right type
+    """
+    conv = float if typecode == 'd' else int
+    return array.array(typecode, map(conv, _separators.split(text.strip()) if text.strip() else ()))
+
+
+class SequenceTableModel(QtCore.QAbstractTableModel):
+    # emits the new array after a cell is edited
+    sig_edited = QtCore.pyqtSignal(object)
+
+    def __init__(self, sequence: Optional[array.array] = None, parent: Optional[QtCore.QObject] = None):
+        """
+        Single column table model that views an ``array.array`` without copying it.
+        Only the rows that are visible in the view are read.
+
+        The array is never modified, since it may be held by the history or used by a running function.
+        An edit copies the array, one memcpy, changes the copy, views it and emits it through ``sig_edited``.
+
+        Parameters
+        ----------
+        sequence : Optional[array.array]
+            array to view
+
+        parent : Optional[QtCore.QObject]
+            parent QObject
+        """
+        super(SequenceTableModel, self).__init__(parent)
+
+        self._sequence = None
+        self.set_sequence(sequence)
+
+    @property
+    def sequence(self) -> Optional[array.array]:
+        """the array being viewed"""
+        return self._sequence
+
+    def set_sequence(self, sequence: Optional[array.array]):
+        """View a different array, not copied"""
+        self.beginResetModel()
+        self._sequence = sequence
+        self.endResetModel()
+
+    def rowCount(self, parent=QtCore.QModelIndex()) -> int:
+        if parent.isValid() or self._sequence is None:
+            return 0
+        return len(self._sequence)
+
+    def columnCount(self, parent=QtCore.QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return 1
+
+    def data(self, index: QtCore.QModelIndex, role: int = QtCore.Qt.DisplayRole):
+        if not index.isValid() or self._sequence is None:
+            return None
+
+        if role == QtCore.Qt.DisplayRole:
+            return self._sequence[index.row()]
+
+        if role == QtCore.Qt.EditRole:
+            # edited as text, the default spinbox editors round floats and limit the range
+            return repr(self._sequence[index.row()])
+
+        return None
+
+    def setData(self, index: QtCore.QModelIndex, value, role: int = QtCore.Qt.EditRole) -> bool:
+        if not index.isValid() or role != QtCore.Qt.EditRole:
+            return False
+
+        conv = float if self._sequence.typecode == 'd' else int
+
+        new = array.array(self._sequence.typecode, self._sequence)
+
+        try:
+            new[index.row()] = conv(value)
+        except (ValueError, TypeError, OverflowError):
+            return False
+
+        # same shape, the view does not need to be reset
+        self._sequence = new
+        self.dataChanged.emit(index, index, [role])
+        self.sig_edited.emit(new)
+        return True
+
+    def flags(self, index: QtCore.QModelIndex) -> QtCore.Qt.ItemFlags:
+        return QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable | QtCore.Qt.ItemIsEditable
+
+    def headerData(self, section: int, orientation: QtCore.Qt.Orientation, role: int = QtCore.Qt.DisplayRole):
+        if role != QtCore.Qt.DisplayRole:
+            return None
+
+        if orientation == QtCore.Qt.Horizontal:
+            return 'value'
+
+        return str(section)
+
+
+class ArgSequence(Arg):
+    acceptable_types = (array.array,)
+    kind = 'sequence'
+    stretch = True
+
+    def __init__(
+            self,
+            name: str,
+            typ: type,
+            val,
+            parent: QtWidgets.QWidget,
+            vlayout: QtWidgets.QVBoxLayout,
+            **kwargs
+    ):
+        """
+        Creates a table for editing a sequence argument annotated as ``List[float]``, ``Tuple[int, ...]``,
+        ``Sequence[float]`` and so on. Values are stored in an ``array.array``, 8 bytes per element,
+        ``val`` and ``get_data()`` return the array itself. The function receives the ``array.array``,
+        which supports indexing, slicing, ``len()`` and iteration like a list.
+
+        Pasting (Ctrl+V) writes the values from the clipboard starting at the current row, or appends them
+        if no row is selected, and "Import" loads a ``.csv``, ``.txt`` or ``.npy`` file.
+        Cell edits, pasting and importing set a new array, the current array is never modified, so every change
+        is recorded and can be undone, and a running function does not see later edits.
+
+        Parameters
+        ----------
+        val : Union[array.array, list, tuple, np.ndarray]
+            values, converted to an ``array.array`` if necessary
+
+        **kwargs
+            passed to Arg
+        """
+        self.model = SequenceTableModel()
+
+        # typ can be set by arg_opts, the typecode comes from the annotation
+        self.typecode = sequence_typecodes[sequence_item_type(typ)]
+
+        super(ArgSequence, self).__init__(name, typ, val, parent, vlayout, **kwargs)
+
+        self.model.setParent(self)
+
+        # only the visible rows are ever read, fixed row heights avoid measuring each row
+        self.widget.verticalHeader().setSectionResizeMode(QtWidgets.QHeaderView.Fixed)
+        self.widget.horizontalHeader().setStretchLastSection(True)
+        self.widget.setModel(self.model)
+
+        self.widget.installEventFilter(self)
+
+        self.button_import = QtWidgets.QPushButton(self.parent)
+        self.button_import.setText('Import')
+        self.hlayout.addWidget(self.button_import)
+        self.button_import.clicked.connect(self._import_clicked)
+
+        self.model.sig_edited.connect(self._set)
+
+    @classmethod
+    def get_widget_type(cls, typ: type) -> type:
+        return QtWidgets.QTableView
+
+    def _widgets(self) -> list:
+        return [self._qlabel, self.widget, self.button_import]
+
+    def configure(
+            self,
+            name: str,
+            val,
+            tooltip: Optional[str] = None,
+            spec: Optional[ArgSpec] = None,
+            **kwargs
+    ):
+        if spec is not None:
+            self.typecode = sequence_typecodes[sequence_item_type(spec.typ)]
+
+        super(ArgSequence, self).configure(name, val, tooltip, spec)
+
+    @property
+    def val(self) -> Optional[array.array]:
+        """current values, the ``array.array`` itself"""
+        return self.spec.val
+
+    @val.setter
+    def val(self, v):
+        if v is not None:
+            v = to_sequence(v, self.typecode)
+
+        self.spec.val = v
+
+        # already viewed after a cell edit
+        if v is not self.model.sequence:
+            self.model.set_sequence(v)
+
+    def _set(self, values: array.array):
+        # new array, recorded as a change by the Function
+        self.val = values
+        self.sig_changed.emit(self.val)
+
+    def paste(self, text: Optional[str] = None, row: Optional[int] = None):
+        """
+        Write values starting at a row, the sequence is extended if necessary
+
+        Parameters
+        ----------
+        text : Optional[str]
+            numbers separated by whitespace, commas or semicolons, the clipboard text by default
+
+        row : Optional[int]
+            first row to write, the current row by default, or the end of the sequence if no row is selected
+
+        Raises
+        ------
+        ValueError
+            if a value is not a number of the right type
+        """
+        if text is None:
+            text = QtWidgets.QApplication.clipboard().text()
+
+        values = parse_values(text, self.typecode)
+
+        current = array.array(self.typecode) if self.val is None else self.val
+
+        if row is None:
+            index = self.widget.currentIndex()
+            row = index.row() if index.isValid() else len(current)
+
+        # copies the buffer, one memcpy
+        new = array.array(self.typecode, current)
+        new[row:row + len(values)] = values
+
+        self._set(new)
+
+    def import_file(self, path: str):
+        """
+        Replace the values with the contents of a file
+
+        Parameters
+        ----------
+        path : str
+            ``.npy`` file, or a text file such as ``.csv`` or ``.txt`` with numbers separated by whitespace,
+            commas or semicolons. NumPy is only imported for ``.npy`` files.
+
+        Raises
+        ------
+        ValueError
+            if a value is not a number of the right type
+        """
+        if path.lower().endswith('.npy'):
+            import numpy as np
+            values = to_sequence(np.load(path, mmap_mode='r'), self.typecode)
+        else:
+            with open(path, 'r') as f:
+                values = parse_values(f.read(), self.typecode)
+
+        self._set(values)
+
+    def _import_clicked(self):
+        path, _ = QtWidgets.QFileDialog.getOpenFileName(
+            self.parent, f'Import {self.name}', '', 'Data (*.csv *.txt *.npy);;All files (*)'
+        )
+
+        if not path:
+            return
+
+        try:
+            self.import_file(path)
+        except (ValueError, OSError) as e:
+            QtWidgets.QMessageBox.warning(self.parent, 'Import failed', str(e))
+
+    def eventFilter(self, obj: QtCore.QObject, event: QtCore.QEvent) -> bool:
+        if obj is self.widget and event.type() == QtCore.QEvent.KeyPress and event.matches(QtGui.QKeySequence.Paste):
+            try:
+                self.paste()
+            except ValueError:
+                QtWidgets.QApplication.beep()
+            return True
+
+        return False
+
+    def __repr__(self):
+        if self.val is None:
+            return super(ArgSequence, self).__repr__()
+
+        return f"name:\t{self.name}\n" \
+               f"val:\t{self.typecode} array of {len(self.val)}\n" \
+               f"typ:\t{self.typ}"
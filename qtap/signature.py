@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@author: kushal
+
+GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007
+"""
+
+import sys
+import copy
+import enum
+import typing
+from typing import Dict, Hashable, Optional, Tuple
+from collections import namedtuple, OrderedDict, abc
+
+
+# this is a massive nested lambda, not sure if there's a more elegant way to do this without a nasty loop
+_ignore_arguments = lambda d: (lambda d: True if d['ignore'] else False)(d) if 'ignore' in d.keys() else False
+
+
+# compiled spec for a single argument
+# kind: which Arg class is used, kwargs: kwargs for the Arg, without parent & vlayout
+ArgumentSpec = namedtuple('ArgumentSpec', ['name', 'kind', 'kwargs'])
+
+# compiled spec for a function
+CompiledSignature = namedtuple(
+    'CompiledSignature',
+    [
+        'arg_opts',  # dict of opts for every function argument, including ignored arguments
+        'specs',  # tuple of ArgumentSpec for arguments that are not ignored
+        'Arguments',  # namedtuple type for the Arg instances
+        'defaults',  # dict of initial values of the arguments that are not ignored
+    ]
+)
+
+
+# element types of sequence arguments and the ``array.array`` typecodes they are stored as
+sequence_typecodes = {int: 'q', float: 'd'}
+
+
+def sequence_item_type(annotation) -> Optional[type]:
+    """
+    Element type of a sequence annotation such as ``List[float]``, ``Tuple[int, ...]`` or ``Sequence[float]``
+
+    Parameters
+    ----------
+    annotation
+        type annotation of an argument
+
+    Returns
+    -------
+    Optional[type]
+        ``int`` or ``float``, ``None`` if the annotation is not a sequence of one of these types
+    """
+    origin = getattr(annotation, '__origin__', None)
+    if origin not in (list, tuple, abc.Sequence, abc.MutableSequence):
+        return None
+
+    args = tuple(arg for arg in getattr(annotation, '__args__', ()) if arg is not Ellipsis)
+
+    # homogeneous sequences only
+    if not args or any(arg is not args[0] for arg in args) or args[0] not in sequence_typecodes:
+        return None
+
+    return args[0]
+
+
+def literal_values(annotation) -> Optional[Tuple]:
+    """
+    Values of a ``Literal[...]`` annotation
+
+    Returns
+    -------
+    Optional[Tuple]
+        the allowed values, ``None`` if the annotation is not a ``Literal``
+    """
+    literal = getattr(typing, 'Literal', None)
+    if literal is None or getattr(annotation, '__origin__', None) is not literal:
+        return None
+    return tuple(annotation.__args__)
+
+
+def is_enum(annotation) -> bool:
+    """``True`` if the annotation is an ``Enum`` subclass"""
+    return isinstance(annotation, type) and issubclass(annotation, enum.Enum)
+
+
+def _get_kind(annotation) -> str:
+    if annotation in [int, float]:
+        return 'numeric'
+
+    if literal_values(annotation) is not None or is_enum(annotation):
+        return 'choice'
+
+    if sequence_item_type(annotation) is not None:
+        return 'sequence'
+
+    # an annotation can only be a path if pathlib has been imported
+    pathlib = sys.modules.get('pathlib')
+    if pathlib is not None and isinstance(annotation, type) and issubclass(annotation, pathlib.PurePath):
+        return 'path'
+
+    # an annotation can only be an ndarray if numpy has been imported
+    np = sys.modules.get('numpy')
+    if np is not None and isinstance(annotation, type) and issubclass(annotation, np.ndarray):
+        return 'array'
+
+    return 'generic'
+
+
+def _freeze(obj) -> Hashable:
+    # hashable representation of the nested arg_opts dicts, with the types
+    # since 1, 1.0 and True are equal but give different arguments
+    if isinstance(obj, dict):
+        return tuple((k, _freeze(v)) for k, v in sorted(obj.items(), key=lambda kv: str(kv[0])))
+    elif isinstance(obj, (list, tuple)):
+        return type(obj), tuple(_freeze(v) for v in obj)
+    elif isinstance(obj, (set, frozenset)):
+        return type(obj), frozenset(_freeze(v) for v in obj)
+
+    hash(obj)
+    return type(obj), obj
+
+
+def _compile(func: callable, arg_opts: Optional[dict]) -> CompiledSignature:
+    # imported on first use, inspect is slow to import
+    import inspect
+
+    params = inspect.signature(func).parameters
+
+    opts = {arg: {} for arg in params.keys()}
+    if arg_opts is not None:
+        # the result is cached, the caller may modify its arg_opts afterwards
+        opts.update(copy.deepcopy(arg_opts))
+
+    # arguments that take the output of an upstream function in a pipeline do not get a widget
+    ignore = [
+        k for k in opts.keys() if _ignore_arguments(opts[k]) or opts[k].get('input') is not None
+    ]
+
+    specs = list()
+    for sig in params.values():
+        if sig.name in ignore:
+            continue
+
+        if sig.default is inspect._empty:
+            default = None
+        else:
+            default = sig.default
+
+        kwargs = dict(
+            name=sig.name,
+            typ=sig.annotation,
+            val=default,
+        )
+
+        kwargs.update(opts[sig.name])
+
+        if opts[sig.name].get('choices') is not None:
+            # such as a str argument with choices loaded from a callable
+            kind = 'choice'
+        else:
+            kind = _get_kind(sig.annotation)
+
+        specs.append(ArgumentSpec(sig.name, kind, kwargs))
+
+    return CompiledSignature(
+        arg_opts=opts,
+        specs=tuple(specs),
+        Arguments=namedtuple("Arguments", [spec.name for spec in specs]),
+        defaults={spec.name: spec.kwargs['val'] for spec in specs},
+    )
+
+
+class _SignatureCache:
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._cache = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, func: callable, arg_opts: Optional[dict]) -> CompiledSignature:
+        try:
+            key = (func, _freeze(arg_opts))
+        except TypeError:
+            # unhashable arg_opts or callable, cannot be cached
+            self.misses += 1
+            return _compile(func, arg_opts)
+
+        try:
+            compiled = self._cache[key]
+        except KeyError:
+            self.misses += 1
+            compiled = _compile(func, arg_opts)
+            self._cache[key] = compiled
+
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+        else:
+            self.hits += 1
+            self._cache.move_to_end(key)
+
+        return compiled
+
+    def clear(self):
+        self._cache.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+_cache = _SignatureCache()
+
+
+def compile_signature(func: callable, arg_opts: Optional[dict] = None) -> CompiledSignature:
+    """
+    Get the compiled argument specs for a function.
+    Results are cached using the callable and its ``arg_opts`` as the key,
+    so constructing the same ``Function`` again does not introspect the signature.
+
+    The returned object is shared, do not modify it.
+
+    Parameters
+    ----------
+    func : callable
+        A function with type annotations
+
+    arg_opts : Optional[dict]
+        arg_opts as passed to ``Function``
+
+    Returns
+    -------
+    CompiledSignature
+        namedtuple with fields ``arg_opts``, ``specs``, ``Arguments`` and ``defaults``
+
+    """
+    return _cache.get(func, arg_opts)
+
+
+def set_cache_size(maxsize: int):
+    """
+    Set the maximum number of compiled signatures to keep, least recently used signatures are evicted first
+
+    Parameters
+    ----------
+    maxsize : int
+        maximum number of cached signatures
+    """
+    _cache.maxsize = maxsize
+
+    while len(_cache._cache) > maxsize:
+        _cache._cache.popitem(last=False)
+
+
+def clear_cache():
+    """Remove all cached signatures and reset the statistics"""
+    _cache.clear()
+
+
+def cache_info() -> Dict[str, int]:
+    """
+    Statistics for the signature cache
+
+    Returns
+    -------
+    dict
+        {'hits': int, 'misses': int, 'size': int, 'maxsize': int}
+
+    """
+    return {
+        'hits': _cache.hits,
+        'misses': _cache.misses,
+        'size': len(_cache._cache),
+        'maxsize': _cache.maxsize,
+    }
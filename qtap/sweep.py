@@ -0,0 +1,418 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@author: kushal
+
+GNU GENERAL PUBLIC LICENSE Version 3, 29 June 2007
+"""
+
+from PyQt5 import QtCore
+from typing import Dict, Iterator, List, Optional, Sequence, Union
+import os
+import math
+import itertools
+import random
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def vectorized(func: callable) -> callable:
+    """
+    Decorator to declare that a function accepts NumPy arrays for its numeric arguments
+    and broadcasts them, ``Function.sweep()`` then calls it once with all the samples.
+
+    .. code-block:: python
+
+        @vectorized
+        def f(a: float = 1.0, b: float = 2.0):
+            return np.sin(a) * b
+    """
+    func.qtap_vectorized = True
+    return func
+
+
+def is_vectorized(func: callable) -> bool:
+    """``True`` if the function was declared with ``@vectorized``"""
+    return getattr(func, 'qtap_vectorized', False)
+
+
+def _arange(lo: Union[int, float], hi: Union[int, float], step: Union[int, float], typ: type) -> list:
+    # the last point is not past hi, the tolerance keeps hi when (hi - lo) / step is a whole number
+    n = math.floor((hi - lo) / step + 1e-9) + 1
+    vals = [lo + i * step for i in range(n)]
+    if typ is int:
+        return [int(round(v)) for v in vals]
+    return vals
+
+
+def _linspace(lo: Union[int, float], hi: Union[int, float], n: int, typ: type) -> list:
+    if n == 1:
+        vals = [lo]
+    else:
+        vals = [lo + (hi - lo) * i / (n - 1) for i in range(n)]
+
+    if typ is int:
+        # remove duplicates from rounding, keep order
+        return list(dict.fromkeys(int(round(v)) for v in vals))
+    return vals
+
+
+def grid_values(
+        ranges: Dict[str, tuple],
+        points: Dict[str, Union[int, Sequence, None]]
+) -> Dict[str, list]:
+    """
+    Values along each axis of a grid
+
+    Parameters
+    ----------
+    ranges : Dict[str, tuple]
+        (min, max, step, type) for each argument
+
+    points : Dict[str, Union[int, Sequence, None]]
+        number of points between min & max, an explicit sequence of values, or ``None`` to use the step size
+
+    Returns
+    -------
+    Dict[str, list]
+        values for each argument
+    """
+    values = dict()
+    for name, p in points.items():
+        lo, hi, step, typ = ranges[name]
+
+        if p is None:
+            values[name] = _arange(lo, hi, step, typ)
+        elif isinstance(p, int):
+            values[name] = _linspace(lo, hi, p, typ)
+        else:
+            values[name] = list(p)
+
+    return values
+
+
+def random_samples(
+        ranges: Dict[str, tuple],
+        points: Dict[str, Union[int, Sequence, None]],
+        n: int,
+        seed: Optional[int] = None
+) -> Dict[str, list]:
+    """
+    Random samples within the min & max of each argument
+
+    Parameters
+    ----------
+    ranges : Dict[str, tuple]
+        (min, max, step, type) for each argument
+
+    points : Dict[str, Union[int, Sequence, None]]
+        explicit sequences are sampled from, anything else samples uniformly between min & max
+
+    n : int
+        number of samples
+
+    seed : Optional[int]
+        random seed
+
+    Returns
+    -------
+    Dict[str, list]
+        ``n`` values for each argument
+    """
+    rng = random.Random(seed)
+
+    samples = dict()
+    for name, p in points.items():
+        lo, hi, step, typ = ranges[name]
+
+        if p is not None and not isinstance(p, int):
+            p = list(p)
+            samples[name] = [rng.choice(p) for i in range(n)]
+        elif typ is int:
+            samples[name] = [rng.randint(lo, hi) for i in range(n)]
+        else:
+            samples[name] = [rng.uniform(lo, hi) for i in range(n)]
+
+    return samples
+
+
+def _call_batch(func: callable, fixed: dict, batch: List[dict]) -> list:
+    results = list()
+    for sample in batch:
+        kwargs = dict(fixed)
+        kwargs.update(sample)
+        results.append(func(**kwargs))
+    return results
+
+
+def _to_table(names: List[str], samples: List[dict], results: list):
+    if np is None:
+        rows = list()
+        for sample, r in zip(samples, results):
+            row = dict(sample)
+            row['result'] = r
+            rows.append(row)
+        return rows
+
+    columns = {name: np.asarray([s[name] for s in samples]) for name in names}
+
+    try:
+        column_result = np.asarray(results)
+        if column_result.ndim != 1:
+            column_result = None
+    except ValueError:
+        # results with different shapes
+        column_result = None
+
+    table = np.empty(
+        len(samples),
+        dtype=[(name, c.dtype) for name, c in columns.items()] +
+              [('result', object if column_result is None else column_result.dtype)]
+    )
+
+    for name, c in columns.items():
+        table[name] = c
+
+    if column_result is None:
+        for i, r in enumerate(results):
+            table['result'][i] = r
+    else:
+        table['result'] = column_result
+
+    return table
+
+
+class _SweepSignals(QtCore.QObject):
+    sig_progress = QtCore.pyqtSignal(int, int)
+    sig_batch = QtCore.pyqtSignal(object)
+    sig_finished = QtCore.pyqtSignal(object)
+    sig_error = QtCore.pyqtSignal(object)
+
+
+class _SweepRunnable(QtCore.QRunnable):
+    def __init__(self, sweep: 'Sweep'):
+        super(_SweepRunnable, self).__init__()
+        self.sweep = sweep
+
+    def run(self):
+        try:
+            self.sweep._run()
+        except Exception as e:
+            self.sweep._signals.sig_error.emit(e)
+
+
+class Sweep(QtCore.QObject):
+    # number of samples done, total number of samples
+    sig_progress = QtCore.pyqtSignal(int, int)
+
+    # table with the results of the latest batch
+    sig_batch = QtCore.pyqtSignal(object)
+
+    # table with all the results
+    sig_finished = QtCore.pyqtSignal(object)
+
+    # exception raised by the function
+    sig_error = QtCore.pyqtSignal(object)
+
+    def __init__(
+            self,
+            func: callable,
+            fixed: dict,
+            values: Dict[str, list],
+            grid: bool,
+            batch_size: int = 64,
+            executor: str = 'thread',
+            n_workers: Optional[int] = None,
+            parent: Optional[QtCore.QObject] = None,
+    ):
+        """
+        Runs a function over samples of its arguments in the background.
+        Usually created with ``Function.sweep()``.
+
+        Results are tables with a column for each swept argument and a ``result`` column.
+        The tables are NumPy structured arrays if NumPy is installed, otherwise lists of dicts.
+
+        Parameters
+        ----------
+        func : callable
+            function to sweep
+
+        fixed : dict
+            kwargs for the arguments that are not swept
+
+        values : Dict[str, list]
+            values of the swept arguments, the axes of the grid if ``grid`` is ``True``,
+            otherwise the samples themselves
+
+        grid : bool
+            if ``True`` the samples are all combinations of ``values``
+
+        batch_size : int
+            number of samples per batch, ``sig_progress`` and ``sig_batch`` are emitted after each batch
+
+        executor : str
+            ``"thread"`` or ``"process"``, used to run batches in parallel for functions that are not vectorized
+
+        n_workers : Optional[int]
+            number of threads or processes, ``os.cpu_count()`` by default
+
+        parent : Optional[QtCore.QObject]
+            parent QObject
+
+        Attributes
+        ----------
+        sig_progress : int, int
+            number of samples done and total number of samples
+
+        sig_batch : object
+            table of results for the latest batch
+
+        sig_finished : object
+            table of all results
+
+        sig_error : object
+            exception raised by the function
+        """
+        super(Sweep, self).__init__(parent)
+
+        if executor not in ['thread', 'process']:
+            raise ValueError(f"`executor` must be one of 'thread' or 'process', you passed: {executor}")
+
+        self.func = func
+        self.fixed = fixed
+        self.values = values
+        self.grid = grid
+        self.batch_size = batch_size
+        self.executor = executor
+        self.n_workers = n_workers
+
+        self.names = list(values.keys())
+
+        if self.grid:
+            self.total = 1
+            for v in values.values():
+                self.total *= len(v)
+        else:
+            self.total = len(next(iter(values.values()))) if values else 0
+
+        self._cancelled = False
+
+        # emitted from the worker thread, delivered to the GUI thread through a queued connection
+        self._signals = _SweepSignals(self)
+        self._signals.sig_progress.connect(self.sig_progress)
+        self._signals.sig_batch.connect(self.sig_batch)
+        self._signals.sig_finished.connect(self.sig_finished)
+        self._signals.sig_error.connect(self.sig_error)
+
+    def start(self, pool: Optional[QtCore.QThreadPool] = None):
+        """
+        Start the sweep in a background thread
+
+        Parameters
+        ----------
+        pool : Optional[QtCore.QThreadPool]
+            thread pool, the global instance is used by default
+        """
+        if pool is None:
+            pool = QtCore.QThreadPool.globalInstance()
+
+        pool.start(_SweepRunnable(self))
+
+    def cancel(self):
+        """Stop after the current batch"""
+        self._cancelled = True
+
+    def _samples(self) -> Iterator[dict]:
+        if self.grid:
+            for combination in itertools.product(*self.values.values()):
+                yield dict(zip(self.names, combination))
+        else:
+            for i in range(self.total):
+                yield {name: v[i] for name, v in self.values.items()}
+
+    def run(self):
+        """Run the sweep in the calling thread, returns the table of all results"""
+        return self._run()
+
+    def _run(self):
+        if is_vectorized(self.func):
+            table = self._run_vectorized()
+        else:
+            table = self._run_batches()
+
+        if table is not None:
+            self._signals.sig_finished.emit(table)
+
+        return table
+
+    def _run_vectorized(self):
+        if np is None:
+            raise ImportError("NumPy is required to sweep vectorized functions")
+
+        if self.grid:
+            # open grid, the function broadcasts it to the full grid
+            axes = np.meshgrid(*(np.asarray(v) for v in self.values.values()), indexing='ij', sparse=True)
+        else:
+            axes = [np.asarray(v) for v in self.values.values()]
+
+        kwargs = dict(self.fixed)
+        kwargs.update(zip(self.names, axes))
+
+        result = np.asarray(self.func(**kwargs))
+
+        shape = np.broadcast(*axes).shape
+        result = np.broadcast_to(result, shape + result.shape[len(shape):])
+
+        table = np.empty(
+            self.total,
+            dtype=[(name, np.asarray(v).dtype) for name, v in self.values.items()] +
+                  [('result', result.dtype, result.shape[len(shape):])]
+        )
+
+        for name, axis in zip(self.names, axes):
+            table[name] = np.broadcast_to(axis, shape).ravel()
+
+        table['result'] = result.reshape((self.total,) + result.shape[len(shape):])
+
+        self._signals.sig_progress.emit(self.total, self.total)
+        self._signals.sig_batch.emit(table)
+
+        return table
+
+    def _run_batches(self):
+        samples = self._samples()
+
+        batches = iter(lambda: list(itertools.islice(samples, self.batch_size)), [])
+
+        pool_type = ThreadPoolExecutor if self.executor == 'thread' else ProcessPoolExecutor
+
+        all_samples = list()
+        all_results = list()
+
+        n_workers = self.n_workers or os.cpu_count() or 1
+
+        with pool_type(max_workers=n_workers) as pool:
+            # batches are split between the workers
+
+            for batch in batches:
+                if self._cancelled:
+                    return None
+
+                chunk = max(1, len(batch) // n_workers)
+                chunks = [batch[i:i + chunk] for i in range(0, len(batch), chunk)]
+
+                results = list()
+                for r in pool.map(_call_batch, itertools.repeat(self.func), itertools.repeat(self.fixed), chunks):
+                    results.extend(r)
+
+                all_samples.extend(batch)
+                all_results.extend(results)
+
+                self._signals.sig_batch.emit(_to_table(self.names, batch, results))
+                self._signals.sig_progress.emit(len(all_samples), self.total)
+
+        return _to_table(self.names, all_samples, all_results)
@@ -14,5 +14,5 @@ setup(
     description='Automatic Qt parameter entry widgets using function signatures ',
     long_description=long_description,
     long_description_content_type='text/markdown',
-    python_requires='>=3.6',
+    python_requires='>=3.7',
 )